@@ -0,0 +1,311 @@
+"""
+Admission control for synchronous validations
+
+Every validation request gets a cost estimate from its source length, its
+number of claims (after sentence splitting) and the validators configured
+for each field. The estimate decides:
+
+- whether the request is accepted at all: sources longer than
+  ``admission_max_source_chars`` and requests with more than
+  ``admission_max_claims`` claims are rejected with 413 (asynchronous jobs
+  are the place for them)
+- its lane: requests costing at least ``admission_large_cost`` run in the
+  ``large`` lane, which admits at most ``admission_large_concurrency`` of
+  them at a time, so large documents cannot occupy every executor worker
+  while small requests queue behind them
+
+Streamed source uploads (``/sources/stream``) index on the same workers
+and always take a ``large`` lane slot.
+
+Each client (``admission_client_header`` or the peer address) may also
+have at most ``admission_client_concurrency`` validations in flight. Lanes
+and quotas that are full reject with 429 and ``Retry-After`` instead of
+queueing without bound.
+
+Lanes and quotas are per process and are only touched from the event loop.
+"""
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from starlette.requests import Request
+
+from api.cascade import validator_name
+from api.config import settings
+from api.metrics import ADMISSION_REJECTED
+from api.source_index import claim_texts
+from api.validation import claim_units, narrows_source
+
+# Relative per-claim cost of the library's validators (nli_validator = 1.0)
+# on a source of COST_SOURCE_CHARS characters; validators not listed count
+# as 1.0
+VALIDATOR_COSTS = {
+    "temporal_drift_validator": 0.05,
+    "lexical_coverage_validator": 0.1,
+    "hybrid_bm25_minilm_validator": 0.4,
+    "nli_validator": 1.0,
+}
+COST_SOURCE_CHARS = 10_000
+
+
+class RequestTooLarge(Exception):
+    """The request exceeds a configured size limit (413)"""
+
+
+class Overloaded(Exception):
+    """The client's quota or the request's lane is full (429)"""
+
+
+class CostEstimate:
+    """Size and estimated cost of a validation request"""
+
+    __slots__ = ("source_chars", "claims", "cost")
+
+    def __init__(self, source_chars: int, claims: int, cost: float):
+        self.source_chars = source_chars
+        self.claims = claims
+        self.cost = cost
+
+    def __add__(self, other: "CostEstimate") -> "CostEstimate":
+        return CostEstimate(
+            self.source_chars + other.source_chars,
+            self.claims + other.claims,
+            self.cost + other.cost,
+        )
+
+
+def validator_cost(policies: Dict[str, Any], field: str) -> float:
+    """Estimated per-claim cost of the validators configured for ``field``"""
+    entries = (policies.get("validators") or {}).get(field) or []
+    return sum(VALIDATOR_COSTS.get(validator_name(entry), 1.0) for entry in entries)
+
+
+def estimate_cost(
+    source_text: str,
+    schema: Dict[str, Any],
+    claims: Dict[str, Any],
+    policies: Dict[str, Any],
+) -> CostEstimate:
+    """
+    Cost of validating ``claims`` against ``source_text``
+
+    The sum over claims of their field's validator costs, scaled linearly
+    with the source length (retrieval and NLI both grow with it). Sources
+    narrowed to their relevant passages before validation
+    (``source_prefilter_min_chars``) count as that many characters, also
+    against ``admission_max_source_chars``.
+    """
+    chars = len(source_text)
+    if narrows_source(chars):
+        chars = settings.source_prefilter_min_chars
+    return estimate_cost_chars(chars, schema, claims, policies)
+
+
+def estimate_cost_chars(
+    source_chars: int,
+    schema: Dict[str, Any],
+    claims: Dict[str, Any],
+    policies: Dict[str, Any],
+) -> CostEstimate:
+    """``estimate_cost`` for a source of ``source_chars`` characters as the checker sees it"""
+    units = claim_units(schema, claims)
+    if units is not None:
+        count = len(units)
+        base = sum(validator_cost(policies, field) for field, _, _ in units)
+    else:
+        count = len(claim_texts(claims))
+        fields = list((schema.get("fields") or {}))
+        base = count * max((validator_cost(policies, f) for f in fields), default=1.0)
+    scale = 1.0 + source_chars / COST_SOURCE_CHARS
+    return CostEstimate(source_chars, count, base * scale)
+
+
+def client_id(request: Request, header: str = "") -> str:
+    """Quota key of a request: the configured header if sent, else the peer address"""
+    if header:
+        value = request.headers.get(header)
+        if value:
+            return value
+    return request.client.host if request.client is not None else "unknown"
+
+
+class Lane:
+    """
+    At most ``max_active`` admitted requests (0 = no limit) and at most
+    ``max_waiting`` more waiting for a slot, first come first served
+    """
+
+    def __init__(self, name: str, max_active: int, max_waiting: int):
+        self.name = name
+        self.max_active = max(0, max_active)
+        self.max_waiting = max(0, max_waiting)
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = 0
+
+    async def acquire(self):
+        if not self.max_active or (self.active < self.max_active and not self._waiters):
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_waiting:
+            self.rejected += 1
+            raise Overloaded(
+                f"{self.name} lane is full ({self.active} running, {len(self._waiters)} waiting)"
+            )
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the request went away
+                self.release()
+            raise
+        self.admitted += 1
+
+    def release(self):
+        # Hand the slot straight to the next waiter, if any
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_active": self.max_active,
+            "max_waiting": self.max_waiting,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class Ticket:
+    """An admitted request; ``release()`` (idempotent) frees its lane slot and quota"""
+
+    def __init__(self, controller: "AdmissionController", client: str, lane: Lane):
+        self._controller = controller
+        self.client = client
+        self.lane = lane
+        self._released = False
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self.lane.release()
+        self._controller._leave(self.client)
+
+
+class AdmissionController:
+    """Size limits, cost lanes and per-client quotas"""
+
+    def __init__(
+        self,
+        max_source_chars: int = 0,
+        max_claims: int = 0,
+        large_cost: float = 0.0,
+        small_concurrency: int = 0,
+        small_queue: int = 0,
+        large_concurrency: int = 1,
+        large_queue: int = 4,
+        client_concurrency: int = 0,
+    ):
+        self.max_source_chars = max_source_chars
+        self.max_claims = max_claims
+        self.large_cost = large_cost
+        self.client_concurrency = max(0, client_concurrency)
+        self.lanes = {
+            "small": Lane("small", small_concurrency, small_queue),
+            "large": Lane("large", large_concurrency, large_queue),
+        }
+        self._clients: Dict[str, int] = {}
+        self.rejected = {"too_large": 0, "client_quota": 0, "lane_full": 0}
+
+    def _reject(self, reason: str):
+        self.rejected[reason] += 1
+        ADMISSION_REJECTED.inc(reason=reason)
+
+    def check_size(self, estimate: CostEstimate):
+        """Raise ``RequestTooLarge`` when a size limit is exceeded"""
+        if self.max_source_chars and estimate.source_chars > self.max_source_chars:
+            self._reject("too_large")
+            raise RequestTooLarge(
+                f"Source has {estimate.source_chars} characters "
+                f"(max {self.max_source_chars}); submit it as a job instead"
+            )
+        if self.max_claims and estimate.claims > self.max_claims:
+            self._reject("too_large")
+            raise RequestTooLarge(
+                f"Request has {estimate.claims} claims "
+                f"(max {self.max_claims}); submit it as a job instead"
+            )
+
+    def lane_for(self, estimate: CostEstimate) -> Lane:
+        large = bool(self.large_cost) and estimate.cost >= self.large_cost
+        return self.lanes["large" if large else "small"]
+
+    async def admit(self, client: str, estimate: CostEstimate, lane: Optional[str] = None) -> Ticket:
+        """
+        Wait for a slot in the estimate's lane (or the named ``lane``)
+
+        Raises ``Overloaded`` when the client already has its quota of
+        validations in flight or the lane's queue is full.
+        """
+        in_flight = self._clients.get(client, 0)
+        if self.client_concurrency and in_flight >= self.client_concurrency:
+            self._reject("client_quota")
+            raise Overloaded(
+                f"Too many concurrent validations for this client (max {self.client_concurrency})"
+            )
+        self._clients[client] = in_flight + 1
+        lane = self.lanes[lane] if lane is not None else self.lane_for(estimate)
+        try:
+            await lane.acquire()
+        except Overloaded:
+            self._leave(client)
+            self._reject("lane_full")
+            raise
+        except BaseException:
+            self._leave(client)
+            raise
+        return Ticket(self, client, lane)
+
+    def _leave(self, client: str):
+        remaining = self._clients.get(client, 1) - 1
+        if remaining > 0:
+            self._clients[client] = remaining
+        else:
+            self._clients.pop(client, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "large_cost": self.large_cost,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+            "clients_in_flight": len(self._clients),
+            "client_concurrency": self.client_concurrency,
+            "rejected": dict(self.rejected),
+        }
+
+
+def create_admission_controller(settings) -> Optional[AdmissionController]:
+    """Build the configured admission controller, or None when disabled"""
+    if not settings.admission_enabled:
+        return None
+    return AdmissionController(
+        max_source_chars=settings.admission_max_source_chars,
+        max_claims=settings.admission_max_claims,
+        large_cost=settings.admission_large_cost,
+        small_concurrency=settings.admission_small_concurrency,
+        small_queue=settings.admission_small_queue,
+        large_concurrency=settings.admission_large_concurrency,
+        large_queue=settings.admission_large_queue,
+        client_concurrency=settings.admission_client_concurrency,
+    )
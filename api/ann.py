@@ -0,0 +1,137 @@
+"""
+Approximate nearest-neighbour search over source sentence embeddings
+
+Exact retrieval scores every claim sentence against every source sentence.
+For long sources an ``IVFIndex`` (inverted file) groups the L2-normalised
+sentence embeddings into ``nlist`` clusters by spherical k-means; a query
+is compared with the cluster centroids and only the sentences of the
+``nprobe`` nearest clusters are scored. With ``nlist`` around
+``4 * sqrt(n)`` a search reads roughly ``nprobe * sqrt(n) / 4`` rows
+instead of ``n``. More probes give higher recall at higher latency
+(``benchmarks/ann_recall.py`` measures both against exact search).
+
+Plain numpy, CPU only. Embedding matrices may be memory-mapped (spilled
+source indexes); rows are read a block at a time while building and only
+the probed rows while searching.
+"""
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Rows assigned to clusters per block while building
+ASSIGN_BLOCK_ROWS = 16_384
+# Training sample per cluster (and overall cap)
+TRAIN_ROWS_PER_LIST = 64
+TRAIN_MAX_ROWS = 100_000
+
+
+def default_nlist(rows: int) -> int:
+    """About ``4 * sqrt(rows)`` clusters, at least 1"""
+    return max(1, min(rows, int(round(4 * np.sqrt(rows)))))
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class IVFIndex:
+    """
+    Inverted file over the rows of an embedding matrix
+
+    ``list_ids[list_offsets[c]:list_offsets[c + 1]]`` are the rows
+    assigned to centroid ``c``.
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        list_ids: np.ndarray,
+        nprobe: int = 8,
+        build_ms: float = 0.0,
+    ):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_ids = list_ids
+        self.nprobe = max(1, nprobe)
+        self.build_ms = build_ms
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        nlist: int = 0,
+        nprobe: int = 8,
+        iterations: int = 10,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """
+        Cluster the rows of ``embeddings`` (L2-normalised)
+
+        ``nlist`` 0 picks ``default_nlist``. Centroids are trained by
+        spherical k-means on a sample of the rows, then every row is
+        assigned to its nearest centroid.
+        """
+        start = time.perf_counter()
+        rows = len(embeddings)
+        nlist = min(rows, nlist or default_nlist(rows))
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(rows, max(nlist * TRAIN_ROWS_PER_LIST, nlist), TRAIN_MAX_ROWS)
+        sample_ids = np.sort(rng.choice(rows, size=sample_size, replace=False))
+        sample = np.asarray(embeddings[sample_ids], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+        for _ in range(max(0, iterations)):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # Restart empty clusters on random sample rows
+                sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        assignment = np.empty(rows, dtype=np.int32)
+        for block_start in range(0, rows, ASSIGN_BLOCK_ROWS):
+            block = np.asarray(embeddings[block_start:block_start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+            assignment[block_start:block_start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+
+        list_ids = np.argsort(assignment, kind="stable").astype(np.int32)
+        list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=nlist), out=list_offsets[1:])
+        return cls(
+            centroids.astype(np.float32), list_offsets, list_ids, nprobe,
+            (time.perf_counter() - start) * 1000,
+        )
+
+    def __len__(self) -> int:
+        return len(self.list_ids)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Rows in the ``nprobe`` clusters nearest to ``query``, ascending"""
+        nprobe = min(self.nlist, nprobe or self.nprobe)
+        scores = self.centroids @ query.astype(np.float32)
+        probes = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        lists = [self.list_ids[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probes]
+        return np.sort(np.concatenate(lists))
+
+    @property
+    def nbytes(self) -> int:
+        return self.centroids.nbytes + self.list_offsets.nbytes + self.list_ids.nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        sizes = np.diff(self.list_offsets)
+        return {
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "largest_list": int(sizes.max()) if len(sizes) else 0,
+            "build_ms": round(self.build_ms, 1),
+            "bytes": self.nbytes,
+        }
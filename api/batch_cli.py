@@ -0,0 +1,348 @@
+"""
+Offline bulk validation
+
+    python -m api.batch_cli records.jsonl results.jsonl
+    python -m api.batch_cli records.csv results.jsonl --workers 8 --schema schema.yaml
+    python -m api.batch_cli records.parquet results.jsonl --resume
+
+Validates every record of a JSONL, CSV or Parquet file against one
+schema/policies configuration (the web UI defaults unless ``--schema`` /
+``--policies`` are given) on a pool of worker processes, and streams one
+JSON line per record to the output, in input order::
+
+    {"index": 0, "id": "doc-1", "result": {...}, "error": null}
+
+Records have the fields of a ``/validate/batch`` item (``id``,
+``source_text`` or ``source_id``, ``claims``); a ``claims`` value that is
+a plain string is validated as ``{"<text field>": text}``, as in the web
+UI. Invalid records get an ``error`` line and do not stop the run.
+
+The models are loaded once in the parent and shared copy-on-write by the
+forked workers, as with gunicorn preloading. Progress is checkpointed next
+to the output (``<output>.checkpoint.json``); ``--resume`` continues an
+interrupted run after the last checkpointed record. Parquet input needs
+``pyarrow``.
+"""
+import argparse
+import csv
+import gc
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+from api.checker_pool import config_fingerprint
+from api.config import settings
+from api.models import DEFAULT_MAX_EVIDENCE, BatchValidationItem, evidence_limit
+from api.serialization import Projection, dumps, loads
+
+logger = logging.getLogger("api.batch_cli")
+
+FORMATS = ("jsonl", "csv", "parquet")
+
+# Configuration of this worker process (set by _init_worker)
+_worker_config: Dict[str, Any] = {}
+
+
+def detect_format(path: Path) -> str:
+    suffix = path.suffix.lower().lstrip(".")
+    if suffix in ("jsonl", "ndjson", "json"):
+        return "jsonl"
+    if suffix in FORMATS:
+        return suffix
+    raise ValueError(f"Cannot tell the format of {path}; pass --format")
+
+
+def read_records(path: Path, fmt: str) -> Iterator[Any]:
+    """Records of ``path`` one at a time: JSON lines as text, CSV/Parquet rows as dicts"""
+    if fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield line
+    elif fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet input needs pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=1024):
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unknown input format: {fmt}")
+
+
+def parse_record(record: Any, text_field: str) -> BatchValidationItem:
+    """
+    Batch item for one input record
+
+    Raises ``ValueError`` (including pydantic's ``ValidationError``) for
+    records that are not valid JSON objects or batch items.
+    """
+    if isinstance(record, str):
+        record = loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+    record = {k: v for k, v in record.items() if v not in (None, "")}
+    claims = record.get("claims")
+    if isinstance(claims, str):
+        text = claims.strip()
+        if text.startswith("{"):
+            claims = loads(text)
+        else:
+            claims = {text_field: text}
+        record["claims"] = claims
+    if record.get("id") is not None:
+        record["id"] = str(record["id"])
+    return BatchValidationItem.model_validate(record)
+
+
+def _init_worker(schema: Dict[str, Any], policies: Dict[str, Any], threads: int):
+    """Worker initializer: keep the configuration and split the CPU between workers"""
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    if not settings.onnx_threads:
+        settings.onnx_threads = threads
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+    _worker_config.update(schema=schema, policies=policies)
+
+
+def _validate_chunk(
+    pairs: List[Tuple[str, Dict[str, Any]]], max_evidence: Optional[int]
+) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    from api.validation import run_validation_batch
+
+    return run_validation_batch(
+        _worker_config["schema"], _worker_config["policies"], pairs, max_evidence
+    )
+
+
+class Checkpoint:
+    """
+    Progress of a run, next to its output
+
+    ``records_done`` records have been written, ending at byte
+    ``output_bytes`` of the output; anything after that is a partly
+    written chunk and is dropped on resume.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        if not self.path.exists():
+            return None
+        return json.loads(self.path.read_text())
+
+    def save(self, state: Dict[str, Any]):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, indent=2))
+        os.replace(tmp, self.path)
+
+
+def load_config(schema_path: Optional[str], policies_path: Optional[str]):
+    from api.warmup import load_default_configs
+
+    schema, policies = load_default_configs()
+    if schema_path:
+        schema = yaml.safe_load(Path(schema_path).read_text())
+    if policies_path:
+        policies = yaml.safe_load(Path(policies_path).read_text())
+    return schema, policies
+
+
+def _chunks(iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(args) -> Dict[str, Any]:
+    from api.validation import SOURCECHECK_AVAILABLE
+
+    if not SOURCECHECK_AVAILABLE:
+        raise SystemExit("sourcecheck library not available")
+
+    input_path = Path(args.input)
+    output_path = Path(args.output)
+    fmt = args.format or detect_format(input_path)
+    schema, policies = load_config(args.schema, args.policies)
+    max_evidence = evidence_limit(args.evidence_mode, args.max_evidence)
+    try:
+        projection = Projection.parse(args.fields, not args.no_evidence)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    checkpoint = Checkpoint(output_path.with_name(output_path.name + ".checkpoint.json"))
+    run_key = {
+        "input": str(input_path.resolve()),
+        "config": config_fingerprint(schema, policies),
+        "max_evidence": max_evidence,
+        "fields": list(projection.keep) if projection is not None else None,
+    }
+    done, output_bytes = 0, 0
+    state = checkpoint.load() if args.resume else None
+    if state is not None:
+        if any(state.get(k) != v for k, v in run_key.items()):
+            raise SystemExit(
+                f"{checkpoint.path} belongs to a run with another input or configuration"
+            )
+        done, output_bytes = state["records_done"], state["output_bytes"]
+        if not output_path.exists() or output_path.stat().st_size < output_bytes:
+            raise SystemExit(f"{output_path} is shorter than its checkpoint; cannot resume")
+        logger.info("Resuming after %d records", done)
+    elif output_path.exists() and output_path.stat().st_size and not args.overwrite:
+        raise SystemExit(f"{output_path} exists; pass --resume or --overwrite")
+
+    registry = None
+    workers = max(1, args.workers)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    if args.preload:
+        # Load the models once here; forked workers share them copy-on-write
+        from api.warmup import warm_up
+
+        warm_up(schema, policies)
+        gc.freeze()
+
+    counts = {"records": done, "succeeded": 0, "failed": 0}
+    started = time.perf_counter()
+    last_report = started
+
+    def write_chunk(out, entries, future: Optional[Future]):
+        outcomes = iter(future.result() if future is not None else [])
+        for index, item_id, error in entries:
+            result = None
+            if error is None:
+                result, error = next(outcomes)
+                if result is not None and projection is not None:
+                    result = projection.response(result)
+            counts["failed" if error is not None else "succeeded"] += 1
+            out.write(dumps({"index": index, "id": item_id, "result": result, "error": error}))
+            out.write(b"\n")
+        counts["records"] += len(entries)
+
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if fork else None)
+    with open(output_path, "r+b" if output_bytes else "wb") as out, ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(schema, policies, threads),
+    ) as pool:
+        out.truncate(output_bytes)
+        out.seek(output_bytes)
+        pending: deque = deque()
+        last_saved = done
+        records = itertools.islice(enumerate(read_records(input_path, fmt)), done, None)
+
+        for chunk in _chunks(records, args.chunk_size):
+            entries, pairs = [], []
+            for index, record in chunk:
+                try:
+                    item = parse_record(record, args.text_field)
+                    source_text = item.source_text
+                    if source_text is None:
+                        if registry is None:
+                            from api.registry import get_registry
+                            registry = get_registry()
+                        source_text = registry.get_source(item.source_id)
+                        if source_text is None:
+                            raise ValueError(f"Unknown source id: {item.source_id}")
+                except ValueError as e:
+                    entries.append((index, None, f"Invalid record: {e}"))
+                    continue
+                entries.append((index, item.id, None))
+                pairs.append((source_text, item.claims))
+            future = pool.submit(_validate_chunk, pairs, max_evidence) if pairs else None
+            pending.append((entries, future))
+
+            # Write finished chunks in order; keep at most two chunks per worker in flight
+            while pending and (
+                len(pending) > 2 * workers or pending[0][1] is None or pending[0][1].done()
+            ):
+                write_chunk(out, *pending.popleft())
+            if counts["records"] - last_saved >= args.checkpoint_every:
+                out.flush()
+                os.fsync(out.fileno())
+                checkpoint.save({
+                    **run_key, "records_done": counts["records"], "output_bytes": out.tell()
+                })
+                last_saved = counts["records"]
+            now = time.perf_counter()
+            if now - last_report >= args.progress_interval:
+                rate = (counts["records"] - done) / (now - started)
+                logger.info(
+                    "%d records (%d failed), %.1f records/s", counts["records"], counts["failed"], rate
+                )
+                last_report = now
+
+        while pending:
+            write_chunk(out, *pending.popleft())
+        out.flush()
+        os.fsync(out.fileno())
+        checkpoint.save({
+            **run_key,
+            "records_done": counts["records"],
+            "output_bytes": out.tell(),
+            "completed": True,
+        })
+
+    elapsed = time.perf_counter() - started
+    return {
+        **counts,
+        "processed": counts["records"] - done,
+        "seconds": round(elapsed, 1),
+        "records_per_s": round((counts["records"] - done) / elapsed, 2) if elapsed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", help="JSONL, CSV or Parquet file of records")
+    parser.add_argument("output", help="JSONL file of results")
+    parser.add_argument("--format", choices=FORMATS, help="Input format (default: from the suffix)")
+    parser.add_argument("--schema", help="Schema YAML (default: the web UI default)")
+    parser.add_argument("--policies", help="Policies YAML (default: the web UI default)")
+    parser.add_argument("--text-field", default="body",
+                        help="Field plain-text claims are validated as (default body)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=8, help="Records per worker task")
+    parser.add_argument("--evidence-mode", choices=("none", "top_k", "all"), default="top_k")
+    parser.add_argument("--max-evidence", type=int,
+                        help=f"Spans per claim with top_k (default {DEFAULT_MAX_EVIDENCE})")
+    parser.add_argument("--fields", help="Comma-separated disposition fields to write")
+    parser.add_argument("--no-evidence", action="store_true", help="Drop evidence spans from the output")
+    parser.add_argument("--checkpoint-every", type=int, default=1000,
+                        help="Records between checkpoints (default 1000)")
+    parser.add_argument("--progress-interval", type=float, default=30.0,
+                        help="Seconds between progress lines (default 30)")
+    parser.add_argument("--resume", action="store_true", help="Continue after the last checkpoint")
+    parser.add_argument("--overwrite", action="store_true", help="Replace an existing output")
+    parser.add_argument("--no-preload", dest="preload", action="store_false",
+                        help="Load models in each worker instead of once before forking")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    summary = run(args)
+    print(json.dumps(summary))
+    if summary["failed"]:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
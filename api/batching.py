@@ -0,0 +1,131 @@
+"""
+Micro-batching of concurrent work
+
+``MicroBatcher`` collects items submitted by concurrent requests and runs
+them together once ``max_batch`` items (by size) are waiting or the oldest
+has waited ``max_wait_ms``, whichever comes first. Items are grouped by a
+key, so only compatible items (e.g. same checker configuration) share a
+batch. Each submitter gets its own item's result back.
+
+Batch sizes and waits are recorded in the ``sourcecheck_batch_size`` and
+``sourcecheck_batch_wait_seconds`` histograms, labelled by batcher name, so
+the size/deadline trade-off can be tuned from ``/metrics``.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from api.metrics import REGISTRY, Histogram
+
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "sourcecheck_batch_size",
+    "Items per executed micro-batch",
+    ("batcher",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+))
+BATCH_WAIT = REGISTRY.register(Histogram(
+    "sourcecheck_batch_wait_seconds",
+    "Time items waited for their micro-batch to start",
+    ("batcher",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+))
+
+
+class _Pending:
+    __slots__ = ("items", "size", "timer")
+
+    def __init__(self):
+        self.items: List[Tuple[Any, float, asyncio.Future]] = []
+        self.size = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """
+    Size- and deadline-bounded batching of items from concurrent callers
+
+    ``run_batch(key, items)`` is awaited with the items of one batch and
+    must return one result per item, in order; an ``Exception`` instance
+    in place of a result is raised to that item's caller only. If
+    ``run_batch`` itself raises, every caller in the batch gets the error.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+        max_batch: int = 8,
+        max_wait_ms: float = 5.0,
+        name: str = "batch",
+    ):
+        self.run_batch = run_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self._pending: Dict[Hashable, _Pending] = {}
+        self._tasks: set = set()
+        self.batches = 0
+        self.items = 0
+        self.full_batches = 0
+
+    async def submit(self, key: Hashable, item: Any, size: int = 1) -> Any:
+        """Queue ``item`` (counting as ``size`` towards ``max_batch``) and await its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _Pending()
+        pending.items.append((item, time.perf_counter(), future))
+        pending.size += max(1, size)
+
+        if pending.size >= self.max_batch or self.max_wait == 0:
+            self._flush(key, full=pending.size >= self.max_batch)
+        elif pending.timer is None:
+            pending.timer = loop.call_later(self.max_wait, self._flush, key)
+        return await future
+
+    def _flush(self, key: Hashable, full: bool = False):
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+        task = asyncio.ensure_future(self._run(key, pending.items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.batches += 1
+        self.items += len(pending.items)
+        if full:
+            self.full_batches += 1
+
+    async def _run(self, key: Hashable, entries: List[Tuple[Any, float, asyncio.Future]]):
+        started = time.perf_counter()
+        BATCH_SIZE.observe(len(entries), batcher=self.name)
+        for _, queued_at, _ in entries:
+            BATCH_WAIT.observe(started - queued_at, batcher=self.name)
+        try:
+            results = await self.run_batch(key, [item for item, _, _ in entries])
+        except BaseException as e:
+            for _, _, future in entries:
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        for (_, _, future), result in zip(entries, results):
+            if future.done():
+                continue  # the caller went away
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "full_batches": self.full_batches,
+            "avg_batch": self.items / self.batches if self.batches else 0.0,
+            "waiting": sum(len(p.items) for p in self._pending.values()),
+        }
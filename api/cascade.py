@@ -0,0 +1,275 @@
+"""
+Early-exit validator cascade
+
+Policies using ``weighted_voting`` can list validators to run first under
+``aggregation.cascade``:
+
+    aggregation:
+      strategy: "weighted_voting"
+      default_weights: {...}
+      cascade:
+        first: [temporal_drift_validator, lexical_coverage_validator,
+                hybrid_bm25_minilm_validator]
+
+Every validator of a field then runs on its own, the listed ones first and
+in that order, the others after them in their configured order, and each
+claim's verdicts are tallied with the configured weights. Once the leading
+verdict of a claim is ahead of the runner-up by more than the combined
+weight of the validators not yet run, nothing left can change the vote:
+the claim is decided and the rest are skipped for it, provided the
+``min_score`` threshold cannot come out differently either
+(``score_settled``). Its disposition is composed from the runs it had
+(``compose_disposition``), so no validator runs twice for a claim; the
+score of a claim decided early averages the validators that ran.
+
+Quality modules analyse every validator's vote on a claim (the
+``semantic_quality`` module looks at their disagreement), which a claim
+decided without some of them cannot reproduce. Policies whose verdicts or
+scores depend on quality (``quality_modules``, a ``min_quality_score``
+threshold or ``quality_weighted`` scoring) are therefore never cascaded,
+and cascade steps run without quality modules.
+
+A claim can only be decided early once the validators that agree on it
+outweigh all validators not yet run. With the shipped weights (temporal
+0.8, lexical 0.5, NLI 0.7, hybrid 0.7, 2.7 in all) no one or two of them
+can decide a claim; temporal, lexical and hybrid agreeing (2.0 against
+0.7 left) skip NLI. ``earliest_decision`` gives that step for an order.
+
+This module holds the policy handling and vote arithmetic; the cascade
+itself runs in ``api.validation``.
+"""
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def validator_name(entry: Any) -> str:
+    """Name of a validator entry (``name`` or ``{name: options}``)"""
+    if isinstance(entry, dict):
+        return next(iter(entry))
+    return str(entry)
+
+
+def quality_dependent(policies: Dict[str, Any]) -> bool:
+    """Whether verdicts or scores under ``policies`` depend on quality analysis"""
+    thresholds = policies.get("verdict_thresholds") or {}
+    return bool(
+        policies.get("quality_modules")
+        or thresholds.get("min_quality_score")
+        or (policies.get("scoring") or {}).get("method") == "quality_weighted"
+    )
+
+
+def cascade_validators(policies: Dict[str, Any]) -> Optional[List[str]]:
+    """
+    Validators to run first, or None when the policies do not cascade
+
+    Quality-dependent policies (``quality_dependent``) are not cascaded.
+    """
+    aggregation = policies.get("aggregation") or {}
+    cascade = aggregation.get("cascade")
+    if not isinstance(cascade, dict) or not cascade.get("enabled", True):
+        return None
+    if aggregation.get("strategy", "weighted_voting") != "weighted_voting":
+        return None
+    if quality_dependent(policies):
+        return None
+    return [str(name) for name in cascade.get("first") or []] or None
+
+
+def cascade_order(first: List[str], configured: List[str]) -> List[str]:
+    """Run order of a field's validators: those in ``first``, then the rest"""
+    return [name for name in first if name in configured] + [
+        name for name in configured if name not in first
+    ]
+
+
+def earliest_decision(order: List[str], weights: Dict[str, float]) -> Optional[int]:
+    """
+    Fewest validators of ``order`` after which a claim they all agree on is
+    decided, or None if only running all of them decides it
+    """
+    total = sum(weights.get(name, 1.0) for name in order)
+    agreed = 0.0
+    for ran, name in enumerate(order[:-1], start=1):
+        agreed += weights.get(name, 1.0)
+        if agreed > total - agreed:
+            return ran
+    return None
+
+
+def claim_key(text: Any) -> str:
+    """Claim text as matched across cascade steps (terminal punctuation aside)"""
+    return str(text).strip().rstrip(".!?").strip()
+
+
+def without_cascade(policies: Dict[str, Any]) -> Dict[str, Any]:
+    """``policies`` minus the cascade settings, which the library does not know"""
+    aggregation = policies.get("aggregation")
+    if not isinstance(aggregation, dict) or "cascade" not in aggregation:
+        return policies
+    stripped = dict(policies)
+    stripped["aggregation"] = {k: v for k, v in aggregation.items() if k != "cascade"}
+    return stripped
+
+
+def validator_weights(policies: Dict[str, Any]) -> Dict[str, float]:
+    aggregation = policies.get("aggregation") or {}
+    return {
+        name: float(weight)
+        for name, weight in (aggregation.get("default_weights") or {}).items()
+    }
+
+
+def restrict_validators(
+    policies: Dict[str, Any],
+    keep: Dict[str, List[str]],
+    quality_modules: bool = True,
+) -> Dict[str, Any]:
+    """Copy of ``policies`` running only the ``keep[field]`` validators of each kept field"""
+    restricted = copy.deepcopy(without_cascade(policies))
+    restricted["validators"] = {
+        field: [entry for entry in entries if validator_name(entry) in keep[field]]
+        for field, entries in (policies.get("validators") or {}).items()
+        if field in keep
+    }
+    if not quality_modules:
+        restricted["quality_modules"] = []
+    return restricted
+
+
+def step_policies(policies: Dict[str, Any], keep: Dict[str, List[str]]) -> Dict[str, Any]:
+    """
+    Policies for one cascade step
+
+    Only the ``keep[field]`` validators run, without quality modules, and
+    the score threshold is lifted so each step reports its validator's own
+    verdict; it is applied to the composed vote instead
+    (``compose_disposition``).
+    """
+    restricted = restrict_validators(policies, keep, quality_modules=False)
+    thresholds = restricted.get("verdict_thresholds")
+    if isinstance(thresholds, dict):
+        restricted["verdict_thresholds"] = {**thresholds, "min_score": 0.0}
+    return restricted
+
+
+def score_settled(
+    runs: List[Tuple[str, Dict[str, Any]]],
+    verdict: str,
+    weights: Dict[str, float],
+    remaining: float,
+    policies: Dict[str, Any],
+) -> bool:
+    """
+    Whether ``min_score`` gives a claim the same verdict whatever the
+    validators not yet run (``remaining`` weight) report
+
+    Only supported verdicts are gated. The remaining validators can add
+    their weight to the voters with any confidence in [0, 1], which bounds
+    the weighted mean confidence the full vote would get.
+    """
+    min_score = (policies.get("verdict_thresholds") or {}).get("min_score", 0.0)
+    if verdict != "supported" or not min_score or remaining <= 0:
+        return True
+    scored = [
+        (weights.get(name, 1.0), d["score"])
+        for name, d in runs if d["verdict"] == verdict and d["score"] is not None
+    ]
+    weight = sum(w for w, _ in scored) + remaining
+    points = sum(w * score for w, score in scored)
+    return points / weight >= min_score or (points + remaining) / weight < min_score
+
+
+def compose_disposition(
+    runs: List[Tuple[str, Dict[str, Any]]],
+    verdict: str,
+    weights: Dict[str, float],
+    policies: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Disposition of a claim decided by the cascade, from its step results
+
+    ``runs`` are ``(validator, disposition)`` in the order they ran. The
+    disposition of the heaviest validator voting for ``verdict`` gives the
+    explanation and evidence, ``score`` is the weighted mean confidence of
+    the validators voting for it, and ``verdict_thresholds`` (``min_score``,
+    ``fail_verdict``) are applied to the result as the library applies
+    them to its aggregate. Cascaded policies have no quality analysis
+    (``quality_dependent``), so there is no quality score or issue.
+    """
+    voters = [(name, d) for name, d in runs if d["verdict"] == verdict]
+    primary = max(voters, key=lambda run: weights.get(run[0], 1.0))[1]
+    scored = [(weights.get(name, 1.0), d["score"]) for name, d in voters if d["score"] is not None]
+    total = sum(weight for weight, _ in scored)
+    composed = dict(primary)
+    composed.update(
+        verdict=verdict,
+        score=sum(weight * score for weight, score in scored) / total if total else None,
+        quality_score=None,
+        quality_issues=[],
+    )
+    thresholds = policies.get("verdict_thresholds") or {}
+    if (
+        verdict == "supported"
+        and composed["score"] is not None
+        and composed["score"] < thresholds.get("min_score", 0.0)
+    ):
+        composed["verdict"] = thresholds.get("fail_verdict", "insufficient_evidence")
+    return composed
+
+
+class VoteTally:
+    """Weighted verdict votes for one claim"""
+
+    def __init__(self):
+        self.votes: Dict[str, float] = {}
+
+    def add(self, verdict: str, weight: float):
+        self.votes[verdict] = self.votes.get(verdict, 0.0) + weight
+
+    def decided(self, remaining: float) -> Optional[str]:
+        """The winning verdict if ``remaining`` more weight cannot change it"""
+        if not self.votes:
+            return None
+        ranked = sorted(self.votes.items(), key=lambda item: item[1], reverse=True)
+        lead = ranked[0][1] - (ranked[1][1] if len(ranked) > 1 else 0.0)
+        if remaining <= 0 or lead > remaining:
+            return ranked[0][0]
+        return None
+
+
+class CostModel:
+    """
+    Running CPU cost per claim, per key (a configuration and validator)
+
+    Used to estimate what the validator runs a cascade skipped would have
+    cost: it is learned from the claims each validator did run on.
+    """
+
+    def __init__(self, max_entries: int = 256, alpha: float = 0.2):
+        self.max_entries = max_entries
+        self.alpha = alpha
+        self._per_claim: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, key: str, cpu_seconds: float, claims: int):
+        if claims <= 0:
+            return
+        value = cpu_seconds / claims
+        with self._lock:
+            previous = self._per_claim.pop(key, None)
+            if previous is not None:
+                value = previous + self.alpha * (value - previous)
+            self._per_claim[key] = value
+            while len(self._per_claim) > self.max_entries:
+                self._per_claim.popitem(last=False)
+
+    def per_claim(self, key: str) -> Optional[float]:
+        with self._lock:
+            return self._per_claim.get(key)
+
+
+# CPU per claim of each cascade step validator (one model per process)
+cost_model = CostModel()
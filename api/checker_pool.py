@@ -0,0 +1,152 @@
+"""
+Checker pool
+
+Building a ``Checker`` sets up the NLI model, the MiniLM embedder and the
+spaCy pipeline, which takes seconds. The pool keeps warm instances keyed by
+a fingerprint of the schema and policies so requests that share a
+configuration reuse the same instance.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def config_fingerprint(schema: Dict[str, Any], policies: Dict[str, Any]) -> str:
+    """
+    Canonical hash of a schema/policies pair
+
+    Key order and whitespace do not affect the result, so the same YAML
+    loaded by different clients maps to the same checker.
+    """
+    canonical = json.dumps(
+        {"schema": schema, "policies": policies},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (0.0 if unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class _Entry:
+    __slots__ = ("checker", "size_mb")
+
+    def __init__(self, checker: Any, size_mb: float):
+        self.checker = checker
+        self.size_mb = size_mb
+
+
+class CheckerPool:
+    """
+    Bounded LRU cache of ``Checker`` instances
+
+    Entries are evicted least-recently-used first when either the entry
+    count exceeds ``max_size`` or the summed memory estimate exceeds
+    ``max_memory_mb``. The memory cost of an entry is the RSS growth
+    observed while constructing it, or ``estimated_mb`` when that is larger
+    (models shared with an earlier instance do not show up as growth).
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[Dict[str, Any], Dict[str, Any]], Any],
+        max_size: int = 4,
+        max_memory_mb: float = 3072,
+        estimated_mb: float = 0,
+    ):
+        self._factory = factory
+        self.max_size = max(1, max_size)
+        self.max_memory_mb = max_memory_mb
+        self.estimated_mb = estimated_mb
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, schema: Dict[str, Any], policies: Dict[str, Any]) -> Any:
+        """Return a warm checker for this configuration, building it on a miss"""
+        key = config_fingerprint(schema, policies)
+        checker = self._lookup(key)
+        if checker is not None:
+            return checker
+
+        # Only one thread builds a given configuration; others wait for it
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            checker = self._lookup(key, count_miss=True)
+            if checker is not None:
+                return checker
+
+            rss_before = current_rss_mb()
+            checker = self._factory(schema, policies)
+            size_mb = max(current_rss_mb() - rss_before, self.estimated_mb, 0.0)
+            logger.info(
+                "Built checker %s (~%.0f MB)", key[:12], size_mb
+            )
+
+            with self._lock:
+                self._entries[key] = _Entry(checker, size_mb)
+                self._evict()
+                self._key_locks.pop(key, None)
+            return checker
+
+    def _lookup(self, key: str, count_miss: bool = False) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.checker
+            if count_miss:
+                self.misses += 1
+            return None
+
+    def _evict(self):
+        # Called with self._lock held; the newest entry is never evicted
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_size
+            or self.memory_mb > self.max_memory_mb
+        ):
+            key, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            logger.info("Evicted checker %s", key[:12])
+
+    @property
+    def memory_mb(self) -> float:
+        return sum(entry.size_mb for entry in self._entries.values())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "memory_mb": round(self.memory_mb, 1),
+                "max_memory_mb": self.max_memory_mb,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,135 @@
+"""
+Process-wide memo of per-claim work
+
+Summaries written by templated agents repeat the same sentences across
+documents, and one request splits its claim fields several times (cost
+estimate, cascade, claims-parallel groups, retrieval queries). Two LRU
+memos, each bounded by entry count and bytes, keep that work:
+
+- ``sentence_memo``: sentence spans of claim strings, keyed by the exact
+  string (the spans are offsets into it)
+- ``embedding_memo``: claim sentence embeddings, keyed by encoder and
+  whitespace-normalised text, so a repeated sentence is encoded once
+
+Temporal and entity parsing of claims happens inside the sourcecheck
+library and is not covered. Hit rates are under ``claim_memo`` in
+``GET /api/v1/stats`` (for the API process; process workers keep their
+own memos).
+"""
+import sys
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from api.config import settings
+
+
+def normalize_claim(text: Any) -> str:
+    """NFC-normalised text with runs of whitespace collapsed"""
+    return " ".join(unicodedata.normalize("NFC", str(text)).split())
+
+
+class ClaimMemo:
+    """LRU of per-claim values bounded by entry count and total bytes"""
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Any, nbytes: int):
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _create_memo(name: str) -> Optional[ClaimMemo]:
+    if settings.claim_memo_max_entries <= 0:
+        return None
+    return ClaimMemo(name, settings.claim_memo_max_entries, settings.claim_memo_max_mb * 1024 * 1024)
+
+
+sentence_memo = _create_memo("sentences")
+embedding_memo = _create_memo("embeddings")
+
+
+def memoized_spans(text: str, split) -> List[Tuple[int, int]]:
+    """``split(text)`` through ``sentence_memo``"""
+    if sentence_memo is None:
+        return split(text)
+    spans = sentence_memo.get(text)
+    if spans is None:
+        spans = split(text)
+        sentence_memo.put(text, spans, sys.getsizeof(text) + 64 * (len(spans) + 1))
+    return spans
+
+
+def encode_claims(encoder, texts: List[str]) -> np.ndarray:
+    """
+    ``encoder.encode(texts)`` through ``embedding_memo``
+
+    Texts are encoded in normalised form; each distinct text missing from
+    the memo is encoded once, in one call.
+    """
+    normalized = [normalize_claim(text) for text in texts]
+    if embedding_memo is None or not texts:
+        return encoder.encode(normalized)
+    prefix = f"{getattr(encoder, 'backend', '')}|{encoder.model_name}|"
+    vectors = [embedding_memo.get(prefix + text) for text in normalized]
+    missing = list(dict.fromkeys(t for t, v in zip(normalized, vectors) if v is None))
+    if missing:
+        encoded = {}
+        for text, vector in zip(missing, encoder.encode(missing)):
+            vector = np.ascontiguousarray(vector, dtype=np.float32)
+            encoded[text] = vector
+            embedding_memo.put(prefix + text, vector, vector.nbytes + sys.getsizeof(text) + 100)
+        vectors = [v if v is not None else encoded[t] for t, v in zip(normalized, vectors)]
+    return np.stack(vectors)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        memo.name: memo.stats()
+        for memo in (sentence_memo, embedding_memo) if memo is not None
+    }
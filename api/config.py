@@ -0,0 +1,187 @@
+"""
+Runtime configuration for the SourceCheck API
+
+All settings can be overridden with environment variables prefixed with
+``SOURCECHECK_`` (e.g. ``SOURCECHECK_CHECKER_POOL_SIZE=8``).
+"""
+from typing import Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """API settings loaded from the environment"""
+    model_config = SettingsConfigDict(env_prefix="SOURCECHECK_")
+
+    # Checker pool (one warm Checker per schema/policies fingerprint)
+    checker_pool_size: int = 4
+    checker_pool_memory_mb: int = 3072
+    checker_estimated_mb: int = 0
+    # Checkers for the steps of validator cascades (aggregation.cascade);
+    # their memory comes out of checker_pool_memory_mb, which both pools
+    # share, so the main pool gets the rest
+    cascade_checker_pool_size: int = 8
+    cascade_checker_pool_memory_mb: int = 768
+
+    # Validation executor ("thread" or "process")
+    executor_kind: str = "thread"
+    executor_workers: int = 2
+    executor_max_queue: int = 16
+    executor_retry_after: int = 5
+
+    # Batch endpoint
+    batch_max_items: int = 1000
+
+    # Admission control for /validate, /validate/stream and /validate/batch
+    # (api/admission.py): bodies above admission_max_request_mb, sources
+    # above admission_max_source_chars and requests above
+    # admission_max_claims get 413; requests whose estimated cost reaches
+    # admission_large_cost share admission_large_concurrency slots (plus
+    # admission_large_queue waiting) and each client may have
+    # admission_client_concurrency validations in flight, else 429.
+    # 0 disables a limit; the client is the admission_client_header value
+    # when set and sent, else the peer address
+    admission_enabled: bool = True
+    admission_max_request_mb: int = 20
+    admission_max_source_chars: int = 500_000
+    admission_max_claims: int = 1000
+    admission_large_cost: float = 200.0
+    admission_small_concurrency: int = 0
+    admission_small_queue: int = 0
+    admission_large_concurrency: int = 1
+    admission_large_queue: int = 4
+    admission_client_concurrency: int = 0
+    admission_client_header: str = ""
+
+    # Streaming endpoint: claims (sentences of sentence_split fields, or
+    # whole fields) are validated in up to this many independent groups so
+    # results arrive as each group finishes
+    stream_max_partitions: int = 4
+
+    # Claims-parallel mode: /validate and /validate/stream split the claims
+    # into groups of at most claims_max_batch sentences that run on
+    # separate workers; small groups from concurrent requests with the same
+    # configuration are batched together for up to claims_max_wait_ms.
+    # Every group indexes the source again, so claims against sources
+    # longer than claims_split_max_source_chars (0 = no limit) stay in one
+    # group unless the source is narrowed; this also applies to the
+    # /validate/stream partitions
+    claims_parallel: bool = False
+    claims_max_batch: int = 8
+    claims_max_wait_ms: float = 5.0
+    claims_split_max_source_chars: int = 50_000
+
+    # Result cache: "none", "memory", "sqlite" or "redis"
+    result_cache_backend: str = "memory"
+    result_cache_ttl: int = 3600
+    result_cache_max_entries: int = 1024
+    result_cache_max_mb: int = 256
+    result_cache_path: str = "result_cache.sqlite3"
+    result_cache_redis_url: str = "redis://localhost:6379/0"
+
+    # Incremental re-validation: requests with a session_id keep their
+    # per-claim dispositions so the next request of the session only
+    # validates changed claims ("none", "memory", "sqlite" or "redis";
+    # redis uses result_cache_redis_url)
+    session_backend: str = "memory"
+    session_ttl: int = 3600
+    session_max_entries: int = 256
+    session_max_mb: int = 128
+    session_path: str = "sessions.sqlite3"
+
+    # Web-layer retrieval: per-source index cache (sentences, BM25, embeddings)
+    embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_batch_size: int = 64
+    # "torch" (sentence-transformers) or "onnx" (exported with
+    # python -m api.onnx_export into onnx_model_dir; int8 unless
+    # onnx_quantized is off; onnx_threads 0 = one per core)
+    embedding_backend: str = "torch"
+    onnx_model_dir: str = "models/onnx"
+    onnx_quantized: bool = True
+    onnx_threads: int = 0
+    # Encode calls from concurrent requests are merged into one forward pass
+    # of up to inference_max_batch texts, waiting at most
+    # inference_max_wait_ms for company (0 disables cross-request batching)
+    inference_max_batch: int = 64
+    inference_max_wait_ms: float = 2.0
+    # Sentence splits and embeddings of claims, memoized per process in
+    # two LRUs of at most claim_memo_max_entries / claim_memo_max_mb each
+    # (0 entries disables the memo)
+    claim_memo_max_entries: int = 50_000
+    claim_memo_max_mb: int = 64
+    source_embedding_dtype: str = "float16"
+    source_cache_max_entries: int = 32
+    source_cache_max_mb: int = 512
+    # Source indexes are built source_index_window_chars characters at a
+    # time; embeddings of one source beyond source_index_max_resident_mb
+    # are spilled to a memory-mapped temporary file in
+    # source_index_spill_dir (default: the system temp directory; 0 keeps
+    # them in memory). Streamed uploads (POST /api/v1/sources/stream) may
+    # be up to source_upload_max_mb
+    source_index_window_chars: int = 200_000
+    source_index_max_resident_mb: int = 64
+    source_index_spill_dir: str = ""
+    source_upload_max_mb: int = 256
+    # Approximate search (IVF, api/ann.py) over the embeddings of source
+    # indexes with at least ann_min_sentences sentences: ann_nlist clusters
+    # (0 = about 4 * sqrt(sentences)) trained in ann_train_iterations
+    # k-means rounds; a search scores the ann_nprobe nearest clusters plus
+    # the ann_lexical_candidates best BM25 matches. More probes raise
+    # recall and latency
+    ann_enabled: bool = False
+    ann_min_sentences: int = 20_000
+    ann_nlist: int = 0
+    ann_nprobe: int = 8
+    ann_train_iterations: int = 10
+    ann_lexical_candidates: int = 256
+    # Sources at least this long are narrowed to the passages relevant to
+    # the claims before validation (0 disables narrowing). The default is
+    # admission_max_source_chars, so longer sources (streamed uploads
+    # referenced by source_id) are narrowed rather than rejected
+    source_prefilter_min_chars: int = 500_000
+    source_prefilter_top_k: int = 5
+    source_prefilter_context: int = 1
+
+    # Registry of uploaded sources, schemas and policies
+    registry_path: str = "registry.sqlite3"
+    registry_cache_mb: int = 128
+
+    # Corpus store (api/corpus.py): metadata in corpus_path, document
+    # indexes under corpus_dir; a corpus validation may cover at most
+    # corpus_max_scope_documents documents
+    corpus_path: str = "corpus.sqlite3"
+    corpus_dir: str = "corpus"
+    corpus_max_scope_documents: int = 100
+
+    # Asynchronous jobs, run in up to jobs_max_parts claim groups (progress
+    # and cancellation granularity); a running job whose process has not
+    # renewed its lease for jobs_lease_seconds is queued again. Claim groups
+    # run on the shared validation executor, only while a worker is idle
+    jobs_enabled: bool = True
+    jobs_path: str = "jobs.sqlite3"
+    jobs_concurrency: int = 1
+    jobs_max_queued: int = 1000
+    jobs_max_parts: int = 16
+    jobs_lease_seconds: int = 30
+
+    # Multi-process serving (gunicorn -c python:api.gunicorn_conf); with
+    # preload the models are loaded once in the master and shared
+    # copy-on-write by the forked workers
+    server_bind: str = "0.0.0.0:8000"
+    server_workers: int = 1
+    server_timeout: int = 300
+    server_preload: bool = True
+
+    # Observability: Prometheus text metrics at /metrics and a
+    # Server-Timing header with the per-stage breakdown of each validation
+    metrics_enabled: bool = True
+    server_timing_header: bool = True
+
+    # Startup warm-up (defaults to api/static/defaults/*.yaml)
+    warmup_enabled: bool = True
+    warmup_profile_validators: bool = True
+    warmup_schema_path: Optional[str] = None
+    warmup_policies_path: Optional[str] = None
+
+
+settings = Settings()
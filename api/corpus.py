@@ -0,0 +1,473 @@
+"""
+Persistent corpus of indexed source documents
+
+Summaries that draw on several visit notes and prior records are validated
+against a scope of stored documents instead of one concatenated source
+text. Documents are ingested into a corpus once: their retrieval index
+(sentence spans, BM25 postings, embeddings and, for long documents, the
+IVF lists) is written under ``corpus_dir`` and their metadata to a SQLite
+database. A validation scoped to corpora and/or documents loads those
+indexes (embeddings memory-mapped, through the source cache), retrieves
+the passages relevant to the claims across the scope and hands the checker
+only those passages, so nothing is re-indexed per request.
+
+Document IDs are content hashes (``doc_<sha256>``), so the same text is
+stored and indexed once however many corpora it belongs to. Embeddings
+are only used while ``embedding_model`` is the one they were built with;
+otherwise retrieval falls back to BM25 until the document is re-ingested.
+"""
+import errno
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from api.ann import IVFIndex
+from api.claim_memo import encode_claims
+from api.config import settings
+from api.embeddings import get_encoder
+from api.metrics import stage
+from api.models import DEFAULT_MAX_EVIDENCE
+from api.source_cache import source_hash
+from api.source_index import SourceIndex, claim_texts, tokenize
+from api.validation import build_source_index, run_validation, source_cache
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_PREFIX = "doc_"
+CORPUS_PREFIX = "cor_"
+# Separates the passages of different documents in the checker's source
+DOCUMENT_SEPARATOR = "\n\n"
+
+
+def document_id_for(text: str) -> str:
+    return DOCUMENT_PREFIX + source_hash(text)
+
+
+def encoder_name(encoder) -> Optional[str]:
+    """Identity of the encoder stored embeddings were built with"""
+    if encoder is None:
+        return None
+    return f"{getattr(encoder, 'backend', '')}|{encoder.model_name}"
+
+
+def save_index(index: SourceIndex, directory: Path, meta: Dict[str, Any]) -> bool:
+    """
+    Write an index to ``directory``
+
+    The files are written to a temporary sibling directory that is then
+    renamed, so a directory that exists is complete. Returns False, writing
+    nothing, when another writer created ``directory`` first.
+    """
+    tmp = directory.with_name(f"{directory.name}.{uuid.uuid4().hex[:8]}.tmp")
+    tmp.mkdir(parents=True)
+    try:
+        (tmp / "text.txt").write_text(index.text, encoding="utf-8")
+        np.save(tmp / "spans.npy", np.asarray(index.spans))
+        np.save(tmp / "doc_lengths.npy", np.asarray(index.doc_lengths))
+        terms = list(index.postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(index.postings[t][0]) for t in terms], out=offsets[1:])
+        empty = (np.zeros(0, np.int32), np.zeros(0, np.float32))
+        np.save(tmp / "postings_docs.npy", np.concatenate([empty[0]] + [index.postings[t][0] for t in terms]))
+        np.save(tmp / "postings_freqs.npy", np.concatenate([empty[1]] + [index.postings[t][1] for t in terms]))
+        np.save(tmp / "postings_offsets.npy", offsets)
+        (tmp / "terms.json").write_text(json.dumps(terms), encoding="utf-8")
+        if index.embeddings is not None:
+            np.save(tmp / "embeddings.npy", index.embeddings)
+        if index.ann is not None:
+            np.save(tmp / "ann_centroids.npy", index.ann.centroids)
+            np.save(tmp / "ann_offsets.npy", index.ann.list_offsets)
+            np.save(tmp / "ann_ids.npy", index.ann.list_ids)
+        (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        try:
+            os.replace(tmp, directory)
+        except OSError as e:
+            # A concurrent ingest of the same document renamed its copy first
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST) or not directory.exists():
+                raise
+            shutil.rmtree(tmp, ignore_errors=True)
+            return False
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return True
+
+
+def load_index(directory: Path, encoder=None) -> SourceIndex:
+    """
+    Index written by ``save_index``, embeddings memory-mapped
+
+    Embeddings built with an encoder other than ``encoder`` are left out.
+    """
+    meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+    terms = json.loads((directory / "terms.json").read_text(encoding="utf-8"))
+    offsets = np.load(directory / "postings_offsets.npy")
+    docs = np.load(directory / "postings_docs.npy")
+    freqs = np.load(directory / "postings_freqs.npy")
+    postings = {
+        term: (docs[offsets[i]:offsets[i + 1]], freqs[offsets[i]:offsets[i + 1]])
+        for i, term in enumerate(terms)
+    }
+
+    embeddings = None
+    usable = encoder is not None and meta.get("encoder") == encoder_name(encoder)
+    if usable and (directory / "embeddings.npy").exists():
+        embeddings = np.load(directory / "embeddings.npy", mmap_mode="r")
+    elif meta.get("encoder"):
+        logger.warning(
+            "Embeddings of %s were built with %s; using BM25 only", directory.name, meta["encoder"]
+        )
+
+    index = SourceIndex(
+        (directory / "text.txt").read_text(encoding="utf-8"),
+        np.load(directory / "spans.npy"),
+        postings,
+        np.load(directory / "doc_lengths.npy"),
+        embeddings,
+    )
+    if embeddings is not None and (directory / "ann_centroids.npy").exists():
+        index.ann = IVFIndex(
+            np.load(directory / "ann_centroids.npy"),
+            np.load(directory / "ann_offsets.npy"),
+            np.load(directory / "ann_ids.npy"),
+            nprobe=settings.ann_nprobe,
+        )
+        index.ann_lexical_candidates = settings.ann_lexical_candidates
+    return index
+
+
+class CorpusStore:
+    """SQLite metadata of corpora and their documents, with indexes on disk"""
+
+    def __init__(self, path: str, directory: str):
+        self.path = path
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS corpora ("
+            " id TEXT PRIMARY KEY,"
+            " name TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " id TEXT PRIMARY KEY,"
+            " chars INTEGER NOT NULL,"
+            " sentences INTEGER NOT NULL,"
+            " encoder TEXT,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS corpus_documents ("
+            " corpus_id TEXT NOT NULL,"
+            " document_id TEXT NOT NULL,"
+            " title TEXT,"
+            " added_at REAL NOT NULL,"
+            " PRIMARY KEY (corpus_id, document_id))"
+        )
+
+    def document_dir(self, document_id: str) -> Path:
+        return self.directory / document_id
+
+    # Corpora
+
+    def create_corpus(self, name: str) -> Dict[str, Any]:
+        corpus_id = CORPUS_PREFIX + uuid.uuid4().hex
+        created_at = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO corpora (id, name, created_at) VALUES (?, ?, ?)",
+                (corpus_id, name, created_at),
+            )
+        return {"corpus_id": corpus_id, "name": name, "created_at": created_at,
+                "documents": 0, "chars": 0}
+
+    def list_corpora(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.id, c.name, c.created_at, COUNT(d.id), COALESCE(SUM(d.chars), 0)"
+                " FROM corpora c"
+                " LEFT JOIN corpus_documents cd ON cd.corpus_id = c.id"
+                " LEFT JOIN documents d ON d.id = cd.document_id"
+                " GROUP BY c.id ORDER BY c.created_at"
+            ).fetchall()
+        return [
+            {"corpus_id": cid, "name": name, "created_at": created_at,
+             "documents": count, "chars": chars}
+            for cid, name, created_at, count, chars in rows
+        ]
+
+    def corpus_info(self, corpus_id: str) -> Optional[Dict[str, Any]]:
+        return next((c for c in self.list_corpora() if c["corpus_id"] == corpus_id), None)
+
+    def delete_corpus(self, corpus_id: str) -> bool:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM corpora WHERE id = ?", (corpus_id,)).rowcount
+            self._conn.execute("DELETE FROM corpus_documents WHERE corpus_id = ?", (corpus_id,))
+            self._remove_orphans()
+        return bool(deleted)
+
+    # Documents
+
+    def add_document(self, corpus_id: str, document_id: str, title: Optional[str],
+                     meta: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO documents (id, chars, sentences, encoder, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (document_id, meta["chars"], meta["sentences"], meta.get("encoder"), now),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO corpus_documents (corpus_id, document_id, title, added_at)"
+                " VALUES (?, ?, ?, COALESCE((SELECT added_at FROM corpus_documents"
+                " WHERE corpus_id = ? AND document_id = ?), ?))",
+                (corpus_id, document_id, title, corpus_id, document_id, now),
+            )
+        return self.documents(corpus_id, document_id)[0]
+
+    def documents(self, corpus_id: str, document_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Documents of a corpus in the order they were added"""
+        query = (
+            "SELECT d.id, cd.title, d.chars, d.sentences, d.created_at"
+            " FROM corpus_documents cd JOIN documents d ON d.id = cd.document_id"
+            " WHERE cd.corpus_id = ?"
+        )
+        params: List[Any] = [corpus_id]
+        if document_id is not None:
+            query += " AND d.id = ?"
+            params.append(document_id)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY cd.added_at, d.id", params).fetchall()
+        return [
+            {"document_id": did, "corpus_id": corpus_id, "title": title, "chars": chars,
+             "sentences": sentences, "created_at": created_at}
+            for did, title, chars, sentences, created_at in rows
+        ]
+
+    def document_info(self, document_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, chars, sentences, created_at FROM documents WHERE id = ?",
+                (document_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        did, chars, sentences, created_at = row
+        return {"document_id": did, "corpus_id": None, "title": None, "chars": chars,
+                "sentences": sentences, "created_at": created_at}
+
+    def remove_document(self, corpus_id: str, document_id: str) -> bool:
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM corpus_documents WHERE corpus_id = ? AND document_id = ?",
+                (corpus_id, document_id),
+            ).rowcount
+            self._remove_orphans()
+        return bool(deleted)
+
+    def _remove_orphans(self):
+        # Caller holds self._lock; documents no corpus refers to any more
+        orphans = [row[0] for row in self._conn.execute(
+            "SELECT id FROM documents"
+            " WHERE id NOT IN (SELECT document_id FROM corpus_documents)"
+        ).fetchall()]
+        for document_id in orphans:
+            self._conn.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+            shutil.rmtree(self.document_dir(document_id), ignore_errors=True)
+
+    def resolve_scope(self, corpus_ids: List[str], document_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Documents of the given corpora followed by the given documents,
+        without repeats
+
+        Raises ``KeyError`` for unknown IDs.
+        """
+        scope: Dict[str, Dict[str, Any]] = {}
+        for corpus_id in corpus_ids:
+            if self.corpus_info(corpus_id) is None:
+                raise KeyError(f"Unknown corpus id: {corpus_id}")
+            for document in self.documents(corpus_id):
+                scope.setdefault(document["document_id"], document)
+        for document_id in document_ids:
+            document = self.document_info(document_id)
+            if document is None:
+                raise KeyError(f"Unknown document id: {document_id}")
+            scope.setdefault(document_id, document)
+        return list(scope.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            corpora = self._conn.execute("SELECT COUNT(*) FROM corpora").fetchone()[0]
+            documents, chars = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(chars), 0) FROM documents"
+            ).fetchone()
+        return {
+            "path": self.path,
+            "directory": str(self.directory),
+            "corpora": corpora,
+            "documents": documents,
+            "chars": chars,
+        }
+
+
+_store: Optional[CorpusStore] = None
+_store_lock = threading.Lock()
+
+
+def get_corpus_store() -> CorpusStore:
+    """Process-wide corpus store, opened on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CorpusStore(settings.corpus_path, settings.corpus_dir)
+    return _store
+
+
+def ingest_document(corpus_id: str, text: str, title: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Add a document to a corpus, indexing and storing it unless it is
+    already stored; returns its metadata and index stats
+
+    Raises ``KeyError`` for an unknown corpus.
+    """
+    store = get_corpus_store()
+    if store.corpus_info(corpus_id) is None:
+        raise KeyError(f"Unknown corpus id: {corpus_id}")
+    document_id = document_id_for(text)
+    directory = store.document_dir(document_id)
+    index = None
+    if directory.exists():
+        meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+    else:
+        index = build_source_index(text)
+        meta = {
+            "chars": len(text),
+            "sentences": len(index),
+            "encoder": encoder_name(get_encoder()) if index.embeddings is not None else None,
+        }
+        if save_index(index, directory, meta):
+            source_cache.put(source_hash(text), index)
+        else:
+            meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+            index = None
+    info = store.add_document(corpus_id, document_id, title, meta)
+    info["index"] = index.stats() if index is not None else None
+    return info
+
+
+def load_document_index(document_id: str) -> SourceIndex:
+    """Stored index of a document, through the source cache"""
+    digest = document_id[len(DOCUMENT_PREFIX):]
+    index = source_cache.get(digest)
+    if index is None:
+        index = load_index(get_corpus_store().document_dir(document_id), get_encoder())
+        source_cache.put(digest, index)
+    return index
+
+
+def scope_bm25(indexes: List[SourceIndex], query: str) -> List[np.ndarray]:
+    """
+    BM25 scores of every index's sentences for ``query``, as if the indexes
+    were one index, max-normalised over all of them
+    """
+    n_docs = sum(len(index) for index in indexes)
+    if not n_docs:
+        return [index.bm25_scores(query) for index in indexes]
+    avg_length = sum(float(index.doc_lengths.sum()) for index in indexes) / n_docs
+    doc_freqs = {
+        term: sum(len(index.postings[term][0]) for index in indexes if term in index.postings)
+        for term in set(tokenize(query))
+    }
+    scores = [index.bm25_scores(query, n_docs, doc_freqs, avg_length) for index in indexes]
+    peak = max((float(s.max()) for s in scores if len(s)), default=0.0)
+    if peak > 0:
+        for s in scores:
+            s /= peak
+    return scores
+
+
+def select_across(
+    indexes: List[SourceIndex], queries: List[str], top_k: int, context: int, encoder=None,
+) -> List[List[int]]:
+    """
+    Sentences of each index relevant to any query, plus ``context``
+    neighbours each side
+
+    Each query keeps its ``top_k`` best sentences over all the indexes.
+    BM25 is computed with the sentence count, document frequencies and
+    average length of the whole scope and max-normalised once over it, so
+    the hybrid scores compare across documents. Returns sentence ids per
+    index, in document order.
+    """
+    query_embeddings = None
+    if encoder is not None and queries and any(i.embeddings is not None for i in indexes):
+        query_embeddings = encode_claims(encoder, queries)
+
+    selected = [set() for _ in indexes]
+    for q, query in enumerate(queries):
+        query_embedding = query_embeddings[q] if query_embeddings is not None else None
+        bm25 = scope_bm25(indexes, query)
+        found = [
+            (score, d, i)
+            for d, index in enumerate(indexes)
+            for i, score in index.search(
+                query, top_k, query_embedding if index.embeddings is not None else None,
+                bm25=bm25[d],
+            )
+        ]
+        found.sort(key=lambda hit: -hit[0])
+        for _, d, i in found[:top_k]:
+            selected[d].update(range(max(0, i - context), min(len(indexes[d]), i + context + 1)))
+    return [sorted(ids) for ids in selected]
+
+
+def scope_excerpt(document_ids: List[str], claims: Dict[str, Any]) -> str:
+    """Passages of the scope's documents relevant to the claims, document by document"""
+    with stage("source_index"):
+        indexes = [load_document_index(document_id) for document_id in document_ids]
+    with stage("retrieval"):
+        selected = select_across(
+            indexes,
+            claim_texts(claims),
+            top_k=settings.source_prefilter_top_k,
+            context=settings.source_prefilter_context,
+            encoder=get_encoder(),
+        )
+        return DOCUMENT_SEPARATOR.join(
+            index.excerpt(ids) for index, ids in zip(indexes, selected) if ids
+        )
+
+
+def excerpt_chars(documents: List[Dict[str, Any]], queries: int) -> int:
+    """Upper estimate of the length of a scope's excerpt for ``queries`` claim sentences"""
+    chars = sum(d["chars"] for d in documents)
+    sentences = sum(d["sentences"] for d in documents)
+    if not sentences:
+        return chars
+    per_query = settings.source_prefilter_top_k * (2 * settings.source_prefilter_context + 1)
+    return min(chars, int(queries * per_query * chars / sentences))
+
+
+def run_corpus_validation(
+    schema: Dict[str, Any],
+    policies: Dict[str, Any],
+    document_ids: List[str],
+    claims: Dict[str, Any],
+    max_evidence: Optional[int] = DEFAULT_MAX_EVIDENCE,
+) -> Dict[str, Any]:
+    """Validate claims against the passages of stored documents relevant to them"""
+    return run_validation(schema, policies, scope_excerpt(document_ids, claims), claims, max_evidence)
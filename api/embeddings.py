@@ -0,0 +1,112 @@
+"""
+Sentence embedding encoder for web-layer retrieval
+
+Uses sentence-transformers (installed with sourcecheck) when available.
+Retrieval falls back to BM25 alone when it is not, or when embeddings are
+disabled with ``SOURCECHECK_EMBEDDING_MODEL=none``.
+
+``SOURCECHECK_EMBEDDING_BACKEND=onnx`` runs an exported, int8-quantized copy
+of the model through ONNX Runtime instead (see ``api.onnx_encoder``).
+
+Small encode calls from concurrent requests (claim queries, short sources)
+are merged into shared forward passes by an ``InferenceScheduler`` unless
+``SOURCECHECK_INFERENCE_MAX_WAIT_MS`` is 0.
+"""
+import logging
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from api.config import settings
+from api.inference import InferenceScheduler
+
+logger = logging.getLogger(__name__)
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+    SentenceTransformer = None
+
+_encoder = None
+_encoder_loaded = False
+_encoder_lock = threading.Lock()
+
+
+class Encoder:
+    """Wraps a SentenceTransformer; returns L2-normalised float32 vectors"""
+
+    backend = "torch"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model = SentenceTransformer(model_name, device="cpu")
+        self.scheduler = InferenceScheduler(
+            self._encode,
+            max_batch=settings.inference_max_batch,
+            max_wait_ms=settings.inference_max_wait_ms,
+            name="embeddings",
+        )
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self.scheduler.run(texts)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        vectors = self._model.encode(
+            texts,
+            batch_size=settings.embedding_batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return vectors.astype(np.float32, copy=False)
+
+
+def load_encoder(model_name: str, backend: str = "torch"):
+    """
+    New encoder for ``model_name`` on ``backend`` (None if unavailable)
+
+    An ``onnx`` backend whose runtime or exported model is missing falls
+    back to PyTorch with an error in the log.
+    """
+    if backend == "onnx":
+        from api.onnx_encoder import MODEL_FILE, ONNX_AVAILABLE, OnnxEncoder, model_dir
+
+        path = model_dir(model_name, quantized=settings.onnx_quantized)
+        if not ONNX_AVAILABLE:
+            logger.error("ONNX backend needs onnxruntime and transformers; using PyTorch")
+        elif not (path / MODEL_FILE).exists():
+            logger.error(
+                "No exported model in %s (run python -m api.onnx_export); using PyTorch", path
+            )
+        else:
+            logger.info("Loading embedding model %s (ONNX, %s)", model_name, path)
+            return OnnxEncoder(model_name, path)
+    elif backend != "torch":
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+        return None
+    logger.info("Loading embedding model %s", model_name)
+    return Encoder(model_name)
+
+
+def get_encoder() -> Optional[Encoder]:
+    """Shared encoder for this process, loaded on first use (None if unavailable)"""
+    global _encoder, _encoder_loaded
+    if settings.embedding_model == "none":
+        return None
+    if not _encoder_loaded:
+        with _encoder_lock:
+            if not _encoder_loaded:
+                _encoder = load_encoder(settings.embedding_model, settings.embedding_backend)
+                _encoder_loaded = True
+    return _encoder
+
+
+def loaded_encoder() -> Optional[Encoder]:
+    """The encoder if it has been loaded in this process, without loading it"""
+    return _encoder
@@ -0,0 +1,250 @@
+"""
+Bounded worker executor for blocking validation work
+
+``Checker.verify_summary`` is CPU bound and synchronous. Running it inside
+an ``async def`` endpoint blocks the event loop, so every other request
+(including ``/health``) stalls behind it. The executor runs that work in a
+thread or process pool and rejects new work immediately once the number of
+running plus queued jobs reaches its capacity.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from api.metrics import collect_stages
+
+
+class QueueFullError(Exception):
+    """Raised when the executor has no free worker or queue slot"""
+
+
+class _TimingStats:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": (self.total / self.count * 1000) if self.count else 0.0,
+            "max_ms": self.max * 1000,
+        }
+
+
+def _timed_call(
+    fn: Callable, args: tuple, kwargs: dict
+) -> Tuple[Any, float, float, Dict[str, float]]:
+    """
+    Run ``fn`` and report when it started, how long it took and the
+    ``api.metrics.stage()`` timings it recorded
+
+    Wall-clock start time is used so queue wait can be measured across
+    process boundaries.
+    """
+    started_at = time.time()
+    start = time.perf_counter()
+    with collect_stages() as stages:
+        result = fn(*args, **kwargs)
+    return result, started_at, time.perf_counter() - start, stages
+
+
+class ValidationExecutor:
+    """
+    Thread or process pool with a bounded queue
+
+    Capacity is ``max_workers + max_queue`` jobs. ``run`` raises
+    ``QueueFullError`` instead of queueing beyond that, so callers can
+    answer with 503 and ``Retry-After`` right away.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 2,
+        max_queue: int = 16,
+        initializer: Optional[Callable] = None,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._initializer = initializer
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+        self.queue_wait = _TimingStats()
+        self.execution = _TimingStats()
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=self._initializer,
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="validation",
+                    initializer=self._initializer,
+                )
+        return self._pool
+
+    def _acquire(self, count: int = 1):
+        with self._lock:
+            if self._in_flight + count > self.capacity:
+                self.rejected += count
+                raise QueueFullError(
+                    f"Validation queue is full ({self._in_flight} jobs in flight)"
+                )
+            self._in_flight += count
+            self.submitted += count
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _start(self, fn: Callable, args: tuple, kwargs: dict) -> "asyncio.Future":
+        # The slot is held until the work itself finishes, even if the
+        # awaiting request is cancelled (e.g. a client disconnect)
+        submitted_at = time.time()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._get_pool(), _timed_call, fn, args, kwargs
+            )
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return asyncio.ensure_future(self._finish(future, submitted_at))
+
+    async def _finish(self, future, submitted_at: float) -> Tuple[Any, Dict[str, float]]:
+        try:
+            outcome = await future
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        return self._timed(outcome, submitted_at)
+
+    def _timed(self, outcome: tuple, submitted_at: float) -> Tuple[Any, Dict[str, float]]:
+        result, started_at, exec_seconds, stages = outcome
+        wait_seconds = max(0.0, started_at - submitted_at)
+        with self._lock:
+            self.queue_wait.observe(wait_seconds)
+            self.execution.observe(exec_seconds)
+        return result, {
+            "queue_ms": wait_seconds * 1000,
+            "execution_ms": exec_seconds * 1000,
+            "stages": stages,
+        }
+
+    def submit(self, fn: Callable, *args, **kwargs) -> "asyncio.Future":
+        """
+        Start ``fn(*args, **kwargs)`` in the pool without awaiting it
+
+        Raises ``QueueFullError`` synchronously if there is no free slot.
+        The returned future resolves like ``run``.
+        """
+        self._acquire()
+        return self._start(fn, args, kwargs)
+
+    def submit_many(self, fn: Callable, arg_tuples: List[tuple]) -> List["asyncio.Future"]:
+        """
+        Start ``fn(*args)`` for every tuple, all or nothing
+
+        Slots for every call are reserved up front, so either all calls are
+        accepted or ``QueueFullError`` is raised and none are started.
+        """
+        self._acquire(len(arg_tuples))
+        futures = []
+        for i, args in enumerate(arg_tuples):
+            try:
+                futures.append(self._start(fn, args, {}))
+            except Exception:
+                # Give back the slots of calls that were never started
+                for _ in arg_tuples[i + 1:]:
+                    self._release()
+                raise
+        return futures
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, float]]:
+        """
+        Run ``fn(*args, **kwargs)`` in the pool
+
+        Returns the result and a timing dict with ``queue_ms`` (time spent
+        waiting for a worker), ``execution_ms`` (time spent running) and
+        ``stages`` (milliseconds per ``api.metrics.stage()`` recorded by
+        ``fn``).
+        """
+        return await self.submit(fn, *args, **kwargs)
+
+    def call(self, fn: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, float]]:
+        """
+        ``run`` for threads outside the event loop (job workers): blocks
+        until ``fn`` has run in the pool
+
+        Takes a slot like ``run`` and raises ``QueueFullError`` the same way.
+        """
+        self._acquire()
+        submitted_at = time.time()
+        try:
+            future = self._get_pool().submit(_timed_call, fn, args, kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        try:
+            outcome = future.result()
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        return self._timed(outcome, submitted_at)
+
+    @property
+    def idle_workers(self) -> int:
+        """Workers neither running nor about to run a call"""
+        return max(0, self.max_workers - self._in_flight)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.max_workers),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "queue_wait": self.queue_wait.as_dict(),
+                "execution": self.execution.as_dict(),
+            }
@@ -0,0 +1,66 @@
+"""
+Gunicorn configuration for multi-process serving
+
+    gunicorn -c python:api.gunicorn_conf api.main:app
+
+With ``SOURCECHECK_SERVER_PRELOAD`` (the default) the app is imported and
+the default models are warmed up once in the gunicorn master before any
+worker is forked. Workers then share the model weights copy-on-write
+instead of each loading its own copy, so resident memory grows by the
+per-worker working set rather than by the full model footprint. Each
+worker's own startup warm-up finds the memoized timings and becomes ready
+immediately.
+"""
+import gc
+import logging
+import os
+import sys
+
+from api.config import settings
+
+logger = logging.getLogger("api.gunicorn")
+
+bind = settings.server_bind
+workers = max(1, settings.server_workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = settings.server_preload
+timeout = settings.server_timeout
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    """Load the default models in the master so workers inherit them"""
+    if not (settings.server_preload and settings.warmup_enabled):
+        return
+    from api.routes import health
+    from api.validation import SOURCECHECK_AVAILABLE
+    from api.warmup import warm_up_defaults
+
+    if not SOURCECHECK_AVAILABLE:
+        return
+    try:
+        timings = warm_up_defaults()
+    except Exception:
+        # Workers retry the warm-up themselves and report it on /health/ready
+        logger.exception("Warm-up in the master failed")
+        return
+    health.set_models_loaded(True, timings)
+    # Move everything loaded so far out of the collector's reach, so garbage
+    # collections in the workers do not write to (and un-share) those pages
+    gc.freeze()
+    server.log.info("Models loaded in master; forking %d worker(s)", workers)
+
+
+def post_fork(server, worker):
+    """Split the CPU between workers so they do not oversubscribe it"""
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    if not settings.onnx_threads:
+        # Read when the ONNX encoder loads, which happens after the fork
+        settings.onnx_threads = threads
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return
+    torch.set_num_threads(threads)
+    server.log.info("Worker %s using %d torch thread(s)", worker.pid, threads)
@@ -0,0 +1,155 @@
+"""
+Cross-request batching of model inference
+
+Model calls made by the web layer come from executor threads serving
+different requests, each with a handful of inputs. ``InferenceScheduler``
+merges the inputs of concurrent calls into one forward pass: a background
+thread collects them until ``max_batch`` inputs are waiting or the oldest
+has waited ``max_wait_ms``, runs the model once and hands every caller its
+own slice of the output. Calls that already fill a batch run directly in
+the caller's thread.
+
+Batch sizes and waits are exported on ``/metrics`` (the
+``sourcecheck_batch_size`` and ``sourcecheck_batch_wait_seconds``
+histograms, labelled with the scheduler name) for tuning the
+latency/throughput trade-off.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from api.batching import BATCH_SIZE, BATCH_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceScheduler:
+    """
+    Size- and deadline-bounded batching for a synchronous batch function
+
+    ``run_batch(inputs)`` must return a sequence (list or array) with one
+    output per input, in order. ``run(inputs)`` blocks until the batch
+    holding ``inputs`` has run and returns the outputs for those inputs.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], Sequence[Any]],
+        max_batch: int = 64,
+        max_wait_ms: float = 2.0,
+        name: str = "inference",
+    ):
+        self.run_batch = run_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self._pending: List[Tuple[List[Any], float, Future]] = []
+        self._pending_size = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.batches = 0
+        self.inputs = 0
+        self.calls = 0
+        self.direct = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def run(self, inputs: List[Any]) -> Sequence[Any]:
+        """Outputs for ``inputs``, computed in a shared batch when possible"""
+        if not inputs or self.max_wait == 0 or len(inputs) >= self.max_batch:
+            with self._cond:
+                self.direct += 1
+            return self.run_batch(inputs)
+        return self.submit(inputs).result()
+
+    def submit(self, inputs: List[Any]) -> Future:
+        future: Future = Future()
+        with self._cond:
+            self._ensure_thread()
+            self._pending.append((inputs, time.perf_counter(), future))
+            self._pending_size += len(inputs)
+            self._cond.notify()
+        return future
+
+    def _ensure_thread(self):
+        # Caller holds self._cond. A forked server worker does not inherit the
+        # parent's thread, so it is started per process.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(
+            target=self._loop, name=f"{self.name}-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def _take_batch(self) -> List[Tuple[List[Any], float, Future]]:
+        # Caller holds self._cond
+        batch, size = [], 0
+        while self._pending:
+            inputs = self._pending[0][0]
+            if batch and size + len(inputs) > self.max_batch:
+                break
+            batch.append(self._pending.pop(0))
+            size += len(inputs)
+        self._pending_size -= size
+        return batch
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._pending[0][1] + self.max_wait
+                while self._pending_size < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+            self._run(batch)
+
+    def _run(self, batch: List[Tuple[List[Any], float, Future]]):
+        started = time.perf_counter()
+        inputs = [x for item_inputs, _, _ in batch for x in item_inputs]
+        BATCH_SIZE.observe(len(inputs), batcher=self.name)
+        for _, queued_at, _ in batch:
+            wait = started - queued_at
+            BATCH_WAIT.observe(wait, batcher=self.name)
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+        self.batches += 1
+        self.inputs += len(inputs)
+        self.calls += len(batch)
+
+        try:
+            outputs = self.run_batch(inputs)
+        except Exception as e:
+            logger.exception("Batched %s call failed", self.name)
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        start = 0
+        for item_inputs, _, future in batch:
+            end = start + len(item_inputs)
+            future.set_result(outputs[start:end])
+            start = end
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            calls = len(self._pending)
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "inputs": self.inputs,
+            "batched_calls": self.calls,
+            "avg_batch": self.inputs / self.batches if self.batches else 0.0,
+            "avg_wait_ms": self.wait_total / self.calls * 1000 if self.calls else 0.0,
+            "max_wait_observed_ms": self.wait_max * 1000,
+            "direct_calls": self.direct,
+            "waiting_calls": calls,
+        }
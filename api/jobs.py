@@ -0,0 +1,450 @@
+"""
+Asynchronous validation jobs
+
+Long validations can be submitted as jobs and polled instead of holding an
+HTTP connection open. Jobs are persisted in SQLite (request, progress and
+result), and the database is the queue: worker threads in every API process
+claim the highest-priority queued job atomically, so several server
+processes can share one job store. A running job holds a lease that its
+process renews every few seconds; jobs whose lease has expired (their
+process died, or was restarted under the same hostname and pid) are
+queued again by any process sharing the store.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from api.config import settings
+from api.executor import QueueFullError, ValidationExecutor
+from api.metrics import observe_stages, record_result
+from api.models import DEFAULT_MAX_EVIDENCE
+from api.serialization import dumps
+from api.validation import (
+    claim_groups,
+    claim_units,
+    executor as validation_executor,
+    merge_responses,
+    run_validation,
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job was cancelled mid-run"""
+
+
+class LeaseLost(Exception):
+    """Raised inside a worker when its job was requeued by another process"""
+
+
+class JobStore:
+    """SQLite persistence and queue for jobs"""
+
+    COLUMNS = (
+        "id", "status", "priority", "created_at", "started_at", "finished_at",
+        "parts_total", "parts_done", "claims_total", "claims_done", "error",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " priority INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL,"
+            " parts_total INTEGER NOT NULL DEFAULT 0,"
+            " parts_done INTEGER NOT NULL DEFAULT 0,"
+            " claims_total INTEGER,"
+            " claims_done INTEGER NOT NULL DEFAULT 0,"
+            " cancel_requested INTEGER NOT NULL DEFAULT 0,"
+            " owner TEXT,"
+            " lease_expires REAL,"
+            " request TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "lease_expires" not in columns:
+            # Stores created before leases; their running jobs count as expired
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_expires REAL")
+        if "claims_total" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN claims_total INTEGER")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at)"
+        )
+
+    def insert(
+        self,
+        job_id: str,
+        priority: int,
+        request: Dict[str, Any],
+        parts_total: int,
+        claims_total: Optional[int] = None,
+    ):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, priority, created_at, parts_total, claims_total,"
+                " request) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id, QUEUED, priority, time.time(), parts_total, claims_total,
+                    json.dumps(request),
+                ),
+            )
+
+    def claim_next(self, owner: str, lease_seconds: float) -> Optional[str]:
+        """Atomically mark the next queued job as running and return its id"""
+        with self._lock:
+            while True:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = ?"
+                    " ORDER BY priority DESC, created_at LIMIT 1",
+                    (QUEUED,),
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = ?, owner = ?, started_at = ?, lease_expires = ?"
+                    " WHERE id = ? AND status = ?",
+                    (RUNNING, owner, now, now + lease_seconds, row[0], QUEUED),
+                ).rowcount
+                if claimed:
+                    return row[0]
+                # Another process claimed it first; try the next one
+
+    def update(self, job_id: str, owner: Optional[str] = None, **values) -> bool:
+        """
+        Set columns of a job; with ``owner``, only while that process
+        still holds it. Returns whether the job was updated.
+        """
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        where, params = "id = ?", [job_id]
+        if owner is not None:
+            where += " AND owner = ?"
+            params.append(owner)
+        with self._lock:
+            return bool(self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE {where}",
+                (*values.values(), *params),
+            ).rowcount)
+
+    def renew(self, owner: str, lease_seconds: float) -> int:
+        """Extend the leases of the jobs ``owner`` is running"""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE owner = ? AND status = ?",
+                (time.time() + lease_seconds, owner, RUNNING),
+            ).rowcount
+
+    def cancel(self, job_id: str):
+        """Cancel a queued job now, or flag a running one to stop"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, now, job_id, QUEUED),
+            )
+            self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                (job_id, RUNNING),
+            )
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return dict(zip(self.COLUMNS, row)) if row else None
+
+    def get_request(self, job_id: str) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT request FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return json.loads(row[0])
+
+    def get_result(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def recover(self, owner: Optional[str] = None) -> int:
+        """
+        Requeue running jobs whose lease has expired, or (with ``owner``)
+        that process's running jobs
+        """
+        if owner is None:
+            where, params = "(lease_expires IS NULL OR lease_expires < ?)", (time.time(),)
+        else:
+            where, params = "owner = ?", (owner,)
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, started_at = NULL,"
+                " lease_expires = NULL, parts_done = 0, claims_done = 0"
+                f" WHERE status = ? AND {where}",
+                (QUEUED, RUNNING, *params),
+            ).rowcount
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)
+            ).fetchone()[0]
+
+
+class JobQueue:
+    """
+    Worker threads that run jobs from a ``JobStore``
+
+    Each job runs in up to ``max_parts`` claim groups (``claim_groups``:
+    sentence_split fields are divided at sentence boundaries) so progress
+    can be reported in claims, and cancellation honoured, between groups. Workers are
+    woken immediately for jobs submitted to this process and poll every
+    ``poll_interval`` seconds for jobs submitted to other processes.
+
+    The claim groups run on ``executor``, the validation executor that
+    requests use, so jobs and requests share its bounded workers. A group
+    only starts when a worker is idle: jobs never take a queue slot a
+    request could have used, and a busy executor makes them wait.
+
+    The queue's owner ID is a fresh UUID per ``start``. A heartbeat thread
+    renews the leases of its running jobs every ``lease_seconds / 3`` and
+    requeues any job in the store whose lease has expired.
+    """
+
+    # Seconds between checks for an idle executor worker
+    idle_poll = 0.05
+
+    def __init__(
+        self,
+        store: JobStore,
+        concurrency: int = 1,
+        max_queued: int = 1000,
+        max_parts: int = 4,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 30.0,
+        executor: Optional[ValidationExecutor] = None,
+    ):
+        self.store = store
+        self.executor = executor if executor is not None else validation_executor
+        self.concurrency = max(1, concurrency)
+        self.max_queued = max_queued
+        self.max_parts = max_parts
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def start(self):
+        """Requeue jobs with expired leases and start the worker threads"""
+        # A new owner per start, so a forked server worker or a restarted
+        # process never mistakes an earlier owner's jobs for its own
+        self.owner = uuid.uuid4().hex
+        self._recover()
+        with self._cond:
+            self._stopping = False
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self):
+        """Stop taking jobs and requeue the ones this process is running"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._threads = []
+        requeued = self.store.recover(self.owner)
+        if requeued:
+            logger.info("Requeued %d running job(s) on shutdown", requeued)
+
+    def _recover(self):
+        recovered = self.store.recover()
+        if recovered:
+            logger.info("Requeued %d interrupted job(s)", recovered)
+            with self._cond:
+                self._cond.notify_all()
+
+    def _heartbeat(self):
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                self._cond.wait(max(0.1, self.lease_seconds / 3))
+                if self._stopping:
+                    return
+            try:
+                self.store.renew(self.owner, self.lease_seconds)
+                self._recover()
+            except Exception:
+                logger.exception("Job lease renewal failed")
+
+    def submit(self, request: Dict[str, Any], priority: int = 0) -> Dict[str, Any]:
+        """Persist and enqueue a resolved validation request"""
+        queued = self.store.count(QUEUED)
+        if queued >= self.max_queued:
+            raise OverflowError(f"Job queue is full ({queued} queued)")
+        job_id = uuid.uuid4().hex
+        parts_total = len(claim_groups(request["schema"], request["claims"], self.max_parts))
+        units = claim_units(request["schema"], request["claims"])
+        self.store.insert(
+            job_id, priority, request, parts_total, len(units) if units is not None else None
+        )
+        with self._cond:
+            self._cond.notify()
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a job
+
+        A queued job is cancelled immediately; a running job stops at the
+        next claim-group boundary. Finished jobs are left unchanged.
+        """
+        self.store.cancel(job_id)
+        return self.store.get(job_id)
+
+    def _next_job(self) -> Optional[str]:
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return None
+            job_id = self.store.claim_next(self.owner, self.lease_seconds)
+            if job_id is not None:
+                return job_id
+            with self._cond:
+                if self._stopping:
+                    return None
+                self._cond.wait(self.poll_interval)
+
+    def _worker(self):
+        while True:
+            job_id = self._next_job()
+            if job_id is None:
+                return
+            try:
+                self._run(job_id)
+            except LeaseLost:
+                logger.warning("Job %s was requeued by another process; dropping it here", job_id)
+            except JobCancelled:
+                self.store.update(
+                    job_id, owner=self.owner, status=CANCELLED, finished_at=time.time()
+                )
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                self.store.update(
+                    job_id, owner=self.owner, status=FAILED, finished_at=time.time(),
+                    error=f"{type(e).__name__}: {e}",
+                )
+
+    def _run(self, job_id: str):
+        request = self.store.get_request(job_id)
+        parts = claim_groups(request["schema"], request["claims"], self.max_parts)
+        results = []
+        claims_done = 0
+        for schema, claims in parts:
+            outcome = self._execute(
+                job_id, run_validation,
+                schema, request["policies"], request["source_text"], claims,
+                request.get("max_evidence", DEFAULT_MAX_EVIDENCE),
+            )
+            if outcome is None:
+                return  # requeued by stop()
+            result, timing = outcome
+            observe_stages(timing["stages"])
+            results.append(result)
+            # Counted like claims_total (claim sentences) where the split is known
+            units = claim_units(schema, claims)
+            claims_done += len(units) if units is not None else result["total_claims"]
+            if not self.store.update(
+                job_id, owner=self.owner, parts_done=len(results), claims_done=claims_done
+            ):
+                raise LeaseLost()
+
+        merged = merge_responses(results)
+        record_result(merged, "jobs")
+        if not self.store.update(
+            job_id, owner=self.owner, status=SUCCEEDED, finished_at=time.time(),
+            result=dumps(merged).decode("utf-8"),
+        ):
+            raise LeaseLost()
+
+    def _execute(self, job_id: str, fn, *args):
+        """
+        ``executor.call(fn, *args)`` once the executor has an idle worker
+
+        None when the queue is stopping; raises ``JobCancelled`` when the
+        job is cancelled while it waits.
+        """
+        while True:
+            if self._stopping:
+                return None
+            if self.store.cancel_requested(job_id):
+                raise JobCancelled()
+            if self.executor.idle_workers:
+                try:
+                    return self.executor.call(fn, *args)
+                except QueueFullError:
+                    pass
+            with self._cond:
+                self._cond.wait(self.idle_poll)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "queued": self.store.count(QUEUED),
+            "running": self.store.count(RUNNING),
+            "path": self.store.path,
+        }
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide job queue, created on first use"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            JobStore(settings.jobs_path),
+            concurrency=settings.jobs_concurrency,
+            max_queued=settings.jobs_max_queued,
+            max_parts=settings.jobs_max_parts,
+            lease_seconds=settings.jobs_lease_seconds,
+        )
+    return _job_queue
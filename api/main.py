@@ -3,13 +3,23 @@ SourceCheck API - FastAPI Application
 
 A REST API for validating text claims against source documents.
 """
+import asyncio
 import logging
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
+from starlette.datastructures import Headers
 
-from api.routes import health, validate
+from api.config import settings
+from api.jobs import get_job_queue
+from api.metrics import ADMISSION_REJECTED, REQUEST_DURATION, REQUESTS
+from api.routes import corpus, health, jobs, metrics, registry, validate
+from api.validation import SOURCECHECK_AVAILABLE, executor
+from api.warmup import warm_up_defaults
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +30,44 @@ logging.basicConfig(
 # Enable debug logging for sourcecheck modules
 logging.getLogger('sourcecheck').setLevel(logging.INFO)
 
+logger = logging.getLogger(__name__)
+
+
+async def _warm_up():
+    """Load and warm the default models on a worker, then flip readiness"""
+    if not SOURCECHECK_AVAILABLE:
+        health.set_warmup_error("sourcecheck library not available")
+        return
+    try:
+        load_times, timing = await executor.run(warm_up_defaults)
+    except Exception as e:
+        logger.exception("Model warm-up failed")
+        health.set_warmup_error(f"Warm-up failed: {e}")
+        return
+    load_times["queue"] = timing["queue_ms"]
+    health.set_models_loaded(True, load_times)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown"""
+    # Warm up in the background so /health/live answers while models load
+    warmup_task = asyncio.create_task(_warm_up()) if settings.warmup_enabled else None
+    if warmup_task is None:
+        health.set_models_loaded(SOURCECHECK_AVAILABLE)
+    if settings.jobs_enabled:
+        get_job_queue().start()
+
+    yield
+
+    if settings.jobs_enabled:
+        get_job_queue().stop()
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    # Stop validation workers
+    executor.shutdown(wait=False)
+
+
 # Create FastAPI app
 app = FastAPI(
     title="SourceCheck API",
@@ -27,6 +75,7 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -38,12 +87,86 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class RequestSizeLimit:
+    """
+    413 for request bodies larger than ``admission_max_request_mb``
+
+    Declared lengths are rejected before the body is read; bodies sent
+    without a ``Content-Length`` (chunked) are counted as they arrive and
+    cut off once over the limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.admission_enabled:
+            return await self.app(scope, receive, send)
+        limit_mb = settings.admission_max_request_mb
+        if scope["path"] == "/api/v1/sources/stream":
+            # Streamed source uploads have their own limit
+            limit_mb = settings.source_upload_max_mb
+        limit = limit_mb * 1024 * 1024
+        if not limit:
+            return await self.app(scope, receive, send)
+        length = Headers(scope=scope).get("content-length")
+        if length and length.isdigit() and int(length) > limit:
+            ADMISSION_REJECTED.inc(reason="too_large")
+            response = JSONResponse(
+                status_code=413,
+                content={"detail": f"Request body is {int(length)} bytes (max {limit_mb} MB)"},
+            )
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    ADMISSION_REJECTED.inc(reason="too_large")
+                    # Raised while the body is read, so answered by the exception handlers
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Request body is larger than {limit_mb} MB",
+                    )
+            return message
+
+        await self.app(scope, receive_limited, send)
+
+
+app.add_middleware(RequestSizeLimit)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and time them per route; routes read ``state.started_at``"""
+    start = time.perf_counter()
+    request.state.started_at = start
+    response = await call_next(request)
+    if settings.metrics_enabled:
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        REQUESTS.inc(route=route, method=request.method, status=str(response.status_code))
+        REQUEST_DURATION.observe(
+            time.perf_counter() - start, route=route, method=request.method
+        )
+    return response
+
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="api/static"), name="static")
 
 # Include routers
 app.include_router(health.router, tags=["Health"])
 app.include_router(validate.router, prefix="/api/v1", tags=["Validation"])
+app.include_router(registry.router, prefix="/api/v1", tags=["Registry"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["Jobs"])
+app.include_router(corpus.router, prefix="/api/v1", tags=["Corpus"])
+if settings.metrics_enabled:
+    app.include_router(metrics.router, tags=["Metrics"])
 
 
 @app.get("/")
@@ -0,0 +1,332 @@
+"""
+Request metrics and per-stage timings
+
+Validation time is broken down into named stages (payload parsing,
+reference resolution, checker setup, source narrowing, verification,
+response building, serialization, ...). Work running on the validation
+executor records its stages with ``stage()``; ``collect_stages()`` gathers
+them per call and the executor hands them back with the result, so stages
+are reported the same way for thread and process workers.
+
+Stage timings feed Prometheus histograms exposed at ``/metrics`` (text
+exposition format, no client library needed) and the per-request
+``Server-Timing`` header. Metrics are kept per process.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from cache hits up to long documents
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+_local = threading.local()
+
+
+@contextmanager
+def collect_stages() -> Iterator[Dict[str, float]]:
+    """Collect the ``stage()`` timings recorded by this thread, in milliseconds"""
+    previous = getattr(_local, "stages", None)
+    stages: Dict[str, float] = {}
+    _local.stages = stages
+    try:
+        yield stages
+    finally:
+        _local.stages = previous
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as stage ``name`` (a no-op outside ``collect_stages()``)"""
+    stages = getattr(_local, "stages", None)
+    if stages is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[key] = series
+            counts, total = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            series = sorted((key, list(c), t[0]) for key, (c, t) in self._series.items())
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CollectedMetric(_Metric):
+    """
+    Gauge or counter whose samples are read from a callback at scrape time
+
+    Used to expose counters and sizes that components already keep in
+    their ``stats()`` (executor, caches, job queue).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str = "gauge",
+        labels: Sequence[str] = (),
+        collect: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self.kind = kind
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        try:
+            samples = self.collect() if self.collect is not None else {}
+        except Exception:
+            samples = {}
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(samples.items())
+            if value is not None
+        ]
+
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "sourcecheck_http_requests_total",
+    "HTTP requests by route, method and status code",
+    ("route", "method", "status"),
+))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "sourcecheck_http_request_duration_seconds",
+    "HTTP request latency until the response headers are sent",
+    ("route", "method"),
+))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "sourcecheck_stage_duration_seconds",
+    "Time spent in each validation stage",
+    ("stage",),
+))
+VALIDATIONS = REGISTRY.register(Counter(
+    "sourcecheck_validations_total",
+    "Completed validations by endpoint",
+    ("endpoint",),
+))
+CLAIMS = REGISTRY.register(Counter(
+    "sourcecheck_claims_total",
+    "Validated claims by deciding validator and verdict",
+    ("validator", "verdict"),
+))
+CASCADE_CLAIMS = REGISTRY.register(Counter(
+    "sourcecheck_cascade_claims_total",
+    "Claims validated under a validator cascade, decided early or fully validated",
+    ("outcome",),
+))
+CASCADE_SKIPPED = REGISTRY.register(Counter(
+    "sourcecheck_cascade_skipped_total",
+    "Validator runs skipped by the cascade",
+    ("validator",),
+))
+CASCADE_CPU = REGISTRY.register(Counter(
+    "sourcecheck_cascade_cpu_seconds_total",
+    "CPU spent on cascaded validations, and the estimate for validating them fully",
+    ("kind",),
+))
+
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "sourcecheck_admission_rejected_total",
+    "Validations rejected by admission control: too large (413), client quota or lane full (429)",
+    ("reason",),
+))
+
+SESSION_CLAIMS = REGISTRY.register(Counter(
+    "sourcecheck_session_claims_total",
+    "Claims of session requests, reused from the previous request or validated",
+    ("outcome",),
+))
+
+
+class RequestTimer:
+    """
+    Stage timings of one request
+
+    Stages measured in the route are timed with ``stage()``; stages
+    reported by the executor are merged with ``update()``. ``observe()``
+    feeds the stage histograms and ``server_timing()`` renders the header.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, ms: float):
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def update(self, stages: Dict[str, float]):
+        for name, ms in stages.items():
+            self.add(name, ms)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def observe(self):
+        observe_stages(self.stages)
+
+    def server_timing(self, total_ms: Optional[float] = None) -> str:
+        entries = [f"{name};dur={ms:.1f}" for name, ms in self.stages.items()]
+        if total_ms is not None:
+            entries.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(entries)
+
+
+def observe_stages(stages: Dict[str, float]):
+    """Feed stage timings (milliseconds) into the stage histograms"""
+    for name, ms in stages.items():
+        STAGE_DURATION.observe(ms / 1000, stage=name)
+
+
+def record_result(result, endpoint: str):
+    """Count a completed validation (a response dict) and its claims by validator and verdict"""
+    VALIDATIONS.inc(endpoint=endpoint)
+    for d in result["dispositions"]:
+        CLAIMS.inc(validator=d["validator"] or "none", verdict=d["verdict"])
+        for name in d["skipped_validators"]:
+            CASCADE_SKIPPED.inc(validator=name)
+    cascade = result.get("cascade")
+    if cascade is not None:
+        CASCADE_CLAIMS.inc(cascade["claims_decided_early"], outcome="decided_early")
+        CASCADE_CLAIMS.inc(cascade["claims_fully_validated"], outcome="fully_validated")
+        if cascade["estimated_cpu_saved_ms"] is not None:
+            CASCADE_CPU.inc(cascade["cpu_ms"] / 1000, kind="spent")
+            CASCADE_CPU.inc(
+                (cascade["cpu_ms"] + cascade["estimated_cpu_saved_ms"]) / 1000,
+                kind="estimated_full",
+            )
@@ -1,17 +1,46 @@
 """
 Pydantic models for request/response validation
 """
-from typing import Dict, List, Optional, Any
-from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional, Any
+from pydantic import BaseModel, Field, model_validator
+
+# Evidence spans kept per claim unless the request asks otherwise
+DEFAULT_MAX_EVIDENCE = 3
+
+
+def evidence_limit(mode: str, max_evidence: Optional[int]) -> Optional[int]:
+    """Evidence spans to keep per claim: 0 for none, None for all"""
+    if mode == "none":
+        return 0
+    if mode == "all":
+        return None
+    return DEFAULT_MAX_EVIDENCE if max_evidence is None else max_evidence
+
+
+def _require_one(model: BaseModel, inline: str, reference: str):
+    """Exactly one of an inline value and its registered ID must be given"""
+    has_inline = getattr(model, inline) is not None
+    has_reference = getattr(model, reference) is not None
+    if has_inline == has_reference:
+        raise ValueError(f"Provide exactly one of '{inline}' or '{reference}'")
 
 
 class ValidationRequest(BaseModel):
-    """Request model for validation endpoint"""
-    source_text: str = Field(
-        ...,
+    """
+    Request model for validation endpoint
+
+    The source, schema and policies can each be sent inline or referenced
+    by an ID returned from the registry endpoints.
+    """
+    source_text: Optional[str] = Field(
+        None,
         description="The source document text to validate against",
         example="Patient reports chest pain for 2 days..."
     )
+    source_id: Optional[str] = Field(
+        None,
+        description="ID of a source uploaded with POST /api/v1/sources (instead of source_text)"
+    )
     claims: Dict[str, Any] = Field(
         ...,
         description="Dictionary of claims to validate (field_name: claim_text)",
@@ -20,16 +49,51 @@ class ValidationRequest(BaseModel):
             "medications": "Aspirin 81mg daily"
         }
     )
-    schema: Dict[str, Any] = Field(
-        ...,
-        description="Schema configuration as dict (required)",
+    schema: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Schema configuration as dict (or use schema_id)",
         example={"version": "1.0", "fields": {}}
     )
-    policies: Dict[str, Any] = Field(
-        ...,
-        description="Policies configuration as dict (required)",
+    schema_id: Optional[str] = Field(
+        None,
+        description="ID of a schema registered with POST /api/v1/schemas"
+    )
+    policies: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Policies configuration as dict (or use policies_id)",
         example={"version": "1.0", "validators": {}}
     )
+    policies_id: Optional[str] = Field(
+        None,
+        description="ID of policies registered with POST /api/v1/policies"
+    )
+    evidence_mode: Literal["none", "top_k", "all"] = Field(
+        "top_k",
+        description="Evidence spans per claim: none, the top max_evidence, or all"
+    )
+    max_evidence: Optional[int] = Field(
+        None,
+        ge=0,
+        description=f"Spans per claim with evidence_mode top_k (default {DEFAULT_MAX_EVIDENCE})"
+    )
+    session_id: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=128,
+        description="Editing session; claims unchanged since the session's previous "
+                    "request are not validated again"
+    )
+
+    @model_validator(mode="after")
+    def _check_references(self):
+        _require_one(self, "source_text", "source_id")
+        _require_one(self, "schema", "schema_id")
+        _require_one(self, "policies", "policies_id")
+        return self
+
+    @property
+    def evidence_limit(self) -> Optional[int]:
+        return evidence_limit(self.evidence_mode, self.max_evidence)
 
 
 class QualityIssue(BaseModel):
@@ -57,7 +121,27 @@ class ClaimDisposition(BaseModel):
     score: Optional[float] = Field(None, description="Semantic/validator confidence score (0.0-1.0)")
     quality_score: Optional[float] = Field(None, description="Quality analysis score (0.0-1.0)")
     quality_issues: List[QualityIssue] = Field(default_factory=list)
-    evidence: List[EvidenceSpan] = Field(default_factory=list, description="Top evidence spans (up to 3)")
+    evidence: List[EvidenceSpan] = Field(
+        default_factory=list,
+        description="Top evidence spans (3 unless the request sets evidence_mode/max_evidence)"
+    )
+    skipped_validators: List[str] = Field(
+        default_factory=list,
+        description="Validators not run for this claim because the cascade had already decided it"
+    )
+
+
+class CascadeReport(BaseModel):
+    """What the early-exit validator cascade skipped for a request"""
+    claims_decided_early: int = Field(..., description="Claims decided before every validator ran")
+    claims_fully_validated: int = Field(..., description="Claims that went through every validator")
+    validator_runs_skipped: int = Field(..., description="Validator runs skipped across all claims")
+    cpu_ms: float = Field(..., description="CPU time spent validating the request")
+    estimated_cpu_saved_ms: Optional[float] = Field(
+        None,
+        description="Estimated CPU time of the skipped validator runs (null until "
+                    "each skipped validator has run for this configuration)"
+    )
 
 
 class ValidationResponse(BaseModel):
@@ -94,6 +178,228 @@ class ValidationResponse(BaseModel):
         ...,
         description="Detailed results for each claim"
     )
+    cascade: Optional[CascadeReport] = Field(
+        None,
+        description="Validator cascade summary (only when the policies configure a cascade)"
+    )
+
+
+class BatchValidationItem(BaseModel):
+    """One (source, claims) pair in a batch request"""
+    id: Optional[str] = Field(
+        None,
+        description="Client identifier echoed back in the result"
+    )
+    source_text: Optional[str] = Field(
+        None,
+        description="The source document text to validate against"
+    )
+    source_id: Optional[str] = Field(
+        None,
+        description="ID of an uploaded source (instead of source_text)"
+    )
+    claims: Dict[str, Any] = Field(
+        ...,
+        description="Dictionary of claims to validate (field_name: claim_text)"
+    )
+
+    @model_validator(mode="after")
+    def _check_references(self):
+        _require_one(self, "source_text", "source_id")
+        return self
+
+
+class BatchValidationRequest(BaseModel):
+    """Request model for batch validation: one configuration, many documents"""
+    schema: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Schema configuration shared by every item (or use schema_id)"
+    )
+    schema_id: Optional[str] = None
+    policies: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Policies configuration shared by every item (or use policies_id)"
+    )
+    policies_id: Optional[str] = None
+    items: List[BatchValidationItem] = Field(
+        ...,
+        min_length=1,
+        description="Documents to validate"
+    )
+    evidence_mode: Literal["none", "top_k", "all"] = Field(
+        "top_k",
+        description="Evidence spans per claim: none, the top max_evidence, or all"
+    )
+    max_evidence: Optional[int] = Field(
+        None,
+        ge=0,
+        description=f"Spans per claim with evidence_mode top_k (default {DEFAULT_MAX_EVIDENCE})"
+    )
+
+    @model_validator(mode="after")
+    def _check_references(self):
+        _require_one(self, "schema", "schema_id")
+        _require_one(self, "policies", "policies_id")
+        return self
+
+    @property
+    def evidence_limit(self) -> Optional[int]:
+        return evidence_limit(self.evidence_mode, self.max_evidence)
+
+
+class BatchItemResult(BaseModel):
+    """Result for one batch item: either a response or an error"""
+    index: int = Field(..., description="Position of the item in the request")
+    id: Optional[str] = None
+    result: Optional[ValidationResponse] = None
+    error: Optional[str] = None
+
+
+class BatchValidationResponse(BaseModel):
+    """Response model for batch validation"""
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
+
+class SourceUploadRequest(BaseModel):
+    """Source document to store for later requests"""
+    text: str = Field(..., description="Full source document text")
+
+
+class SourceInfo(BaseModel):
+    """Stored source document"""
+    source_id: str
+    chars: int
+    created_at: float
+    index: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Retrieval index built on upload (sentences, terms, bytes)"
+    )
+
+
+class ConfigRegistered(BaseModel):
+    """Registered schema or policies"""
+    id: str
+
+
+class CorpusCreateRequest(BaseModel):
+    """New corpus of source documents"""
+    name: str = Field(..., min_length=1, max_length=200, description="Display name")
+
+
+class CorpusInfo(BaseModel):
+    """Stored corpus"""
+    corpus_id: str
+    name: str
+    created_at: float
+    documents: int
+    chars: int
+
+
+class DocumentIngestRequest(BaseModel):
+    """Document to add to a corpus"""
+    text: str = Field(..., min_length=1, description="Full document text")
+    title: Optional[str] = Field(
+        None,
+        max_length=500,
+        description="Display title (e.g. 'Visit note 2024-03-01')"
+    )
+
+
+class DocumentInfo(BaseModel):
+    """Document stored in the corpus store"""
+    document_id: str
+    corpus_id: Optional[str] = None
+    title: Optional[str] = None
+    chars: int
+    sentences: int
+    created_at: float
+    index: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Retrieval index built on ingest (absent if the text was already stored)"
+    )
+
+
+class CorpusValidationRequest(BaseModel):
+    """
+    Request model for validation against stored documents
+
+    The evidence scope is every document of ``corpus_ids`` plus
+    ``document_ids``; at least one of them must be given.
+    """
+    corpus_ids: List[str] = Field(
+        default_factory=list,
+        description="Corpora whose documents are in scope"
+    )
+    document_ids: List[str] = Field(
+        default_factory=list,
+        description="Further documents in scope"
+    )
+    claims: Dict[str, Any] = Field(
+        ...,
+        description="Dictionary of claims to validate (field_name: claim_text)"
+    )
+    schema: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Schema configuration as dict (or use schema_id)"
+    )
+    schema_id: Optional[str] = None
+    policies: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Policies configuration as dict (or use policies_id)"
+    )
+    policies_id: Optional[str] = None
+    evidence_mode: Literal["none", "top_k", "all"] = Field(
+        "top_k",
+        description="Evidence spans per claim: none, the top max_evidence, or all"
+    )
+    max_evidence: Optional[int] = Field(
+        None,
+        ge=0,
+        description=f"Spans per claim with evidence_mode top_k (default {DEFAULT_MAX_EVIDENCE})"
+    )
+
+    @model_validator(mode="after")
+    def _check_references(self):
+        if not self.corpus_ids and not self.document_ids:
+            raise ValueError("Provide 'corpus_ids' and/or 'document_ids'")
+        _require_one(self, "schema", "schema_id")
+        _require_one(self, "policies", "policies_id")
+        return self
+
+    @property
+    def evidence_limit(self) -> Optional[int]:
+        return evidence_limit(self.evidence_mode, self.max_evidence)
+
+
+class JobProgress(BaseModel):
+    """Progress of a running job"""
+    parts_done: int = Field(..., description="Claim groups finished")
+    parts_total: int = Field(..., description="Claim groups in the job")
+    claims_done: int = Field(..., description="Claims validated so far")
+    claims_total: Optional[int] = Field(
+        None,
+        description="Claims in the job (sentences of sentence_split fields); "
+                    "null when the fields cannot be split into claims up front"
+    )
+
+
+class JobStatus(BaseModel):
+    """State of an asynchronous validation job"""
+    job_id: str
+    status: str = Field(..., description="queued, running, succeeded, failed or cancelled")
+    priority: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: JobProgress
+    error: Optional[str] = None
+    result: Optional[ValidationResponse] = Field(
+        None,
+        description="Final result once the job has succeeded"
+    )
 
 
 class HealthResponse(BaseModel):
@@ -101,3 +407,21 @@ class HealthResponse(BaseModel):
     status: str = Field(..., example="healthy")
     version: str = Field(..., example="0.1.0")
     models_loaded: bool = Field(..., example=True)
+
+
+class LivenessResponse(BaseModel):
+    """Liveness probe response"""
+    status: str = Field(..., example="alive")
+    version: str = Field(..., example="0.1.0")
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response"""
+    status: str = Field(..., example="ready")
+    models_loaded: bool = Field(..., example=True)
+    load_times_ms: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Load/warm-up time per model or step in milliseconds",
+        example={"nli_validator": 5200.0, "checker": 310.0, "warmup_validation": 850.0}
+    )
+    error: Optional[str] = Field(None, description="Warm-up failure, if any")
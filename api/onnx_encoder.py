@@ -0,0 +1,117 @@
+"""
+ONNX Runtime backend for the web-layer sentence encoder
+
+With ``SOURCECHECK_EMBEDDING_BACKEND=onnx`` the encoder runs an exported
+(by default int8-quantized) copy of the embedding model through ONNX
+Runtime instead of PyTorch. Models are exported once per host with
+
+    python -m api.onnx_export
+
+into ``SOURCECHECK_ONNX_MODEL_DIR``. ``benchmarks/onnx_parity.py`` measures
+how closely the exported model agrees with the PyTorch one and how much
+faster it is.
+
+Needs ``onnxruntime`` and ``transformers`` (for the tokenizer); exporting
+also needs PyTorch, which sentence-transformers already installs.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from api.config import settings
+from api.inference import InferenceScheduler
+
+logger = logging.getLogger(__name__)
+
+try:
+    import onnxruntime
+    from transformers import AutoTokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+    onnxruntime = None
+    AutoTokenizer = None
+
+MODEL_FILE = "model.onnx"
+METADATA_FILE = "export.json"
+
+
+def model_dir(model_name: str, quantized: bool = True) -> Path:
+    """Where the exported copy of ``model_name`` lives"""
+    variant = "int8" if quantized else "fp32"
+    return Path(settings.onnx_model_dir) / model_name.replace("/", "__") / variant
+
+
+def load_metadata(path: Path) -> Dict[str, Any]:
+    with open(path / METADATA_FILE) as f:
+        return json.load(f)
+
+
+class OnnxEncoder:
+    """
+    Same interface as ``api.embeddings.Encoder``, backed by ONNX Runtime
+
+    Tokenization, pooling and normalisation follow the sentence-transformers
+    configuration recorded at export time.
+    """
+
+    backend = "onnx"
+
+    def __init__(self, model_name: str, path: Path):
+        self.model_name = model_name
+        self.path = Path(path)
+        self.metadata = load_metadata(self.path)
+        self._tokenizer = AutoTokenizer.from_pretrained(str(self.path))
+        options = onnxruntime.SessionOptions()
+        if settings.onnx_threads:
+            options.intra_op_num_threads = settings.onnx_threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = onnxruntime.InferenceSession(
+            str(self.path / MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        self.scheduler = InferenceScheduler(
+            self._encode,
+            max_batch=settings.inference_max_batch,
+            max_wait_ms=settings.inference_max_wait_ms,
+            name="embeddings",
+        )
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self.scheduler.run(texts)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        batch_size = max(1, settings.embedding_batch_size)
+        chunks = [
+            self._encode_batch(texts[i:i + batch_size])
+            for i in range(0, len(texts), batch_size)
+        ]
+        return np.concatenate(chunks).astype(np.float32, copy=False)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self._tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.metadata["max_seq_length"],
+            return_tensors="np",
+        )
+        inputs = {
+            name: tokens[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self._input_names and name in tokens
+        }
+        hidden = self._session.run(None, inputs)[0]
+        if self.metadata.get("pooling") == "cls":
+            vectors = hidden[:, 0]
+        else:
+            mask = tokens["attention_mask"][..., None].astype(hidden.dtype)
+            vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.metadata.get("normalize", True):
+            vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
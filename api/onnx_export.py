@@ -0,0 +1,107 @@
+"""
+Export the embedding model for the ONNX Runtime backend
+
+    python -m api.onnx_export                    # SOURCECHECK_EMBEDDING_MODEL, int8
+    python -m api.onnx_export --model sentence-transformers/all-MiniLM-L6-v2 --fp32
+    python -m api.onnx_export --force            # re-export over an existing copy
+
+Loads the sentence-transformers model, exports its transformer to ONNX,
+quantizes the weights to int8 (dynamic quantization) and writes the model,
+tokenizer and pooling settings to ``SOURCECHECK_ONNX_MODEL_DIR``, where
+``SOURCECHECK_EMBEDDING_BACKEND=onnx`` picks them up. Run
+``python -m benchmarks.onnx_parity`` afterwards to check agreement with
+the PyTorch model. Needs torch, sentence-transformers and onnxruntime.
+"""
+import argparse
+import json
+import logging
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from api.config import settings
+from api.onnx_encoder import METADATA_FILE, MODEL_FILE, model_dir
+
+logger = logging.getLogger(__name__)
+
+OPSET = 14
+
+
+def export_model(model_name: str, quantized: bool = True, force: bool = False) -> Path:
+    """Export ``model_name`` into its ``model_dir``; returns that directory"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    target = model_dir(model_name, quantized)
+    if (target / MODEL_FILE).exists() and not force:
+        logger.info("%s already exported to %s", model_name, target)
+        return target
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    pooling = next((m for m in model if type(m).__name__ == "Pooling"), None)
+    pooling_mode = "cls" if pooling is not None and pooling.pooling_mode_cls_token else "mean"
+
+    sample = tokenizer(["An example sentence."], return_tensors="pt")
+    input_names = [
+        name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample
+    ]
+    dynamic_axes = {name: {0: "batch", 1: "tokens"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "tokens"}
+
+    target.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        fp32_path = Path(tmp) / MODEL_FILE
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                tuple(sample[name] for name in input_names),
+                str(fp32_path),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=OPSET,
+            )
+        if quantized:
+            quantize_dynamic(str(fp32_path), str(target / MODEL_FILE), weight_type=QuantType.QInt8)
+        else:
+            shutil.copy(fp32_path, target / MODEL_FILE)
+
+    tokenizer.save_pretrained(str(target))
+    metadata = {
+        "model": model_name,
+        "quantized": quantized,
+        "opset": OPSET,
+        "pooling": pooling_mode,
+        "normalize": True,
+        "max_seq_length": model.max_seq_length,
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    (target / METADATA_FILE).write_text(json.dumps(metadata, indent=2))
+    logger.info("Exported %s to %s", model_name, target)
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=settings.embedding_model)
+    parser.add_argument("--fp32", action="store_true", help="Skip int8 quantization")
+    parser.add_argument("--force", action="store_true", help="Overwrite an existing export")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    if args.model == "none":
+        parser.error("no embedding model configured (SOURCECHECK_EMBEDDING_MODEL=none)")
+    try:
+        path = export_model(args.model, quantized=not args.fp32, force=args.force)
+    except ImportError as e:
+        sys.exit(f"Export needs torch, sentence-transformers and onnxruntime: {e}")
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
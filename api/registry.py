@@ -0,0 +1,170 @@
+"""
+Registry of uploaded source documents and configurations
+
+Sources, schemas and policies can be uploaded once and referenced by ID in
+later requests instead of being resent every time. IDs are content hashes,
+so uploading the same content twice returns the same ID. Content lives in
+SQLite (shared by every worker process on the host) with a small in-memory
+LRU of parsed content in front of it for the hot path. The LRU is per
+process, so a cache hit still checks that the row exists: a document deleted
+by one worker is not served from another worker's cache.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from api.config import settings
+
+KIND_PREFIXES = {
+    "source": "src_",
+    "schema": "sch_",
+    "policies": "pol_",
+}
+
+
+def canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class Registry:
+    """SQLite-backed content store with an in-memory LRU of parsed content"""
+
+    def __init__(self, path: str, cache_bytes: int):
+        self.path = path
+        self.cache_bytes = cache_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " content TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._cache_sizes: Dict[str, int] = {}
+        self._cached_bytes = 0
+
+    @staticmethod
+    def make_id(kind: str, content: str) -> str:
+        return KIND_PREFIXES[kind] + hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def digest(document_id: str) -> str:
+        """sha256 hex digest of the content behind an ID"""
+        return document_id.split("_", 1)[1]
+
+    def put_source(self, text: str) -> str:
+        return self._put("source", text, text)
+
+    def put_config(self, kind: str, config: Dict[str, Any]) -> str:
+        return self._put(kind, canonical_json(config), config)
+
+    def _put(self, kind: str, content: str, value: Any) -> str:
+        document_id = self.make_id(kind, content)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO documents (id, kind, content, size, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (document_id, kind, content, len(content), time.time()),
+            )
+            self._cache_put(document_id, value, len(content))
+        return document_id
+
+    def get_source(self, source_id: str) -> Optional[str]:
+        return self._get("source", source_id, lambda content: content)
+
+    def get_config(self, kind: str, config_id: str) -> Optional[Dict[str, Any]]:
+        return self._get(kind, config_id, json.loads)
+
+    def _get(self, kind: str, document_id: str, parse) -> Optional[Any]:
+        if not document_id.startswith(KIND_PREFIXES[kind]):
+            return None
+        with self._lock:
+            if document_id in self._cache:
+                exists = self._conn.execute(
+                    "SELECT 1 FROM documents WHERE id = ?", (document_id,)
+                ).fetchone()
+                if exists is None:
+                    # Deleted, possibly by another process
+                    self._cache_drop(document_id)
+                    return None
+                self._cache.move_to_end(document_id)
+                return self._cache[document_id]
+            row = self._conn.execute(
+                "SELECT content FROM documents WHERE id = ?", (document_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            value = parse(row[0])
+            self._cache_put(document_id, value, len(row[0]))
+            return value
+
+    def info(self, document_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, size, created_at FROM documents WHERE id = ?", (document_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        kind, size, created_at = row
+        return {"id": document_id, "kind": kind, "size": size, "created_at": created_at}
+
+    def delete(self, document_id: str) -> bool:
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM documents WHERE id = ?", (document_id,)
+            ).rowcount
+            self._cache_drop(document_id)
+        return bool(deleted)
+
+    def _cache_drop(self, document_id: str):
+        # Caller holds self._lock
+        if document_id in self._cache:
+            self._cache.pop(document_id)
+            self._cached_bytes -= self._cache_sizes.pop(document_id)
+
+    def _cache_put(self, document_id: str, value: Any, size: int):
+        # Caller holds self._lock
+        if size > self.cache_bytes or document_id in self._cache:
+            return
+        self._cache[document_id] = value
+        self._cache_sizes[document_id] = size
+        self._cached_bytes += size
+        while self._cached_bytes > self.cache_bytes:
+            evicted, _ = self._cache.popitem(last=False)
+            self._cached_bytes -= self._cache_sizes.pop(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, COUNT(*), SUM(size) FROM documents GROUP BY kind"
+            ).fetchall()
+            return {
+                "path": self.path,
+                "documents": {kind: {"count": n, "bytes": size} for kind, n, size in rows},
+                "cached_bytes": self._cached_bytes,
+            }
+
+
+_registry: Optional[Registry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> Registry:
+    """Process-wide registry, opened on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = Registry(
+                    settings.registry_path,
+                    settings.registry_cache_mb * 1024 * 1024,
+                )
+    return _registry
@@ -0,0 +1,296 @@
+"""
+Content-addressed result cache
+
+Validation is deterministic for a given source text, claims, schema,
+policies and library version, so identical requests (UI re-clicks, client
+retries) can be answered from a cache. Results are stored as serialized
+``ValidationResponse`` JSON under a hash of the request content.
+
+Backends:
+- ``memory``: in-process LRU (per worker process)
+- ``sqlite``: on-disk store shared by processes on one host
+- ``redis``: any Redis-protocol server (Redis, Valkey, KeyDB), e.g. one
+  running locally next to the API; requires the ``redis`` package
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from api import __version__
+from api.models import DEFAULT_MAX_EVIDENCE
+
+logger = logging.getLogger(__name__)
+
+try:
+    from importlib.metadata import version as _package_version
+    SOURCECHECK_VERSION = _package_version("sourcecheck")
+except Exception:
+    SOURCECHECK_VERSION = "unknown"
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+
+def request_fingerprint(
+    source_text: str,
+    claims: Dict[str, Any],
+    schema: Dict[str, Any],
+    policies: Dict[str, Any],
+    source_digest: Optional[str] = None,
+    max_evidence: Optional[int] = DEFAULT_MAX_EVIDENCE,
+) -> str:
+    """
+    Hash of everything that determines a validation result
+
+    The API and sourcecheck versions are included so upgrading either one
+    invalidates cached results and ETags. ``source_digest`` (the sha256 hex
+    digest of ``source_text``, known for registered sources) skips
+    re-hashing the text. A non-default evidence depth is part of the key.
+    """
+    if source_digest is None:
+        source_digest = hashlib.sha256(source_text.encode("utf-8")).hexdigest()
+    digest = hashlib.sha256()
+    digest.update(f"{__version__}|{SOURCECHECK_VERSION}|".encode("utf-8"))
+    digest.update(bytes.fromhex(source_digest))
+    content = {"claims": claims, "schema": schema, "policies": policies}
+    if max_evidence != DEFAULT_MAX_EVIDENCE:
+        content["max_evidence"] = max_evidence
+    digest.update(
+        json.dumps(
+            content,
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        ).encode("utf-8")
+    )
+    return digest.hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU bounded by entry count and total bytes"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at and expires_at < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.time() + ttl if ttl else 0.0)
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+class SQLiteBackend:
+    """
+    On-disk store; least recently used rows are deleted above ``max_entries``
+
+    The connection is opened on first use in each process. A gunicorn master
+    with ``preload_app`` builds the cache when it imports the app, and SQLite
+    connections must not be carried into forked workers.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Caller holds self._lock
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+        self._conn, self._pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at and expires_at < now:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE results SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return bytes(value)
+
+    def set(self, key: str, value: bytes, ttl: int):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl if ttl else 0.0, now),
+            )
+            conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                " SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM results"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "path": self.path}
+
+
+class RedisBackend:
+    """
+    Redis-protocol backend
+
+    Expiry uses native TTLs; size limits are left to the server
+    (``maxmemory`` with an ``allkeys-lru`` policy).
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "sourcecheck:result:"):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis backend requires the 'redis' package")
+        self.url = url
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: int):
+        self._client.set(self.prefix + key, value, ex=ttl or None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"url": self.url}
+
+
+class ResultCache:
+    """Hit/miss accounting around a backend; backend errors are treated as misses"""
+
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = self.backend.get(key)
+        except Exception:
+            logger.exception("Result cache lookup failed")
+            self.errors += 1
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes):
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception:
+            logger.exception("Result cache store failed")
+            self.errors += 1
+
+    def counters(self) -> Dict[str, Any]:
+        """Hit/miss counters of this process, without querying the backend"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus the backend's own figures, which may scan its store"""
+        try:
+            backend_stats = self.backend.stats()
+        except Exception:
+            backend_stats = {}
+        return {
+            "backend": self.backend.name,
+            "ttl": self.ttl,
+            **self.counters(),
+            **backend_stats,
+        }
+
+
+def create_result_cache(settings) -> Optional[ResultCache]:
+    """Build the configured result cache, or None when disabled"""
+    kind = settings.result_cache_backend
+    if kind == "none":
+        return None
+    if kind == "memory":
+        backend = MemoryBackend(
+            settings.result_cache_max_entries,
+            settings.result_cache_max_mb * 1024 * 1024,
+        )
+    elif kind == "sqlite":
+        backend = SQLiteBackend(settings.result_cache_path, settings.result_cache_max_entries)
+    elif kind == "redis":
+        backend = RedisBackend(settings.result_cache_redis_url)
+    else:
+        raise ValueError(f"Unknown result cache backend: {kind}")
+    return ResultCache(backend, settings.result_cache_ttl)
@@ -0,0 +1,88 @@
+"""
+Corpus endpoints
+
+Create corpora, ingest documents into them once, and reference them with
+``corpus_ids``/``document_ids`` in ``POST /api/v1/validate/corpus``.
+"""
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Response
+from starlette.concurrency import run_in_threadpool
+from api.config import settings
+from api.corpus import get_corpus_store, ingest_document
+from api.executor import QueueFullError
+from api.models import CorpusCreateRequest, CorpusInfo, DocumentIngestRequest, DocumentInfo
+from api.validation import executor
+
+router = APIRouter()
+
+
+@router.post("/corpora", response_model=CorpusInfo, status_code=201)
+async def create_corpus(request: CorpusCreateRequest):
+    """Create an empty corpus; returns its ``corpus_id``"""
+    return await run_in_threadpool(get_corpus_store().create_corpus, request.name)
+
+
+@router.get("/corpora", response_model=List[CorpusInfo])
+async def list_corpora():
+    """All corpora with their document count and size"""
+    return await run_in_threadpool(get_corpus_store().list_corpora)
+
+
+@router.get("/corpora/{corpus_id}", response_model=CorpusInfo)
+async def get_corpus(corpus_id: str):
+    info = await run_in_threadpool(get_corpus_store().corpus_info, corpus_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail=f"Unknown corpus id: {corpus_id}")
+    return info
+
+
+@router.delete("/corpora/{corpus_id}", status_code=204)
+async def delete_corpus(corpus_id: str):
+    """Remove a corpus; documents no other corpus holds are deleted with it"""
+    if not await run_in_threadpool(get_corpus_store().delete_corpus, corpus_id):
+        raise HTTPException(status_code=404, detail=f"Unknown corpus id: {corpus_id}")
+    return Response(status_code=204)
+
+
+@router.post("/corpora/{corpus_id}/documents", response_model=DocumentInfo, status_code=201)
+async def add_document(corpus_id: str, request: DocumentIngestRequest):
+    """
+    Ingest a document into a corpus
+
+    The document is sentence-split, BM25-indexed and embedded on a
+    validation worker and its index is written to the corpus store. The
+    ``document_id`` is a hash of the text: ingesting the same text again
+    (into any corpus) reuses the stored index.
+    """
+    try:
+        info, _ = await executor.run(ingest_document, corpus_id, request.text, request.title)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy: {e}",
+            headers={"Retry-After": str(settings.executor_retry_after)}
+        )
+    return info
+
+
+@router.get("/corpora/{corpus_id}/documents", response_model=List[DocumentInfo])
+async def list_documents(corpus_id: str):
+    """Documents of a corpus in the order they were added"""
+    store = get_corpus_store()
+    if await run_in_threadpool(store.corpus_info, corpus_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown corpus id: {corpus_id}")
+    return await run_in_threadpool(store.documents, corpus_id)
+
+
+@router.delete("/corpora/{corpus_id}/documents/{document_id}", status_code=204)
+async def remove_document(corpus_id: str, document_id: str):
+    """Take a document out of a corpus (and out of the store if no corpus holds it)"""
+    if not await run_in_threadpool(get_corpus_store().remove_document, corpus_id, document_id):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Document {document_id} is not in corpus {corpus_id}"
+        )
+    return Response(status_code=204)
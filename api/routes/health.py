@@ -1,30 +1,91 @@
 """
-Health check endpoint
+Health check endpoints
+
+``/health/live`` answers as soon as the process serves requests.
+``/health/ready`` answers 200 only after the startup warm-up has loaded
+the models, and reports how long each one took.
 """
+from typing import Dict, Optional
+
 from fastapi import APIRouter
-from api.models import HealthResponse
+from fastapi.responses import JSONResponse
+from api import __version__
+from api.models import HealthResponse, LivenessResponse, ReadinessResponse
 
 router = APIRouter()
 
-# Global flag to track if models are loaded
+# Global readiness state, set by the startup warm-up
 _models_loaded = False
+_load_times_ms: Dict[str, float] = {}
+_warmup_error: Optional[str] = None
 
 
-def set_models_loaded(loaded: bool):
-    """Set the models loaded status"""
-    global _models_loaded
+def set_models_loaded(loaded: bool, load_times_ms: Optional[Dict[str, float]] = None):
+    """Set the models loaded status and per-model load times"""
+    global _models_loaded, _load_times_ms
     _models_loaded = loaded
+    if load_times_ms is not None:
+        _load_times_ms = dict(load_times_ms)
+
+
+def models_loaded() -> bool:
+    return _models_loaded
+
+
+def load_times_ms() -> Dict[str, float]:
+    return dict(_load_times_ms)
+
+
+def set_warmup_error(error: Optional[str]):
+    """Record why the warm-up failed (the process stays not-ready)"""
+    global _warmup_error
+    _warmup_error = error
 
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """
     Health check endpoint
-    
+
     Returns the API status and whether models are loaded.
     """
     return HealthResponse(
         status="healthy",
-        version="0.1.0",
+        version=__version__,
         models_loaded=_models_loaded
     )
+
+
+@router.get("/health/live", response_model=LivenessResponse)
+async def liveness():
+    """
+    Liveness probe
+
+    Always 200 while the process can serve requests, including during
+    model warm-up.
+    """
+    return LivenessResponse(status="alive", version=__version__)
+
+
+@router.get(
+    "/health/ready",
+    response_model=ReadinessResponse,
+    responses={503: {"model": ReadinessResponse}},
+)
+async def readiness():
+    """
+    Readiness probe
+
+    200 once models are loaded and warmed, 503 before that (or if the
+    warm-up failed). Includes load time per model in milliseconds.
+    """
+    body = ReadinessResponse(
+        status="ready" if _models_loaded else "not_ready",
+        models_loaded=_models_loaded,
+        load_times_ms=_load_times_ms,
+        error=_warmup_error,
+    )
+    return JSONResponse(
+        status_code=200 if _models_loaded else 503,
+        content=body.model_dump()
+    )
@@ -0,0 +1,100 @@
+"""
+Asynchronous job endpoints
+
+``POST /jobs`` returns a job ID right away; poll ``GET /jobs/{id}`` for
+progress and the final ``ValidationResponse``.
+"""
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from api.config import settings
+from api.jobs import SUCCEEDED, get_job_queue
+from api.models import JobProgress, JobStatus, ValidationRequest, ValidationResponse
+from api.routes.validate import resolve_references
+from api.validation import SOURCECHECK_AVAILABLE
+
+router = APIRouter()
+
+
+def _job_status(job: dict, include_result: bool = False) -> JobStatus:
+    result = None
+    if include_result and job["status"] == SUCCEEDED:
+        result = ValidationResponse.model_validate_json(
+            get_job_queue().store.get_result(job["id"])
+        )
+    return JobStatus(
+        job_id=job["id"],
+        status=job["status"],
+        priority=job["priority"],
+        created_at=job["created_at"],
+        started_at=job["started_at"],
+        finished_at=job["finished_at"],
+        progress=JobProgress(
+            parts_done=job["parts_done"],
+            parts_total=job["parts_total"],
+            claims_done=job["claims_done"],
+            claims_total=job["claims_total"],
+        ),
+        error=job["error"],
+        result=result,
+    )
+
+
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(
+    request: ValidationRequest,
+    priority: int = Query(0, description="Higher runs sooner"),
+):
+    """
+    Submit a validation job
+
+    Accepts the same body as ``POST /validate`` and returns immediately
+    with a job ID. The job survives client disconnects and server restarts.
+    """
+    if not SOURCECHECK_AVAILABLE:
+        raise HTTPException(
+            status_code=500,
+            detail="sourcecheck library not available"
+        )
+    if not settings.jobs_enabled:
+        raise HTTPException(status_code=404, detail="Jobs are disabled")
+
+    request, _ = await resolve_references(request)
+    payload = {
+        "source_text": request.source_text,
+        "claims": request.claims,
+        "schema": request.schema,
+        "policies": request.policies,
+        "max_evidence": request.evidence_limit,
+    }
+    try:
+        job = await run_in_threadpool(get_job_queue().submit, payload, priority)
+    except OverflowError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy: {e}",
+            headers={"Retry-After": str(settings.executor_retry_after)}
+        )
+    return _job_status(job)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Job status and progress; includes ``result`` once it has succeeded"""
+    job = await run_in_threadpool(get_job_queue().store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job id: {job_id}")
+    return await run_in_threadpool(_job_status, job, True)
+
+
+@router.delete("/jobs/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    """
+    Cancel a job
+
+    Queued jobs are cancelled immediately; running jobs stop after their
+    current claim group. Finished jobs are returned unchanged.
+    """
+    job = await run_in_threadpool(get_job_queue().cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job id: {job_id}")
+    return _job_status(job)
@@ -0,0 +1,113 @@
+"""
+Prometheus metrics endpoint
+
+``GET /metrics`` returns request, stage and claim metrics recorded by this
+process plus executor, cache, job and model gauges read at scrape time.
+Values are per process: with several server workers each scrape is
+answered by whichever worker accepts it. The job gauges query SQLite, so
+the scrape is rendered on the thread pool rather than the event loop.
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from api.config import settings
+from api.jobs import RUNNING, QUEUED, get_job_queue
+from api.metrics import REGISTRY, CollectedMetric
+from api.routes import health
+from api.routes.validate import result_cache
+from api.validation import checker_pool, executor, source_cache
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _cache_stats():
+    stats = {
+        "checker_pool": checker_pool.stats(),
+        "source": source_cache.stats(),
+    }
+    if result_cache is not None:
+        # Counters only: the backend's size figures scan the whole store
+        stats["result"] = result_cache.counters()
+    return stats
+
+
+def _cache_metric(key: str):
+    return lambda: {(cache,): s[key] for cache, s in _cache_stats().items()}
+
+
+def _executor_metric(key: str):
+    return lambda: {(): executor.stats()[key]}
+
+
+def _jobs():
+    if not settings.jobs_enabled:
+        return {}
+    store = get_job_queue().store
+    return {(status,): store.count(status) for status in (QUEUED, RUNNING)}
+
+
+for _metric in (
+    CollectedMetric(
+        "sourcecheck_executor_in_flight",
+        "Validations running or waiting on the executor",
+        collect=_executor_metric("in_flight"),
+    ),
+    CollectedMetric(
+        "sourcecheck_executor_queue_depth",
+        "Validations waiting for a free executor worker",
+        collect=_executor_metric("queued"),
+    ),
+    CollectedMetric(
+        "sourcecheck_executor_rejected_total",
+        "Validations rejected because the executor queue was full",
+        kind="counter",
+        collect=_executor_metric("rejected"),
+    ),
+    CollectedMetric(
+        "sourcecheck_cache_hits_total",
+        "Cache hits by cache",
+        kind="counter",
+        labels=("cache",),
+        collect=_cache_metric("hits"),
+    ),
+    CollectedMetric(
+        "sourcecheck_cache_misses_total",
+        "Cache misses by cache",
+        kind="counter",
+        labels=("cache",),
+        collect=_cache_metric("misses"),
+    ),
+    CollectedMetric(
+        "sourcecheck_cache_hit_ratio",
+        "Cache hits over lookups since process start",
+        labels=("cache",),
+        collect=_cache_metric("hit_rate"),
+    ),
+    CollectedMetric(
+        "sourcecheck_jobs",
+        "Jobs in the shared job store by status",
+        labels=("status",),
+        collect=_jobs,
+    ),
+    CollectedMetric(
+        "sourcecheck_models_loaded",
+        "1 once the startup warm-up has loaded the models",
+        collect=lambda: {(): 1 if health.models_loaded() else 0},
+    ),
+    CollectedMetric(
+        "sourcecheck_model_load_seconds",
+        "Startup load and warm-up time per validator or step",
+        labels=("model",),
+        collect=lambda: {(name,): ms / 1000 for name, ms in health.load_times_ms().items()},
+    ),
+):
+    REGISTRY.register(_metric)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Metrics in the Prometheus text exposition format"""
+    return PlainTextResponse(await run_in_threadpool(REGISTRY.render), media_type=CONTENT_TYPE)
@@ -0,0 +1,236 @@
+"""
+Registry endpoints
+
+Upload a source document, schema or policies once and reference it by ID
+(``source_id``, ``schema_id``, ``policies_id``) in validation requests.
+"""
+import codecs
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, Body, HTTPException, Request, Response
+from starlette.concurrency import run_in_threadpool
+from api.admission import CostEstimate, Overloaded, Ticket, client_id
+from api.config import settings
+from api.executor import QueueFullError
+from api.models import ConfigRegistered, SourceInfo, SourceUploadRequest
+from api.registry import Registry, get_registry
+from api.routes.validate import admission
+from api.validation import (
+    executor,
+    finish_source_index,
+    index_source,
+    source_cache,
+    source_index_builder,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/sources", response_model=SourceInfo, status_code=201)
+async def upload_source(request: SourceUploadRequest):
+    """
+    Store a source document and build its retrieval index
+
+    Returns a ``source_id`` usable in place of ``source_text``. Uploading
+    the same text again returns the same ID.
+    """
+    registry = get_registry()
+    source_id = await run_in_threadpool(registry.put_source, request.text)
+    info = await run_in_threadpool(registry.info, source_id)
+
+    # Preprocess now so the first validation finds a warm index; if the
+    # workers are busy the index is built lazily instead
+    index_stats = None
+    try:
+        index_stats, _ = await executor.run(index_source, request.text)
+    except QueueFullError:
+        logger.info("Workers busy; source %s will be indexed on first use", source_id[:16])
+
+    return SourceInfo(
+        source_id=source_id,
+        chars=len(request.text),
+        created_at=info["created_at"],
+        index=index_stats,
+    )
+
+
+async def _body_pieces(request: Request) -> AsyncIterator[bytes]:
+    """Raw bytes of the upload: the ``file`` part of a multipart form, else the body"""
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        # Starlette spools the parts to a temporary file beyond 1 MB
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=422, detail="Multipart upload needs a 'file' part")
+        try:
+            while True:
+                piece = await upload.read(256 * 1024)
+                if not piece:
+                    break
+                yield piece
+        finally:
+            await form.close()
+    else:
+        async for piece in request.stream():
+            yield piece
+
+
+@router.post("/sources/stream", response_model=SourceInfo, status_code=201)
+async def upload_source_stream(request: Request):
+    """
+    Store a long source document sent as a stream and index it as it arrives
+
+    The body is the UTF-8 text itself (any content type, chunked transfer
+    allowed) or a multipart form with a ``file`` part. The text is split
+    into sentences and indexed window by window while it is received, so
+    neither the raw body nor a whole-document index has to be held at
+    once; embeddings beyond ``source_index_max_resident_mb`` are spilled
+    to disk. The returned ``source_id`` is the same as for
+    ``POST /sources`` with that text.
+
+    The windows are indexed on the validation executor, and the upload
+    holds a ``large`` admission lane slot: a full queue gives 503, a full
+    lane or client quota 429, both with ``Retry-After``.
+
+    The finished text is still held in memory once (shared by the index
+    and the registry cache) and stored in one registry row, and with
+    process workers the whole text is collected before a worker indexes
+    it. Validations referencing the source reach the checker narrowed
+    when it has at least ``source_prefilter_min_chars`` characters.
+    """
+    ticket = await _admit_upload(request)
+    try:
+        return await _store_stream(request)
+    finally:
+        if ticket is not None:
+            ticket.release()
+
+
+async def _admit_upload(request: Request) -> Optional[Ticket]:
+    """Slot in the large admission lane; 429 when it or the client quota is full"""
+    if admission is None:
+        return None
+    length = request.headers.get("content-length")
+    estimate = CostEstimate(int(length) if length and length.isdigit() else 0, 0, 0.0)
+    try:
+        return await admission.admit(
+            client_id(request, settings.admission_client_header), estimate, lane="large"
+        )
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many requests: {e}",
+            headers={"Retry-After": str(settings.executor_retry_after)}
+        )
+
+
+async def _on_executor(fn, *args):
+    """Run ``fn`` on the validation executor; 503 when its queue is full"""
+    try:
+        result, _ = await executor.run(fn, *args)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy: {e}",
+            headers={"Retry-After": str(settings.executor_retry_after)}
+        )
+    return result
+
+
+async def _store_stream(request: Request) -> SourceInfo:
+    limit = settings.source_upload_max_mb * 1024 * 1024
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    # With process workers the index is built by a worker after the upload
+    builder = source_index_builder() if executor.kind == "thread" else None
+    parts = []
+    size = 0
+    window = 0
+    try:
+        async for piece in _body_pieces(request):
+            size += len(piece)
+            if limit and size > limit:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Upload is larger than {settings.source_upload_max_mb} MB",
+                )
+            text = decoder.decode(piece)
+            parts.append(text)
+            window += len(text)
+            if builder is not None and window >= settings.source_index_window_chars:
+                # Indexed on the executor a window at a time
+                await _on_executor(builder.feed, "".join(parts))
+                parts, window = [], 0
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=422, detail=f"Source is not valid UTF-8: {e}")
+    if not size:
+        raise HTTPException(status_code=422, detail="Empty upload")
+
+    index = None
+    if builder is not None:
+        if parts:
+            await _on_executor(builder.feed, "".join(parts))
+        index = await _on_executor(finish_source_index, builder)
+        text = index.text
+    else:
+        text = "".join(parts)
+    registry = get_registry()
+    source_id = await run_in_threadpool(registry.put_source, text)
+    info = await run_in_threadpool(registry.info, source_id)
+
+    if index is not None:
+        source_cache.put(Registry.digest(source_id), index)
+        index_stats = index.stats()
+    else:
+        index_stats = None
+        try:
+            index_stats, _ = await executor.run(index_source, text)
+        except QueueFullError:
+            logger.info("Workers busy; source %s will be indexed on first use", source_id[:16])
+
+    return SourceInfo(
+        source_id=source_id,
+        chars=len(text),
+        created_at=info["created_at"],
+        index=index_stats,
+    )
+
+
+@router.get("/sources/{source_id}", response_model=SourceInfo)
+async def get_source(source_id: str):
+    """Metadata of a stored source (index stats if it is cached in this process)"""
+    info = await run_in_threadpool(get_registry().info, source_id)
+    if info is None or info["kind"] != "source":
+        raise HTTPException(status_code=404, detail=f"Unknown source id: {source_id}")
+    index = source_cache.get(get_registry().digest(source_id))
+    return SourceInfo(
+        source_id=source_id,
+        chars=info["size"],
+        created_at=info["created_at"],
+        index=index.stats() if index is not None else None,
+    )
+
+
+@router.delete("/sources/{source_id}", status_code=204)
+async def delete_source(source_id: str):
+    """Remove a stored source"""
+    if not await run_in_threadpool(get_registry().delete, source_id):
+        raise HTTPException(status_code=404, detail=f"Unknown source id: {source_id}")
+    return Response(status_code=204)
+
+
+@router.post("/schemas", response_model=ConfigRegistered, status_code=201)
+async def register_schema(schema: Dict[str, Any] = Body(...)):
+    """Register a schema; returns a ``schema_id``"""
+    config_id = await run_in_threadpool(get_registry().put_config, "schema", schema)
+    return ConfigRegistered(id=config_id)
+
+
+@router.post("/policies", response_model=ConfigRegistered, status_code=201)
+async def register_policies(policies: Dict[str, Any] = Body(...)):
+    """Register policies; returns a ``policies_id``"""
+    config_id = await run_in_threadpool(get_registry().put_config, "policies", policies)
+    return ConfigRegistered(id=config_id)
@@ -1,106 +1,923 @@
 """
 Validation endpoint
 """
-from fastapi import APIRouter, HTTPException
-from api.models import ValidationRequest, ValidationResponse, ClaimDisposition
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
-# Import sourcecheck library
-try:
-    from sourcecheck import Checker
-    SOURCECHECK_AVAILABLE = True
-except ImportError:
-    SOURCECHECK_AVAILABLE = False
-    Checker = None
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from api import claim_memo
+from api.admission import (
+    CostEstimate,
+    Overloaded,
+    RequestTooLarge,
+    Ticket,
+    client_id,
+    create_admission_controller,
+    estimate_cost,
+    estimate_cost_chars,
+)
+from api.batching import MicroBatcher
+from api.checker_pool import config_fingerprint
+from api.config import settings
+from api.embeddings import loaded_encoder
+from api.executor import QueueFullError
+from api.corpus import excerpt_chars, get_corpus_store, run_corpus_validation
+from api.models import (
+    BatchValidationRequest,
+    BatchValidationResponse,
+    CorpusValidationRequest,
+    ValidationRequest,
+    ValidationResponse,
+)
+from api.jobs import get_job_queue
+from api.metrics import SESSION_CLAIMS, RequestTimer, observe_stages, record_result
+from api.registry import Registry, get_registry
+from api.result_cache import create_result_cache, request_fingerprint
+from api.serialization import Projection, dumps, loads
+from api.sessions import (
+    IncrementalPlan,
+    attribute_dispositions,
+    create_session_store,
+    reproduces_scoring,
+)
+from api.source_index import claim_texts
+from api.validation import (
+    SOURCECHECK_AVAILABLE,
+    cascade_pool,
+    checker_pool,
+    claim_groups,
+    claim_units,
+    executor,
+    merge_responses,
+    source_cache,
+    run_validation,
+    run_validation_batch,
+    split_claims,
+    splits_claims,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Cache the checker instance (loaded once on startup)
-_checker = None
+# Optional cache of serialized responses keyed by request content
+result_cache = create_result_cache(settings)
+
+# Per-claim dispositions of editing sessions (incremental re-validation)
+session_store = create_session_store(settings)
+
+# Size limits, cost lanes and per-client quotas
+admission = create_admission_controller(settings)
+
+
+def _busy_error(e: QueueFullError) -> HTTPException:
+    """503 telling the client when to retry"""
+    return HTTPException(
+        status_code=503,
+        detail=f"Server busy: {e}",
+        headers={"Retry-After": str(settings.executor_retry_after)}
+    )
+
+
+def _estimate(request: ValidationRequest) -> Optional[CostEstimate]:
+    """Cost estimate of a resolved request (None without admission control)"""
+    if admission is None:
+        return None
+    return estimate_cost(request.source_text, request.schema, request.claims, request.policies)
+
+
+def _check_size(estimate: Optional[CostEstimate]):
+    """413 for requests over the size limits"""
+    if estimate is None:
+        return
+    try:
+        admission.check_size(estimate)
+    except RequestTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+async def _admit(http_request: Request, estimate: Optional[CostEstimate]) -> Optional[Ticket]:
+    """Wait for a slot in the request's lane; 429 when the lane or client quota is full"""
+    if estimate is None:
+        return None
+    try:
+        return await admission.admit(
+            client_id(http_request, settings.admission_client_header), estimate
+        )
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many requests: {e}",
+            headers={"Retry-After": str(settings.executor_retry_after)}
+        )
+
+
+def _admission_headers(estimate: Optional[CostEstimate], ticket: Optional[Ticket]) -> Dict[str, str]:
+    headers = {}
+    if estimate is not None:
+        headers["X-Estimated-Cost"] = f"{estimate.cost:.1f}"
+    if ticket is not None:
+        headers["X-Admission-Lane"] = ticket.lane.name
+    return headers
+
+
+async def _run_claim_batch(key: str, items: List[tuple]) -> List[Any]:
+    """Run claim groups with the same configuration as one executor task"""
+    schema, policies, max_evidence = items[0][0], items[0][1], items[0][4]
+    results, timing = await executor.run(
+        run_validation_batch,
+        schema,
+        policies,
+        [(source_text, claims) for _, _, source_text, claims, _ in items],
+        max_evidence,
+    )
+    return [
+        (result, timing) if error is None else RuntimeError(error)
+        for result, error in results
+    ]
+
+
+# Claims-parallel mode: claim groups from concurrent requests with the same
+# configuration share executor tasks
+claim_batcher = MicroBatcher(
+    _run_claim_batch,
+    max_batch=settings.claims_max_batch,
+    max_wait_ms=settings.claims_max_wait_ms,
+    name="claims",
+)
+
+
+async def run_claims_parallel(
+    request: ValidationRequest,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Validate a request as independent claim groups and merge the results
+
+    Groups run concurrently on the executor (through ``claim_batcher``).
+    Requests against long sources stay in one group (``splits_claims``).
+    The returned timing is that of the slowest group.
+    """
+    groups = [(request.schema, request.claims)]
+    if splits_claims(len(request.source_text)):
+        groups = split_claims(request.schema, request.claims, settings.claims_max_batch)
+    outcomes = await asyncio.gather(*[
+        claim_batcher.submit(
+            (config_fingerprint(schema, request.policies), request.evidence_limit),
+            (schema, request.policies, request.source_text, claims, request.evidence_limit),
+            size=len(claim_texts(claims)),
+        )
+        for schema, claims in groups
+    ])
+    timing = max((t for _, t in outcomes), key=lambda t: t["execution_ms"])
+    return merge_responses([r for r, _ in outcomes]), timing
+
+
+async def execute_request(
+    request: ValidationRequest,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Validate a resolved request on the executor (claim groups in claims-parallel mode)"""
+    if settings.claims_parallel:
+        return await run_claims_parallel(request)
+    return await executor.run(
+        run_validation,
+        request.schema,
+        request.policies,
+        request.source_text,
+        request.claims,
+        request.evidence_limit,
+    )
+
+
+def _session_context(request: ValidationRequest, source_digest: Optional[str]) -> Optional[str]:
+    """Fingerprint of everything but the claims for session requests, else None"""
+    if request.session_id is None or session_store is None:
+        return None
+    return request_fingerprint(
+        request.source_text, {}, request.schema, request.policies,
+        source_digest=source_digest, max_evidence=request.evidence_limit,
+    )
+
+
+async def _session_plan(request: ValidationRequest, context: str) -> Optional[IncrementalPlan]:
+    """Plan reusing the session's previous dispositions, or None to validate everything"""
+    previous = await run_in_threadpool(session_store.load, request.session_id, context)
+    if not previous:
+        return None
+    plan = IncrementalPlan.build(request.schema, request.claims, previous)
+    if plan is None or plan.reuses_nothing:
+        return None
+    return plan
+
+
+def _changed_request(request: ValidationRequest, plan: IncrementalPlan) -> Optional[ValidationRequest]:
+    """The request narrowed to the claims ``plan`` has to validate (None if all are reused)"""
+    narrowed = plan.request(request.schema)
+    if narrowed is None:
+        return None
+    schema, claims = narrowed
+    return request.model_copy(update={"schema": schema, "claims": claims})
+
+
+async def _save_session(
+    request: ValidationRequest,
+    context: str,
+    result: Dict[str, Any],
+    plan: Optional[IncrementalPlan] = None,
+    validated: Optional[Dict[str, Any]] = None,
+):
+    """
+    Leave the request's dispositions in its session, by unit
+
+    ``validated`` is the library's response for the units validated now
+    (the whole ``result`` when the plan is None). If ``summarize`` does
+    not reproduce its aggregates, merged responses would not be scored as
+    the library scores them, so the session is cleared instead.
+    """
+    await run_in_threadpool(_store_session, request, context, result, plan, validated)
+
+
+def _store_session(request, context, result, plan, validated):
+    if validated is not None and not reproduces_scoring(validated, request.policies):
+        logger.warning(
+            "Session %s: scores not reproducible for these policies; not reusing claims",
+            request.session_id,
+        )
+        session_store.clear(request.session_id, context)
+        return
+    if plan is not None:
+        units, per_unit = plan.units, plan.per_unit
+    else:
+        units = claim_units(request.schema, request.claims) or []
+        per_unit, _ = attribute_dispositions(units, result["dispositions"])
+    session_store.save(request.session_id, context, units, per_unit)
+
+
+def _count_session(plan: Optional[IncrementalPlan], result: Dict[str, Any],
+                   cached: bool = False) -> Dict[str, str]:
+    """
+    Count the reused and validated claims of a session request; returns its headers
+
+    Results answered from the result cache validate nothing: every claim
+    counts as reused.
+    """
+    if cached:
+        reused = result["total_claims"]
+    else:
+        reused = plan.reused_count if plan is not None else 0
+    validated = result["total_claims"] - reused
+    SESSION_CLAIMS.inc(reused, outcome="reused")
+    SESSION_CLAIMS.inc(validated, outcome="validated")
+    return {"X-Claims-Reused": str(reused), "X-Claims-Validated": str(validated)}
+
+
+def response_projection(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated disposition fields to return, e.g. "
+                    "field,claim_text,verdict,score (default: all)"
+    ),
+    include_evidence: bool = Query(
+        True,
+        description="Include evidence spans in dispositions"
+    ),
+) -> Optional[Projection]:
+    """Disposition fields requested by the client (None = everything)"""
+    try:
+        return Projection.parse(fields, include_evidence)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _lookup_config(kind: str, inline: Optional[Dict[str, Any]], config_id: Optional[str]) -> Dict[str, Any]:
+    if inline is not None:
+        return inline
+    config = get_registry().get_config(kind, config_id)
+    if config is None:
+        raise HTTPException(status_code=404, detail=f"Unknown {kind} id: {config_id}")
+    return config
+
+
+def _lookup_source(source_text: Optional[str], source_id: Optional[str]) -> str:
+    if source_text is not None:
+        return source_text
+    text = get_registry().get_source(source_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail=f"Unknown source id: {source_id}")
+    return text
+
+
+def _resolve_sync(request: ValidationRequest) -> Tuple[ValidationRequest, Optional[str]]:
+    resolved = request.model_copy(update={
+        "source_text": _lookup_source(request.source_text, request.source_id),
+        "schema": _lookup_config("schema", request.schema, request.schema_id),
+        "policies": _lookup_config("policies", request.policies, request.policies_id),
+    })
+    digest = Registry.digest(request.source_id) if request.source_id else None
+    return resolved, digest
+
+
+async def resolve_references(request: ValidationRequest) -> Tuple[ValidationRequest, Optional[str]]:
+    """
+    Fill in registered source/schema/policies referenced by ID
+
+    Returns the resolved request and, for registered sources, the source
+    digest (so it need not be re-hashed). Unknown IDs raise 404.
+    """
+    if request.source_id is None and request.schema_id is None and request.policies_id is None:
+        return request, None
+    return await run_in_threadpool(_resolve_sync, request)
+
+
+def _etag(key: str) -> str:
+    return f'"{key}"'
+
+
+def _etag_matches(http_request: Request, etag: str) -> bool:
+    header = http_request.headers.get("if-none-match")
+    if not header:
+        return False
+    return any(tag.strip() in (etag, f"W/{etag}") for tag in header.split(","))
+
+
+async def _cached_result(key: str) -> Optional[bytes]:
+    if result_cache is None:
+        return None
+    return await run_in_threadpool(result_cache.get, key)
+
+
+async def _store_result(key: str, body: bytes):
+    if result_cache is not None:
+        await run_in_threadpool(result_cache.set, key, body)
+
+
+def _start_timer(http_request: Request) -> RequestTimer:
+    """Timer for a request, with body parsing timed from the middleware start"""
+    timer = RequestTimer()
+    started_at = getattr(http_request.state, "started_at", None)
+    if started_at is not None:
+        timer.add("parse", (time.perf_counter() - started_at) * 1000)
+    return timer
+
+
+def _timing_headers(timer: RequestTimer, http_request: Request) -> Dict[str, str]:
+    """Record the request's stages and build its ``Server-Timing`` header"""
+    timer.observe()
+    if not settings.server_timing_header:
+        return {}
+    started_at = getattr(http_request.state, "started_at", None)
+    total_ms = (time.perf_counter() - started_at) * 1000 if started_at is not None else None
+    return {"Server-Timing": timer.server_timing(total_ms)}
 
 
 @router.post("/validate", response_model=ValidationResponse)
-async def validate_claims(request: ValidationRequest):
+async def validate_claims(
+    request: ValidationRequest,
+    http_request: Request,
+    projection: Optional[Projection] = Depends(response_projection),
+):
     """
     Validate claims against source text
-    
-    Takes a source document, claims, schema, and policies, then validates 
+
+    Takes a source document, claims, schema, and policies, then validates
     each claim using the sourcecheck library.
-    
+
     Returns detailed validation results including:
     - Overall score
     - Per-claim verdicts (supported/refuted/insufficient_evidence)
     - Evidence spans
     - Validator explanations
+
+    Validation runs on a bounded worker pool. When the pool and its queue
+    are full the request is rejected with 503 and a Retry-After header.
+
+    Responses carry an ``ETag`` derived from the request content. Resending
+    it in ``If-None-Match`` returns 304, and identical requests are answered
+    from the result cache (``X-Cache: HIT``) when it is enabled.
+
+    ``source_id``, ``schema_id`` and ``policies_id`` reference content
+    uploaded through the registry endpoints instead of sending it inline.
+
+    A ``Server-Timing`` header breaks the request down into stages (parse,
+    resolve, cache, queue, checker, verify, serialize, ...).
+
+    With ``claims_parallel`` enabled the claims are validated in groups of
+    sentences on several workers and merged (see ``run_claims_parallel``).
+
+    ``fields`` and ``include_evidence`` trim each disposition to the
+    fields the client reads; the scores and counts are always returned.
+    ``evidence_mode``/``max_evidence`` in the body set how many evidence
+    spans are built per claim in the first place.
+
+    With a ``session_id`` only the sentences that changed since the
+    session's previous request (same source and configuration) are
+    validated; the others reuse the library's claims for them and the
+    scores are recomputed (``X-Claims-Reused``/``X-Claims-Validated``
+    headers, see ``api.sessions``).
+
+    Admission control rejects requests over the size limits with 413 and
+    runs the rest in the lane of their estimated cost (``X-Estimated-Cost``,
+    ``X-Admission-Lane``); a full lane or client quota gives 429.
     """
     if not SOURCECHECK_AVAILABLE:
         raise HTTPException(
             status_code=500,
             detail="sourcecheck library not available"
         )
-    
+
+    timer = _start_timer(http_request)
+    with timer.stage("resolve"):
+        request, source_digest = await resolve_references(request)
+    with timer.stage("estimate"):
+        estimate = _estimate(request)
+    _check_size(estimate)
+    with timer.stage("fingerprint"):
+        key = request_fingerprint(
+            request.source_text, request.claims, request.schema, request.policies,
+            source_digest=source_digest, max_evidence=request.evidence_limit,
+        )
+    etag = _etag(key if projection is None else f"{key}-{projection.token}")
+    if _etag_matches(http_request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    context = _session_context(request, source_digest)
+    with timer.stage("cache"):
+        cached = await _cached_result(key)
+    if cached is not None:
+        session_headers = {}
+        if context is not None:
+            # The cached result becomes the session's state for the next edit
+            cached_result = loads(cached)
+            with timer.stage("session"):
+                await _save_session(request, context, cached_result, validated=cached_result)
+            session_headers = _count_session(None, cached_result, cached=True)
+        if projection is not None:
+            with timer.stage("serialize"):
+                cached = dumps(projection.response(loads(cached)))
+        return Response(
+            content=cached,
+            media_type="application/json",
+            headers={
+                "ETag": etag,
+                "X-Cache": "HIT",
+                **session_headers,
+                **_timing_headers(timer, http_request),
+            }
+        )
+
+    plan = None
+    if context is not None:
+        with timer.stage("session"):
+            plan = await _session_plan(request, context)
+
+    work = request if plan is None else _changed_request(request, plan)
+    ticket = None
+    if work is not None:
+        if work is not request and estimate is not None:
+            estimate = _estimate(work)
+        with timer.stage("admission"):
+            ticket = await _admit(http_request, estimate)
+
     try:
-        # Create checker with configs from request
-        checker = Checker(
-            schema=request.schema,
-            policies=request.policies,
-            debug=True  # Enable debug logging
-        )
-        
-        # Run validation
-        report = checker.verify_summary(
-            transcript=request.source_text,
-            summary=request.claims
-        )
-        
-        # Convert dispositions to response format
-        dispositions = [
-            ClaimDisposition(
-                field=d.claim.field,
-                claim_text=d.claim.text,
-                verdict=d.verdict,
-                evidence_count=d.evidence_count,
-                validator=d.validator,
-                explanation=d.explanation,
-                score=d.confidence,  # Semantic/validator confidence score
-                quality_score=d.quality_score,
-                quality_issues=[
-                    {
-                        "type": issue.type,
-                        "severity": issue.severity,
-                        "detail": issue.detail,
-                        "suggestion": issue.suggestion
-                    }
-                    for issue in d.quality_issues
-                ],
-                evidence=[
-                    {
-                        "text": ev.text,
-                        "score": ev.score
-                    }
-                    for ev in (d.evidence[:3] if d.evidence else [])  # Top 3 evidence spans
-                ]
-            )
-            for d in report.dispositions
-        ]
-        
-        return ValidationResponse(
-            overall_score=report.overall_score,
-            total_claims=report.total_claims,
-            supported_count=report.supported_count,
-            refuted_count=report.refuted_count,
-            insufficient_count=report.insufficient_count,
-            support_rate=report.support_rate,
-            dispositions=dispositions
-        )
-        
+        if work is not None:
+            validated, timing = await execute_request(work)
+        else:
+            validated, timing = None, {"queue_ms": 0.0, "execution_ms": 0.0, "stages": {}}
+    except QueueFullError as e:
+        raise _busy_error(e)
     except Exception as e:
         # Log the full stack trace
         import traceback
         error_trace = traceback.format_exc()
-        print(f"ERROR: Validation failed")
-        print(error_trace)
-        
+        logger.exception("Validation failed")
+
         raise HTTPException(
             status_code=500,
             detail=f"Validation failed: {str(e)}\n\nStack trace:\n{error_trace}"
         )
+    finally:
+        if ticket is not None:
+            ticket.release()
+
+    timer.add("queue", timing["queue_ms"])
+    timer.update(timing["stages"])
+    result = validated if plan is None else plan.merge(validated, request.policies)
+    with timer.stage("serialize"):
+        body = dumps(result)
+        full_body = body
+        if projection is not None:
+            body = dumps(projection.response(result))
+    # Merged results are scored by the web layer; only full runs are cached
+    if plan is None:
+        await _store_result(key, full_body)
+    session_headers = {}
+    if context is not None:
+        await _save_session(request, context, result, plan, validated)
+        session_headers = _count_session(plan, result)
+    if validated is not None:
+        record_result(validated, "validate")
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={
+            "ETag": etag,
+            "X-Cache": "MISS" if result_cache is not None else "BYPASS",
+            "X-Queue-Wait-Ms": f"{timing['queue_ms']:.1f}",
+            "X-Execution-Ms": f"{timing['execution_ms']:.1f}",
+            **session_headers,
+            **_admission_headers(estimate, ticket),
+            **_timing_headers(timer, http_request),
+        }
+    )
+
+
+def _format_event(event: str, data: dict, fmt: str) -> bytes:
+    if fmt == "sse":
+        return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+    return dumps({"event": event, "data": data}) + b"\n"
+
+
+def _summary(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in result.items() if k != "dispositions"}
+
+
+@router.post("/validate/stream")
+async def validate_claims_stream(
+    request: ValidationRequest,
+    http_request: Request,
+    format: Optional[str] = Query(
+        None,
+        pattern="^(ndjson|sse)$",
+        description="ndjson (default) or sse; also chosen by Accept: text/event-stream"
+    ),
+    projection: Optional[Projection] = Depends(response_projection),
+):
+    """
+    Validate claims and stream dispositions as they become final
+
+    Claims are validated in up to ``stream_max_partitions`` independent
+    groups on the executor (``sentence_split`` fields are divided at
+    sentence boundaries, never after an abbreviation; with
+    ``claims_parallel`` the groups are those of ``claims_max_batch``
+    sentences; requests against long sources are one group, see
+    ``splits_claims``) and each group's dispositions are emitted as soon
+    as it finishes, as ``disposition`` events. The stream ends with a
+    ``summary`` event carrying the aggregate scores (or an ``error``
+    event). Results split into groups that ``/validate`` would not use
+    are not stored in the result cache.
+
+    NDJSON lines look like ``{"event": "disposition", "data": {...}}``;
+    with SSE the same payload is sent as ``event:``/``data:`` frames.
+    ``fields`` and ``include_evidence`` trim the disposition events.
+
+    With a ``session_id`` the dispositions reused from the session's
+    previous request are sent first and only the changed claims are
+    validated (see ``validate_claims``).
+    """
+    if not SOURCECHECK_AVAILABLE:
+        raise HTTPException(
+            status_code=500,
+            detail="sourcecheck library not available"
+        )
+
+    fmt = format
+    if fmt is None:
+        accept = http_request.headers.get("accept", "")
+        fmt = "sse" if "text/event-stream" in accept else "ndjson"
+    media_type = "text/event-stream" if fmt == "sse" else "application/x-ndjson"
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    request, source_digest = await resolve_references(request)
+    estimate = _estimate(request)
+    _check_size(estimate)
+    key = request_fingerprint(
+        request.source_text, request.claims, request.schema, request.policies,
+        source_digest=source_digest, max_evidence=request.evidence_limit,
+    )
+    project = projection.disposition if projection is not None else (lambda d: d)
+    context = _session_context(request, source_digest)
+    cached = await _cached_result(key)
+    if cached is not None:
+        cached_result = loads(cached)
+        if context is not None:
+            await _save_session(request, context, cached_result, validated=cached_result)
+            headers.update(_count_session(None, cached_result, cached=True))
+
+        async def cached_events():
+            for d in cached_result["dispositions"]:
+                yield _format_event("disposition", project(d), fmt)
+            yield _format_event("summary", _summary(cached_result), fmt)
+
+        return StreamingResponse(
+            cached_events(),
+            media_type=media_type,
+            headers={**headers, "X-Cache": "HIT"}
+        )
+
+    plan = await _session_plan(request, context) if context is not None else None
+    target = request if plan is None else _changed_request(request, plan)
+    if target is None:
+        parts = []
+    elif not splits_claims(len(target.source_text)):
+        parts = [(target.schema, target.claims)]
+    elif settings.claims_parallel:
+        parts = split_claims(target.schema, target.claims, settings.claims_max_batch)
+    else:
+        parts = claim_groups(target.schema, target.claims, settings.stream_max_partitions)
+    # Only results validated in the groups /validate would use are cached
+    # under its key; the library may extract other claims from split groups
+    shared = settings.claims_parallel or len(parts) <= 1
+    ticket = None
+    if parts:
+        if target is not request and estimate is not None:
+            estimate = _estimate(target)
+        ticket = await _admit(http_request, estimate)
+    try:
+        futures = executor.submit_many(
+            run_validation,
+            [
+                (schema, request.policies, request.source_text, claims, request.evidence_limit)
+                for schema, claims in parts
+            ]
+        ) if parts else []
+    except QueueFullError as e:
+        if ticket is not None:
+            ticket.release()
+        raise _busy_error(e)
+    if ticket is not None:
+        # The slot is held until the work finishes, however the stream ends
+        asyncio.gather(*futures, return_exceptions=True).add_done_callback(
+            lambda _: ticket.release()
+        )
+    headers.update(_admission_headers(estimate, ticket))
+    if context is not None:
+        headers["X-Claims-Reused"] = str(plan.reused_count if plan is not None else 0)
+
+    async def events():
+        finished = []
+        if plan is not None:
+            for d in plan.reused_dispositions():
+                yield _format_event("disposition", project(d), fmt)
+        try:
+            for next_done in asyncio.as_completed(futures):
+                result, timing = await next_done
+                observe_stages(timing["stages"])
+                finished.append(result)
+                for d in result["dispositions"]:
+                    yield _format_event("disposition", project(d), fmt)
+        except Exception as e:
+            yield _format_event("error", {"detail": f"Validation failed: {e}"}, fmt)
+            return
+        validated = merge_responses(finished) if finished or plan is None else None
+        if plan is None:
+            summary = validated
+            if shared:
+                await _store_result(key, dumps(summary))
+        else:
+            summary = plan.merge(validated, request.policies)
+        if context is not None:
+            await _save_session(request, context, summary, plan, validated)
+            _count_session(plan, summary)
+        if validated is not None:
+            record_result(validated, "stream")
+        yield _format_event("summary", _summary(summary), fmt)
+
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        headers={**headers, "X-Cache": "MISS" if result_cache is not None else "BYPASS"}
+    )
+
+
+@router.post("/validate/corpus", response_model=ValidationResponse)
+async def validate_corpus(
+    request: CorpusValidationRequest,
+    http_request: Request,
+    projection: Optional[Projection] = Depends(response_projection),
+):
+    """
+    Validate claims against stored documents
+
+    The evidence scope is every document of ``corpus_ids`` plus
+    ``document_ids`` (see the corpus endpoints). The passages most relevant
+    to the claims are retrieved from the documents' stored indexes and
+    only those are validated against; nothing is re-indexed. Unknown IDs
+    give 404, scopes over ``corpus_max_scope_documents`` documents 413.
+
+    The cost estimate counts the retrieved passages, not the whole scope;
+    ``fields``/``include_evidence`` and the admission headers work as on
+    ``/validate``.
+    """
+    if not SOURCECHECK_AVAILABLE:
+        raise HTTPException(
+            status_code=500,
+            detail="sourcecheck library not available"
+        )
+
+    timer = _start_timer(http_request)
+
+    def resolve_corpus():
+        schema = _lookup_config("schema", request.schema, request.schema_id)
+        policies = _lookup_config("policies", request.policies, request.policies_id)
+        try:
+            documents = get_corpus_store().resolve_scope(request.corpus_ids, request.document_ids)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=e.args[0])
+        return schema, policies, documents
+
+    with timer.stage("resolve"):
+        schema, policies, documents = await run_in_threadpool(resolve_corpus)
+    if not documents:
+        raise HTTPException(status_code=422, detail="The scope has no documents")
+    if len(documents) > settings.corpus_max_scope_documents:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Scope has {len(documents)} documents "
+                   f"(max {settings.corpus_max_scope_documents})"
+        )
+    estimate = None
+    if admission is not None:
+        with timer.stage("estimate"):
+            chars = excerpt_chars(documents, len(claim_texts(request.claims)))
+            estimate = estimate_cost_chars(chars, schema, request.claims, policies)
+        _check_size(estimate)
+
+    with timer.stage("admission"):
+        ticket = await _admit(http_request, estimate)
+    try:
+        result, timing = await executor.run(
+            run_corpus_validation,
+            schema,
+            policies,
+            [d["document_id"] for d in documents],
+            request.claims,
+            request.evidence_limit,
+        )
+    except QueueFullError as e:
+        raise _busy_error(e)
+    except Exception as e:
+        logger.exception("Corpus validation failed")
+        raise HTTPException(status_code=500, detail=f"Validation failed: {e}")
+    finally:
+        if ticket is not None:
+            ticket.release()
+
+    timer.add("queue", timing["queue_ms"])
+    timer.update(timing["stages"])
+    with timer.stage("serialize"):
+        body = dumps(projection.response(result) if projection is not None else result)
+    record_result(result, "corpus")
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={
+            "X-Scope-Documents": str(len(documents)),
+            "X-Queue-Wait-Ms": f"{timing['queue_ms']:.1f}",
+            "X-Execution-Ms": f"{timing['execution_ms']:.1f}",
+            **_admission_headers(estimate, ticket),
+            **_timing_headers(timer, http_request),
+        }
+    )
+
+
+@router.post("/validate/batch", response_model=BatchValidationResponse)
+async def validate_batch(
+    request: BatchValidationRequest,
+    http_request: Request,
+    projection: Optional[Projection] = Depends(response_projection),
+):
+    """
+    Validate many documents against one schema/policies configuration
+
+    Items are split into contiguous chunks, one per executor worker, and
+    every chunk runs through the same pooled checker. Each item gets either
+    a ``result`` or an ``error``; one failing item does not fail the batch.
+
+    ``fields`` and ``include_evidence`` trim every item's dispositions,
+    e.g. ``?fields=field,verdict,score`` for clients that only read verdicts.
+
+    Each item must be within the admission size limits (413 otherwise);
+    the batch as a whole takes one slot in the lane of its total cost.
+    """
+    if not SOURCECHECK_AVAILABLE:
+        raise HTTPException(
+            status_code=500,
+            detail="sourcecheck library not available"
+        )
+    if len(request.items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(request.items)} items (max {settings.batch_max_items})"
+        )
+
+    def resolve_batch():
+        schema = _lookup_config("schema", request.schema, request.schema_id)
+        policies = _lookup_config("policies", request.policies, request.policies_id)
+        pairs = [
+            (_lookup_source(item.source_text, item.source_id), item.claims)
+            for item in request.items
+        ]
+        estimates = [
+            estimate_cost(source_text, schema, claims, policies) for source_text, claims in pairs
+        ] if admission is not None else []
+        return schema, policies, pairs, estimates
+
+    schema, policies, pairs, estimates = await run_in_threadpool(resolve_batch)
+    estimate = None
+    for i, item_estimate in enumerate(estimates):
+        try:
+            admission.check_size(item_estimate)
+        except RequestTooLarge as e:
+            raise HTTPException(status_code=413, detail=f"Item {i}: {e}")
+        estimate = item_estimate if estimate is None else estimate + item_estimate
+    n_chunks = min(executor.max_workers, len(pairs))
+    chunk_size = -(-len(pairs) // n_chunks)
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+
+    ticket = await _admit(http_request, estimate)
+    try:
+        outcomes = await asyncio.gather(
+            *[
+                executor.run(run_validation_batch, schema, policies, chunk, request.evidence_limit)
+                for chunk in chunks
+            ],
+            return_exceptions=True
+        )
+    finally:
+        if ticket is not None:
+            ticket.release()
+    if all(isinstance(o, QueueFullError) for o in outcomes):
+        raise _busy_error(outcomes[0])
+
+    item_results = []
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, QueueFullError):
+            item_results.extend((None, f"Server busy: {outcome}") for _ in chunk)
+        elif isinstance(outcome, Exception):
+            item_results.extend((None, f"{type(outcome).__name__}: {outcome}") for _ in chunk)
+        else:
+            chunk_results, timing = outcome
+            observe_stages(timing["stages"])
+            item_results.extend(chunk_results)
+            for result, _ in chunk_results:
+                if result is not None:
+                    record_result(result, "batch")
+
+    results = [
+        {
+            "index": i,
+            "id": item.id,
+            "result": (
+                projection.response(result)
+                if projection is not None and result is not None else result
+            ),
+            "error": error,
+        }
+        for i, (item, (result, error)) in enumerate(zip(request.items, item_results))
+    ]
+    failed = sum(1 for r in results if r["error"] is not None)
+    return Response(
+        content=dumps({
+            "total": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "results": results,
+        }),
+        media_type="application/json",
+    )
+
+
+@router.get("/stats")
+async def get_stats():
+    """
+    Runtime statistics
+
+    Returns checker pool size, memory estimate and hit/miss counters,
+    executor queue depth with separate queue-wait and execution timings,
+    result/source cache, claim memo, session store and corpus store
+    counters, and admission lanes.
+    Caches inside process workers are not included. The store figures
+    come from SQLite queries, which run on the thread pool.
+    """
+    return await run_in_threadpool(_stats)
+
+
+def _stats() -> Dict[str, Any]:
+    encoder = loaded_encoder()
+    return {
+        "checker_pool": checker_pool.stats(),
+        "cascade_checker_pool": cascade_pool.stats(),
+        "executor": executor.stats(),
+        "result_cache": result_cache.stats() if result_cache is not None else None,
+        "sessions": session_store.stats() if session_store is not None else None,
+        "admission": admission.stats() if admission is not None else None,
+        "source_cache": source_cache.stats(),
+        "corpus": get_corpus_store().stats(),
+        "claim_memo": claim_memo.stats(),
+        "claim_batcher": claim_batcher.stats() if settings.claims_parallel else None,
+        "inference": {"embeddings": encoder.scheduler.stats()} if encoder is not None else None,
+        "jobs": get_job_queue().stats() if settings.jobs_enabled else None,
+    }
@@ -0,0 +1,77 @@
+"""
+Response encoding
+
+Validation results travel through the service as plain dicts shaped like
+``ValidationResponse`` and are encoded straight to JSON (with orjson when
+it is installed, the standard library otherwise). The Pydantic response
+models document that shape for OpenAPI but are not used to rebuild and
+re-validate every result.
+
+``Projection`` trims dispositions for clients that only read some of
+their fields (``fields=`` and ``include_evidence=`` query parameters).
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional, Sequence
+
+from api.models import ClaimDisposition
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON encoding of ``obj``"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+DISPOSITION_FIELDS = tuple(ClaimDisposition.model_fields)
+
+
+class Projection:
+    """Subset of disposition fields to return"""
+
+    def __init__(self, fields: Optional[Sequence[str]] = None, include_evidence: bool = True):
+        keep = list(fields) if fields else list(DISPOSITION_FIELDS)
+        if not include_evidence:
+            keep = [name for name in keep if name != "evidence"]
+        # Response order follows the model, whatever order was asked for
+        self.keep = tuple(name for name in DISPOSITION_FIELDS if name in keep)
+        self.token = hashlib.sha256(",".join(self.keep).encode("utf-8")).hexdigest()[:12]
+
+    @classmethod
+    def parse(cls, fields: Optional[str], include_evidence: bool = True) -> Optional["Projection"]:
+        """
+        Projection for the query parameters, or None when nothing is trimmed
+
+        Raises ``ValueError`` for unknown field names.
+        """
+        names = [name.strip() for name in (fields or "").split(",") if name.strip()]
+        unknown = [name for name in names if name not in DISPOSITION_FIELDS]
+        if unknown:
+            raise ValueError(
+                f"Unknown disposition field(s): {', '.join(unknown)} "
+                f"(available: {', '.join(DISPOSITION_FIELDS)})"
+            )
+        projection = cls(names, include_evidence)
+        return None if projection.keep == DISPOSITION_FIELDS else projection
+
+    def disposition(self, disposition: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: disposition[name] for name in self.keep if name in disposition}
+
+    def response(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        projected = dict(result)
+        projected["dispositions"] = [self.disposition(d) for d in result["dispositions"]]
+        return projected
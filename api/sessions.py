@@ -0,0 +1,254 @@
+"""
+Incremental re-validation
+
+Reviewers in the web UI edit a sentence of a long summary and validate
+again. Requests carrying a ``session_id`` leave their dispositions in a
+session store; the next request of the session with the same source,
+schema, policies and evidence depth only validates claims whose
+normalised text is new and reuses the dispositions of the others.
+
+Requests are divided into the units of ``claim_units``: one per sentence
+for fields with ``sentence_split``, one per field otherwise. The session
+keeps, per unit, the claims the library returned for it
+(``attribute_dispositions``): a sentence the library split into several
+claims keeps all of them, one it dropped (``min_claim_length``) keeps
+none. Requests whose claims cannot be divided into units are validated in
+full.
+
+The aggregates of a merged response are recomputed from its dispositions
+(``api.validation.summarize``). That is only done for configurations
+where the recomputation gave the library's own figures for the
+session's validated responses (``reproduces_scoring``); otherwise the
+session is cleared and the next request is validated in full.
+
+Sessions live in the same kinds of backends as the result cache
+(``memory``, ``sqlite`` or ``redis``), stored as JSON.
+"""
+import hashlib
+import logging
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from api.claim_memo import normalize_claim
+from api.result_cache import MemoryBackend, RedisBackend, ResultCache, SQLiteBackend
+from api.serialization import dumps, loads
+from api.source_index import tokenize
+from api.validation import claim_units, group_request, summarize
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES = (
+    "overall_score",
+    "total_claims",
+    "supported_count",
+    "refuted_count",
+    "insufficient_count",
+    "support_rate",
+)
+
+# Dispositions of each unit of a request, None where they are not known
+UnitDispositions = List[Optional[List[Dict[str, Any]]]]
+
+
+def claim_key(field: str, text: Any) -> str:
+    """Hash of a claim's field and whitespace-normalised text"""
+    return hashlib.sha256(f"{field}\x00{normalize_claim(text)}".encode("utf-8")).hexdigest()[:32]
+
+
+def _locate(claim: Any, text: str, start: int) -> Optional[Tuple[int, int]]:
+    """Span of ``claim``'s words in ``text`` at or after ``start`` (punctuation and case aside)"""
+    words = tokenize(str(claim))
+    if not words:
+        return None
+    pattern = r"\W+".join(re.escape(word) for word in words)
+    match = re.compile(rf"(?<!\w){pattern}(?!\w)", re.IGNORECASE).search(text, start)
+    return match.span() if match else None
+
+
+def attribute_dispositions(
+    units: List[Tuple[str, str, Any]], dispositions: List[Dict[str, Any]]
+) -> Tuple[UnitDispositions, List[Dict[str, Any]]]:
+    """
+    The library's dispositions of each of ``units``, and those matching none
+
+    A field's claims are found in its units in order. Units no claim was
+    found in get an empty list. When a claim of a field cannot be found
+    (the library rewrote it), none of that field's units are attributed.
+    """
+    per_unit: UnitDispositions = [None] * len(units)
+    unmatched: List[Dict[str, Any]] = []
+    by_field: Dict[str, List[int]] = {}
+    for i, (field, _, _) in enumerate(units):
+        by_field.setdefault(field, []).append(i)
+    found: Dict[str, List[Dict[str, Any]]] = {}
+    for d in dispositions:
+        found.setdefault(d["field"], []).append(d)
+
+    for field, claims in found.items():
+        indexes = by_field.get(field)
+        if not indexes:
+            unmatched.extend(claims)
+            continue
+        attributed: List[List[Dict[str, Any]]] = [[] for _ in indexes]
+        position, offset = 0, 0
+        for d in claims:
+            for n in range(position, len(indexes)):
+                text = str(units[indexes[n]][2])
+                span = _locate(d["claim_text"], text, offset if n == position else 0)
+                if span is not None:
+                    attributed[n].append(d)
+                    position, offset = n, span[1]
+                    break
+            else:
+                unmatched.extend(claims)
+                break
+        else:
+            for n, i in enumerate(indexes):
+                per_unit[i] = attributed[n]
+    for field, indexes in by_field.items():
+        if field not in found:
+            for i in indexes:
+                per_unit[i] = []
+    return per_unit, unmatched
+
+
+def reproduces_scoring(response: Dict[str, Any], policies: Dict[str, Any]) -> bool:
+    """Whether ``summarize`` gives the library's aggregates for ``response``'s dispositions"""
+    expected = summarize(response["dispositions"], policies)
+    return all(
+        math.isclose(expected[key], response[key], rel_tol=1e-9, abs_tol=1e-9)
+        for key in AGGREGATES
+    )
+
+
+class SessionStore:
+    """The library's dispositions of each unit of the last request of each session"""
+
+    def __init__(self, cache: ResultCache):
+        self.cache = cache
+
+    def load(
+        self, session_id: str, context: str
+    ) -> Optional[Dict[str, List[List[Dict[str, Any]]]]]:
+        """
+        Dispositions of the session's previous request by unit key, or None
+
+        ``context`` is the fingerprint of everything but the claims; a
+        session whose source or configuration changed starts over.
+        """
+        value = self.cache.get(session_id)
+        if value is None:
+            return None
+        session = loads(value)
+        if session.get("context") != context:
+            return None
+        return session["units"]
+
+    def save(
+        self,
+        session_id: str,
+        context: str,
+        units: List[Tuple[str, str, Any]],
+        per_unit: UnitDispositions,
+    ):
+        """Store the attributed units; repeated units are kept in order"""
+        state: Dict[str, List[List[Dict[str, Any]]]] = {}
+        for (field, _, value), dispositions in zip(units, per_unit):
+            if dispositions is not None:
+                state.setdefault(claim_key(field, value), []).append(dispositions)
+        self.cache.set(session_id, dumps({"context": context, "units": state}))
+
+    def clear(self, session_id: str, context: str):
+        self.cache.set(session_id, dumps({"context": context, "units": {}}))
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+def create_session_store(settings) -> Optional[SessionStore]:
+    """Build the configured session store, or None when disabled"""
+    kind = settings.session_backend
+    if kind == "none":
+        return None
+    if kind == "memory":
+        backend = MemoryBackend(settings.session_max_entries, settings.session_max_mb * 1024 * 1024)
+    elif kind == "sqlite":
+        backend = SQLiteBackend(settings.session_path, settings.session_max_entries)
+    elif kind == "redis":
+        backend = RedisBackend(settings.result_cache_redis_url, prefix="sourcecheck:session:")
+    else:
+        raise ValueError(f"Unknown session backend: {kind}")
+    return SessionStore(ResultCache(backend, settings.session_ttl))
+
+
+class IncrementalPlan:
+    """
+    A request's units split into those answered by the previous request
+    of its session and those still to validate
+    """
+
+    def __init__(
+        self,
+        units: List[Tuple[str, str, Any]],
+        previous: Dict[str, List[List[Dict[str, Any]]]],
+    ):
+        self.units = units
+        available = {key: list(found) for key, found in previous.items()}
+        self.reused: UnitDispositions = []
+        for field, _, value in units:
+            found = available.get(claim_key(field, value))
+            self.reused.append(found.pop(0) if found else None)
+        self.changed = [i for i, d in enumerate(self.reused) if d is None]
+        # Every unit's dispositions once ``merge`` has run
+        self.per_unit: UnitDispositions = list(self.reused)
+
+    @classmethod
+    def build(
+        cls,
+        schema: Dict[str, Any],
+        claims: Dict[str, Any],
+        previous: Dict[str, List[List[Dict[str, Any]]]],
+    ) -> Optional["IncrementalPlan"]:
+        """Plan for a request, or None when its claims cannot be split into units"""
+        units = claim_units(schema, claims)
+        if not units:
+            return None
+        return cls(units, previous)
+
+    @property
+    def reuses_nothing(self) -> bool:
+        return len(self.changed) == len(self.units)
+
+    @property
+    def reused_count(self) -> int:
+        """Claims of the library's reused, as it extracted them"""
+        return sum(len(found) for found in self.reused if found is not None)
+
+    def reused_dispositions(self) -> List[Dict[str, Any]]:
+        return [d for found in self.reused if found is not None for d in found]
+
+    def request(self, schema: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Schema and claims validating just the changed units (None if there are none)"""
+        if not self.changed:
+            return None
+        return group_request(schema, [self.units[i] for i in self.changed])
+
+    def merge(self, validated: Optional[Dict[str, Any]], policies: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Response for the whole request from the reused dispositions and the
+        result of validating the changed units
+
+        Dispositions keep the order of the units; validated ones that no
+        changed unit contains are appended.
+        """
+        unmatched: List[Dict[str, Any]] = []
+        if validated is not None:
+            fresh, unmatched = attribute_dispositions(
+                [self.units[i] for i in self.changed], validated["dispositions"]
+            )
+            for i, found in zip(self.changed, fresh):
+                self.per_unit[i] = found
+        merged = [d for found in self.per_unit if found is not None for d in found]
+        merged.extend(unmatched)
+        return summarize(merged, policies, validated.get("cascade") if validated else None)
@@ -0,0 +1,95 @@
+"""
+Per-source preprocessing cache
+
+One transcript is often validated against several candidate summaries.
+The cache keeps the ``SourceIndex`` of recently used sources keyed by a
+hash of the text, so later requests against the same source skip sentence
+segmentation, BM25 indexing and source embedding.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from api.source_index import SourceIndex
+
+
+def source_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SourceCache:
+    """LRU of ``SourceIndex`` objects bounded by entry count and total bytes"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, SourceIndex]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[SourceIndex]:
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+            return index
+
+    def get_or_build(self, text: str, build: Callable[[str], SourceIndex]) -> SourceIndex:
+        """Cached index for ``text``, built with ``build(text)`` on a miss"""
+        key = source_hash(text)
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return index
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            index = self.get(key)
+            if index is not None:
+                with self._lock:
+                    self.hits += 1
+                return index
+            index = build(text)
+            with self._lock:
+                self.misses += 1
+                self._put_locked(key, index)
+                self._key_locks.pop(key, None)
+            return index
+
+    def put(self, key: str, index: SourceIndex):
+        with self._lock:
+            self._put_locked(key, index)
+
+    def _put_locked(self, key: str, index: SourceIndex):
+        # Caller holds self._lock; the newest entry is never evicted
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key).nbytes
+        self._entries[key] = index
+        self._bytes += index.nbytes
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,518 @@
+"""
+Retrieval artefacts for one source document
+
+A ``SourceIndex`` holds the sentence segmentation of a source, a BM25
+index over those sentences and (when an encoder is available) their
+MiniLM embeddings. It is built once per source text and reused by every
+request against that source.
+
+Indexes are built window by window (``SourceIndexBuilder``), from the
+whole text or from pieces of a streamed upload, so building one never
+holds more than a window of sentences, tokens and float32 embeddings at a
+time. The result is the same as indexing the whole document at once. The
+finished index keeps the whole text in memory, since excerpts and
+evidence spans are cut from it.
+"""
+import math
+import re
+import sys
+import tempfile
+from array import array
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from api.ann import IVFIndex
+from api.claim_memo import encode_claims, memoized_spans
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_TOKEN = re.compile(r"\w+")
+
+# Words whose final period does not end a claim: initials, dotted
+# abbreviations ("y.o.", "p.o.", "e.g.") and common short forms
+_ABBREVIATION = re.compile(
+    r"(?:\b[A-Za-z]|\b(?:[A-Za-z]\.)+[A-Za-z]"
+    r"|\b(?:Dr|Mr|Mrs|Ms|Mx|Prof|Sr|Jr|St|Mt|vs|etc|approx|Inc|Ltd|Corp|Fig|al|cf|ca))\.$"
+)
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Embedding rows scored per block by ``SourceIndex.search``
+COSINE_BLOCK_ROWS = 16_384
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """Sentence spans as (start, end) character offsets, whitespace trimmed"""
+    spans = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        _append_span(text, start, match.start(), spans)
+        start = match.end()
+    _append_span(text, start, len(text), spans)
+    return spans
+
+
+def _append_span(text: str, start: int, end: int, spans: List[Tuple[int, int]]):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if end > start:
+        spans.append((start, end))
+
+
+def _top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Positions of the ``top_k`` highest scores, best first"""
+    k = min(top_k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def split_claim_sentences(text: str) -> List[Tuple[int, int]]:
+    """
+    ``split_sentences`` for claim strings, without splitting after
+    abbreviations or before a lowercase word
+
+    Claim groups (streaming, jobs, claims-parallel mode, sessions) are cut
+    at these boundaries, so they err towards keeping text together: a
+    group boundary inside one of the library's claims would validate
+    different claims than the whole request.
+    """
+    spans = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        # Paragraph breaks always end a claim
+        if match.group().count("\n") < 2 and _continues_claim(text, match.start(), match.end()):
+            continue
+        _append_span(text, start, match.start(), spans)
+        start = match.end()
+    _append_span(text, start, len(text), spans)
+    return spans
+
+
+def _continues_claim(text: str, cut: int, resume: int) -> bool:
+    """Whether a break at ``cut`` follows an abbreviation or precedes a lowercase word"""
+    if text[cut - 1] != ".":
+        return False
+    if _ABBREVIATION.search(text, max(0, cut - 16), cut):
+        return True
+    return resume < len(text) and text[resume].islower()
+
+
+def claim_sentences(text: str) -> List[Tuple[int, int]]:
+    """``split_claim_sentences``, memoized across requests"""
+    return memoized_spans(text, split_claim_sentences)
+
+
+def claim_texts(claims: Any) -> List[str]:
+    """All string values of a claims payload, split into sentences"""
+    texts = []
+    stack = [claims]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            texts.extend(value[s:e] for s, e in claim_sentences(value))
+        elif isinstance(value, dict):
+            stack.extend(reversed(list(value.values())))
+        elif isinstance(value, (list, tuple)):
+            stack.extend(reversed(value))
+    return texts
+
+
+class SourceIndex:
+    """
+    Sentence segmentation, BM25 index and embedding matrix for one source
+
+    Embeddings are stored L2-normalised in ``embedding_dtype`` (float16
+    halves the footprint at negligible ranking cost). Long sources may get
+    an IVF index over the embeddings (``build_ann``) so that searches only
+    score part of them.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        spans: np.ndarray,
+        postings: Dict[str, Tuple[np.ndarray, np.ndarray]],
+        doc_lengths: np.ndarray,
+        embeddings: Optional[np.ndarray] = None,
+    ):
+        self.text = text
+        self.spans = spans
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        self.embeddings = embeddings
+        self.ann: Optional[IVFIndex] = None
+        self.ann_lexical_candidates = 0
+
+    @classmethod
+    def build(
+        cls,
+        text: str,
+        encoder=None,
+        embedding_dtype: str = "float16",
+        window_chars: int = 200_000,
+        max_resident_bytes: int = 0,
+        spill_dir: Optional[str] = None,
+    ) -> "SourceIndex":
+        builder = SourceIndexBuilder(
+            encoder, embedding_dtype, window_chars, max_resident_bytes, spill_dir
+        )
+        builder.feed(text, keep=False)
+        return builder.finish(text)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def sentence(self, i: int) -> str:
+        start, end = self.spans[i]
+        return self.text[start:end]
+
+    def bm25_scores(
+        self,
+        query: str,
+        n_docs: Optional[int] = None,
+        doc_freqs: Optional[Dict[str, int]] = None,
+        avg_length: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Raw BM25 score of every sentence for ``query``
+
+        ``n_docs``, ``doc_freqs`` (per query term) and ``avg_length`` are
+        this index's own by default; those of a collection of indexes make
+        the scores comparable across its indexes.
+        """
+        scores = np.zeros(len(self), dtype=np.float32)
+        if not len(self):
+            return scores
+        if n_docs is None:
+            n_docs = len(self)
+        if avg_length is None:
+            avg_length = self.avg_length
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            docs, tf = posting
+            df = doc_freqs[term] if doc_freqs is not None else len(docs)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[docs] / avg_length)
+            scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        query_embedding: Optional[np.ndarray] = None,
+        alpha: float = 0.5,
+        bm25: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Hybrid BM25 + cosine search over source sentences
+
+        Returns up to ``top_k`` (sentence index, score) pairs, best first.
+        BM25 is max-normalised and blended with cosine similarity by
+        ``alpha`` when embeddings are available. ``bm25`` replaces this
+        index's normalised BM25 scores (see ``corpus.select_across``).
+        """
+        if not len(self):
+            return []
+        if bm25 is not None:
+            scores = bm25
+        else:
+            scores = self.bm25_scores(query)
+            peak = scores.max()
+            if peak > 0:
+                scores /= peak
+        if self.embeddings is not None and query_embedding is not None:
+            if self.ann is not None:
+                return self._approximate_search(scores, top_k, query_embedding, alpha)
+            cosine = self.cosine_scores(query_embedding)
+            scores = alpha * scores + (1 - alpha) * np.clip(cosine, 0.0, 1.0)
+        return [(int(i), float(scores[i])) for i in _top_k(scores, top_k)]
+
+    def _approximate_search(
+        self, bm25: np.ndarray, top_k: int, query_embedding: np.ndarray, alpha: float
+    ) -> List[Tuple[int, float]]:
+        """
+        ``search`` over the sentences of the probed IVF clusters and the
+        ``ann_lexical_candidates`` best BM25 matches; other sentences are
+        not scored
+        """
+        candidates = self.ann.candidates(query_embedding)
+        lexical = np.flatnonzero(bm25)
+        limit = self.ann_lexical_candidates
+        if len(lexical) > limit:
+            lexical = lexical[np.argpartition(-bm25[lexical], limit - 1)[:limit]] if limit else lexical[:0]
+        candidates = np.union1d(candidates, lexical)
+        if not len(candidates):
+            return []
+        cosine = np.asarray(self.embeddings[candidates], dtype=np.float32) @ query_embedding.astype(np.float32)
+        scores = alpha * bm25[candidates] + (1 - alpha) * np.clip(cosine, 0.0, 1.0)
+        return [(int(candidates[i]), float(scores[i])) for i in _top_k(scores, top_k)]
+
+    def build_ann(
+        self, nlist: int = 0, nprobe: int = 8, iterations: int = 10, lexical_candidates: int = 256
+    ):
+        """
+        Add an IVF index over the embeddings (see ``api.ann``)
+
+        Searches then score the sentences of the ``nprobe`` clusters
+        nearest to the query plus the ``lexical_candidates`` best BM25
+        matches, instead of every sentence.
+        """
+        if self.embeddings is None or not len(self):
+            return
+        self.ann = IVFIndex.build(self.embeddings, nlist, nprobe, iterations)
+        self.ann_lexical_candidates = lexical_candidates
+
+    def cosine_scores(self, query_embedding: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every sentence to the query, a block of rows at a time"""
+        query = query_embedding.astype(np.float32)
+        scores = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), COSINE_BLOCK_ROWS):
+            block = self.embeddings[start:start + COSINE_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query
+        return scores
+
+    def select(
+        self,
+        queries: List[str],
+        top_k: int,
+        context: int = 1,
+        encoder=None,
+    ) -> List[int]:
+        """
+        Sentences relevant to any query, plus ``context`` neighbours each side
+
+        Returned in document order.
+        """
+        query_embeddings = None
+        if encoder is not None and self.embeddings is not None and queries:
+            query_embeddings = encode_claims(encoder, queries)
+
+        selected = set()
+        for q, query in enumerate(queries):
+            query_embedding = query_embeddings[q] if query_embeddings is not None else None
+            for i, _ in self.search(query, top_k, query_embedding):
+                selected.update(range(max(0, i - context), min(len(self), i + context + 1)))
+        return sorted(selected)
+
+    def excerpt(self, sentence_ids: Iterable[int]) -> str:
+        """Source text restricted to the given sentences, in document order"""
+        return " ".join(self.sentence(i) for i in sentence_ids)
+
+    @property
+    def spilled(self) -> bool:
+        """Whether the embeddings live in a memory-mapped file rather than in memory"""
+        return isinstance(self.embeddings, np.memmap)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate resident size of the index (spilled embeddings not counted)"""
+        size = sys.getsizeof(self.text) + self.spans.nbytes + self.doc_lengths.nbytes
+        for term, (docs, tf) in self.postings.items():
+            # array payloads plus per-term object overhead
+            size += docs.nbytes + tf.nbytes + sys.getsizeof(term) + 200
+        if self.embeddings is not None and not self.spilled:
+            size += self.embeddings.nbytes
+        if self.ann is not None:
+            size += self.ann.nbytes
+        return size
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sentences": len(self),
+            "terms": len(self.postings),
+            "embeddings": None if self.embeddings is None else list(self.embeddings.shape),
+            "embeddings_spilled": self.spilled,
+            "ann": self.ann.stats() if self.ann is not None else None,
+            "bytes": self.nbytes,
+        }
+
+
+class SourceIndexBuilder:
+    """
+    Builds a ``SourceIndex`` from text fed in pieces
+
+    A sentence is committed once the text after it shows that its
+    separator is complete, so the spans are those of ``split_sentences``
+    on the whole text wherever the pieces are cut. Committed sentences are
+    tokenised and embedded ``window_chars`` characters at a time; postings
+    are kept in compact arrays between windows.
+
+    Embeddings are kept in memory up to ``max_resident_bytes`` (0 = no
+    limit). Beyond that all of them are written to an unlinked temporary
+    file in ``spill_dir`` and the finished index memory-maps it, leaving
+    residency to the page cache. The text fed is written to another such
+    file and only read back, once, by ``finish``.
+    """
+
+    def __init__(
+        self,
+        encoder=None,
+        embedding_dtype: str = "float16",
+        window_chars: int = 200_000,
+        max_resident_bytes: int = 0,
+        spill_dir: Optional[str] = None,
+    ):
+        self.encoder = encoder
+        self.embedding_dtype = np.dtype(embedding_dtype)
+        self.window_chars = max(1, window_chars)
+        self.max_resident_bytes = max_resident_bytes
+        self.spill_dir = spill_dir or None
+        self.chars = 0
+
+        # Temporary file with the text fed so far
+        self._text = None
+        # Text not yet split into committed sentences, and where it starts
+        self._pending = ""
+        self._pending_start = 0
+        self._scan_from = 0
+        self._window: List[Tuple[int, int]] = []
+        self._window_text: List[str] = []
+        self._window_chars = 0
+
+        self._sentences = 0
+        self._spans = array("q")
+        self._doc_lengths = array("f")
+        self._term_docs: Dict[str, array] = {}
+        self._term_freqs: Dict[str, array] = {}
+        self._embeddings: List[np.ndarray] = []
+        self._embedding_bytes = 0
+        self._embedding_rows = 0
+        self._embedding_dim = 0
+        self._spill = None
+
+    def feed(self, piece: str, keep: bool = True):
+        """
+        Add the next piece of the source text
+
+        ``keep=False`` leaves the piece out of the builder's copy of the
+        text, for callers that hold the whole text and pass it to ``finish``.
+        """
+        if not piece:
+            return
+        if keep:
+            if self._text is None:
+                self._text = tempfile.TemporaryFile(
+                    "w+", encoding="utf-8", newline="", dir=self.spill_dir
+                )
+            self._text.write(piece)
+        self.chars += len(piece)
+        self._pending += piece
+        pending = self._pending
+        cut = 0
+        for match in _SENTENCE_END.finditer(pending, self._scan_from):
+            if match.end() == len(pending):
+                # The separator may go on in the next piece
+                break
+            self._commit(pending, cut, match.start())
+            cut = match.end()
+        if cut:
+            self._pending = pending[cut:]
+            self._pending_start += cut
+        # Separators are whitespace, so the next one cannot start before
+        # the pending text's trailing whitespace
+        self._scan_from = len(self._pending.rstrip())
+
+    def _commit(self, text: str, start: int, end: int):
+        spans: List[Tuple[int, int]] = []
+        _append_span(text, start, end, spans)
+        for s, e in spans:
+            self._window.append((self._pending_start + s, self._pending_start + e))
+            self._window_text.append(text[s:e])
+            self._window_chars += e - s
+        if self._window_chars >= self.window_chars:
+            self._flush_window()
+
+    def _flush_window(self):
+        sentences = self._window_text
+        if not sentences:
+            return
+        base = self._sentences
+        for i, sentence in enumerate(sentences):
+            counts = Counter(tokenize(sentence))
+            self._doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                docs = self._term_docs.get(term)
+                if docs is None:
+                    docs = self._term_docs[term] = array("i")
+                    self._term_freqs[term] = array("f")
+                docs.append(base + i)
+                self._term_freqs[term].append(tf)
+        for span in self._window:
+            self._spans.extend(span)
+        if self.encoder is not None:
+            self._store_embeddings(self.encoder.encode(sentences).astype(self.embedding_dtype))
+        self._sentences += len(sentences)
+        self._window, self._window_text, self._window_chars = [], [], 0
+
+    def _store_embeddings(self, block: np.ndarray):
+        self._embedding_rows += len(block)
+        self._embedding_dim = block.shape[1]
+        if self._spill is None and self.max_resident_bytes and (
+            self._embedding_bytes + block.nbytes > self.max_resident_bytes
+        ):
+            self._spill = tempfile.TemporaryFile(dir=self.spill_dir)
+            for resident in self._embeddings:
+                self._spill.write(resident.tobytes())
+            self._embeddings, self._embedding_bytes = [], 0
+        if self._spill is not None:
+            self._spill.write(np.ascontiguousarray(block).tobytes())
+        else:
+            self._embeddings.append(block)
+            self._embedding_bytes += block.nbytes
+
+    def finish(self, text: Optional[str] = None) -> SourceIndex:
+        """
+        Index of all the text fed so far
+
+        ``text`` is that text when the caller holds it; otherwise the
+        pieces kept by ``feed`` are read back.
+        """
+        self._commit(self._pending, 0, len(self._pending))
+        self._pending, self._pending_start = "", self.chars
+        self._flush_window()
+
+        embeddings = None
+        if self._spill is not None:
+            self._spill.flush()
+            embeddings = np.memmap(
+                self._spill, dtype=self.embedding_dtype, mode="r",
+                shape=(self._embedding_rows, self._embedding_dim),
+            )
+            self._spill.close()
+        elif self._embeddings:
+            embeddings = np.concatenate(self._embeddings)
+
+        if text is None:
+            text = ""
+            if self._text is not None:
+                self._text.seek(0)
+                text = self._text.read()
+        if self._text is not None:
+            self._text.close()
+            self._text = None
+        postings = {
+            term: (
+                np.frombuffer(docs, dtype=np.int32),
+                np.frombuffer(self._term_freqs[term], dtype=np.float32),
+            )
+            for term, docs in self._term_docs.items()
+        }
+        return SourceIndex(
+            text,
+            np.frombuffer(self._spans, dtype=np.int64).reshape(-1, 2),
+            postings,
+            np.frombuffer(self._doc_lengths, dtype=np.float32),
+            embeddings,
+        )
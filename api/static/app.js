@@ -9,6 +9,8 @@ function validatorApp() {
         loading: false,
         results: null,
         error: null,
+        // Re-validating within a session only re-runs the claims that changed
+        sessionId: Date.now().toString(36) + Math.random().toString(36).slice(2),
 
         async init() {
             // Load default schema and policies
@@ -44,17 +46,19 @@ function validatorApp() {
                     claimsObj = { "body": this.claims.trim() };
                 }
 
-                // Make API request
-                const response = await fetch('/api/v1/validate', {
+                // Stream results so claims show up as soon as they are final
+                const response = await fetch('/api/v1/validate/stream', {
                     method: 'POST',
                     headers: {
-                        'Content-Type': 'application/json'
+                        'Content-Type': 'application/json',
+                        'Accept': 'application/x-ndjson'
                     },
                     body: JSON.stringify({
                         source_text: this.sourceText,
                         claims: claimsObj,
                         schema: schemaObj,
-                        policies: policiesObj
+                        policies: policiesObj,
+                        session_id: this.sessionId
                     })
                 });
 
@@ -63,7 +67,14 @@ function validatorApp() {
                     throw new Error(errorData.detail || 'Validation failed');
                 }
 
-                this.results = await response.json();
+                this.results = {
+                    overall_score: 0,
+                    supported_count: 0,
+                    refuted_count: 0,
+                    insufficient_count: 0,
+                    dispositions: []
+                };
+                await this.readStream(response);
             } catch (err) {
                 this.error = err.message;
                 console.error('Validation error:', err);
@@ -72,6 +83,38 @@ function validatorApp() {
             }
         },
 
+        async readStream(response) {
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                for (const line of lines) {
+                    if (line.trim()) this.handleEvent(JSON.parse(line));
+                }
+            }
+            if (buffer.trim()) this.handleEvent(JSON.parse(buffer));
+        },
+
+        handleEvent({ event, data }) {
+            if (event === 'disposition') {
+                this.results.dispositions.push(data);
+                if (data.verdict === 'supported') this.results.supported_count++;
+                else if (data.verdict === 'refuted') this.results.refuted_count++;
+                else this.results.insufficient_count++;
+            } else if (event === 'summary') {
+                Object.assign(this.results, data);
+            } else if (event === 'error') {
+                throw new Error(data.detail || 'Validation failed');
+            }
+        },
+
         getScoreClass(score) {
             if (!score) return 'low';
             if (score >= 0.7) return 'high';
@@ -0,0 +1,659 @@
+"""
+Validation service
+
+Runs the sourcecheck library and converts its reports into response dicts
+shaped like ``ValidationResponse``.
+Everything here is synchronous and meant to be called from the validation
+executor, never directly from the event loop. Functions are module-level so
+they can also be shipped to a process pool.
+"""
+import copy
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from api.cascade import (
+    VoteTally,
+    cascade_order,
+    cascade_validators,
+    claim_key,
+    compose_disposition,
+    cost_model,
+    score_settled,
+    step_policies,
+    validator_name,
+    validator_weights,
+    without_cascade,
+)
+from api.checker_pool import CheckerPool, config_fingerprint
+from api.config import settings
+from api.embeddings import get_encoder
+from api.executor import ValidationExecutor
+from api.metrics import stage
+from api.models import DEFAULT_MAX_EVIDENCE
+from api.source_cache import SourceCache
+from api.source_index import SourceIndex, SourceIndexBuilder, claim_sentences, claim_texts
+
+# Import sourcecheck library
+try:
+    from sourcecheck import Checker
+    SOURCECHECK_AVAILABLE = True
+except ImportError:
+    SOURCECHECK_AVAILABLE = False
+    Checker = None
+
+logger = logging.getLogger(__name__)
+
+
+def _build_checker(schema, policies):
+    """Create a Checker for one schema/policies configuration"""
+    return Checker(
+        schema=schema,
+        policies=without_cascade(policies),
+        debug=True  # Enable debug logging
+    )
+
+
+# Both pools below share checker_pool_memory_mb: the cascade pool's slice
+# (at most half of it) is taken out of the main pool's budget
+_cascade_memory_mb = min(settings.cascade_checker_pool_memory_mb, settings.checker_pool_memory_mb / 2)
+
+# Warm checkers keyed by schema/policies fingerprint (one pool per process)
+checker_pool = CheckerPool(
+    _build_checker,
+    max_size=settings.checker_pool_size,
+    max_memory_mb=settings.checker_pool_memory_mb - _cascade_memory_mb,
+    estimated_mb=settings.checker_estimated_mb,
+)
+
+# Single-validator checkers for the steps of validator cascades (see
+# api.cascade), kept apart so they never evict full configurations from
+# checker_pool
+cascade_pool = CheckerPool(
+    _build_checker,
+    max_size=settings.cascade_checker_pool_size,
+    max_memory_mb=_cascade_memory_mb,
+)
+
+# Retrieval artefacts of recently used sources (one cache per process)
+source_cache = SourceCache(
+    max_entries=settings.source_cache_max_entries,
+    max_bytes=settings.source_cache_max_mb * 1024 * 1024,
+)
+
+
+def _init_worker():
+    """Process pool initializer: warm this worker's checker pool"""
+    from api.warmup import warm_up_defaults
+    warm_up_defaults()
+
+
+# Worker pool for blocking validation work
+executor = ValidationExecutor(
+    kind=settings.executor_kind,
+    max_workers=settings.executor_workers,
+    max_queue=settings.executor_max_queue,
+    initializer=(
+        _init_worker
+        if settings.executor_kind == "process" and settings.warmup_enabled
+        else None
+    ),
+)
+
+
+def _optional_float(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def build_response(report, max_evidence: Optional[int] = DEFAULT_MAX_EVIDENCE) -> Dict[str, Any]:
+    """
+    Convert a sourcecheck report into a response dict
+
+    The dict has the shape of ``ValidationResponse`` and is encoded as is
+    (see ``api.serialization``), so no Pydantic objects are built per claim.
+    Only the top ``max_evidence`` evidence spans of each claim are
+    materialised (all of them for None, none for 0).
+    """
+    dispositions = [
+        {
+            "field": d.claim.field,
+            "claim_text": d.claim.text,
+            "verdict": d.verdict,
+            "evidence_count": int(d.evidence_count),
+            "validator": d.validator,
+            "explanation": d.explanation,
+            "score": _optional_float(d.confidence),  # Semantic/validator confidence score
+            "quality_score": _optional_float(d.quality_score),
+            "quality_issues": [
+                {
+                    "type": issue.type,
+                    "severity": issue.severity,
+                    "detail": issue.detail,
+                    "suggestion": issue.suggestion
+                }
+                for issue in d.quality_issues
+            ],
+            "evidence": [
+                {
+                    "text": ev.text,
+                    "score": float(ev.score)
+                }
+                for ev in (d.evidence[:max_evidence] if d.evidence and max_evidence != 0 else [])
+            ],
+            "skipped_validators": [],
+        }
+        for d in report.dispositions
+    ]
+
+    return {
+        "overall_score": float(report.overall_score),
+        "total_claims": int(report.total_claims),
+        "supported_count": int(report.supported_count),
+        "refuted_count": int(report.refuted_count),
+        "insufficient_count": int(report.insufficient_count),
+        "support_rate": float(report.support_rate),
+        "dispositions": dispositions,
+        "cascade": None,
+    }
+
+
+def source_index_builder() -> SourceIndexBuilder:
+    """Builder of a source index with the configured windows and memory cap"""
+    return SourceIndexBuilder(
+        encoder=get_encoder(),
+        embedding_dtype=settings.source_embedding_dtype,
+        window_chars=settings.source_index_window_chars,
+        max_resident_bytes=settings.source_index_max_resident_mb * 1024 * 1024,
+        spill_dir=settings.source_index_spill_dir,
+    )
+
+
+def finish_source_index(builder: SourceIndexBuilder, text: Optional[str] = None) -> SourceIndex:
+    """Index of a builder's text, with an ANN index when it has ``ann_min_sentences``"""
+    index = builder.finish(text)
+    if settings.ann_enabled and len(index) >= settings.ann_min_sentences:
+        index.build_ann(
+            nlist=settings.ann_nlist,
+            nprobe=settings.ann_nprobe,
+            iterations=settings.ann_train_iterations,
+            lexical_candidates=settings.ann_lexical_candidates,
+        )
+    return index
+
+
+def build_source_index(text: str) -> SourceIndex:
+    """Sentence split, BM25-index and embed a source document"""
+    builder = source_index_builder()
+    builder.feed(text, keep=False)
+    return finish_source_index(builder, text)
+
+
+def index_source(text: str) -> Dict[str, Any]:
+    """Build (or reuse) the cached retrieval index of a source; returns its stats"""
+    return source_cache.get_or_build(text, build_source_index).stats()
+
+
+def narrows_source(chars: int) -> bool:
+    """Whether a source of ``chars`` characters is narrowed before validation"""
+    min_chars = settings.source_prefilter_min_chars
+    return bool(min_chars) and chars >= min_chars
+
+
+def splits_claims(source_chars: int) -> bool:
+    """
+    Whether claims against a source of ``source_chars`` characters may be
+    validated in separate groups
+
+    Each group is its own checker call, and the library indexes its source
+    on every call. Narrowed sources are split, since each group then gets
+    a short excerpt cut from the one cached index.
+    """
+    limit = settings.claims_split_max_source_chars
+    return not limit or source_chars <= limit or narrows_source(source_chars)
+
+
+def prepare_source(source_text: str, claims: Dict[str, Any]) -> str:
+    """
+    Source text to hand to the checker
+
+    Sources of at least ``source_prefilter_min_chars`` characters are
+    narrowed to the sentences most relevant to the claims (plus neighbours)
+    using the cached index, so the checker only indexes and scores those
+    passages. Shorter sources are passed through unchanged.
+    """
+    if not narrows_source(len(source_text)):
+        return source_text
+    with stage("source_index"):
+        index = source_cache.get_or_build(source_text, build_source_index)
+    with stage("retrieval"):
+        selected = index.select(
+            claim_texts(claims),
+            top_k=settings.source_prefilter_top_k,
+            context=settings.source_prefilter_context,
+            encoder=get_encoder(),
+        )
+        return index.excerpt(selected)
+
+
+def _verify(
+    checker, source_text: str, claims: Dict[str, Any], max_evidence: Optional[int]
+) -> Dict[str, Any]:
+    transcript = prepare_source(source_text, claims)
+    with stage("verify"):
+        report = checker.verify_summary(transcript=transcript, summary=claims)
+    with stage("build_response"):
+        return build_response(report, max_evidence)
+
+
+def _step_request(
+    schema: Dict[str, Any], units: List[Tuple[str, str, Any]]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    ``group_request`` with every claim of a ``sentence_split`` field ending
+    a sentence, so claims joined into one text are split apart again
+    """
+    fields = schema.get("fields") or {}
+
+    def terminated(field: str, value: Any) -> Any:
+        if (fields[field] or {}).get("extraction_method") != "sentence_split":
+            return value
+        value = str(value).rstrip()
+        return value if value.endswith((".", "!", "?")) else value + "."
+
+    return group_request(schema, [(field, path, terminated(field, value)) for field, path, value in units])
+
+
+def _run_step(
+    schema: Dict[str, Any],
+    policies: Dict[str, Any],
+    name: str,
+    units: List[Tuple[str, str, Any]],
+    transcript: str,
+    max_evidence: Optional[int],
+    cost_key: str,
+) -> List[Dict[str, Any]]:
+    """Dispositions of ``units`` under validator ``name`` alone"""
+    step_schema, step_claims = _step_request(schema, units)
+    keep = {field: [name] for field, _, _ in units}
+    step_checker = cascade_pool.get(step_schema, step_policies(policies, keep))
+    start = time.process_time()
+    report = step_checker.verify_summary(transcript=transcript, summary=step_claims)
+    dispositions = build_response(report, max_evidence)["dispositions"]
+    cost_model.observe(f"{cost_key}:{name}", time.process_time() - start, len(dispositions))
+    return dispositions
+
+
+def _verify_cascade(
+    schema: Dict[str, Any],
+    policies: Dict[str, Any],
+    first: List[str],
+    checker,
+    source_text: str,
+    claims: Dict[str, Any],
+    max_evidence: Optional[int],
+) -> Dict[str, Any]:
+    """
+    Validate with the early-exit cascade configured in ``policies``
+
+    Each field's validators run one at a time (``cascade_order``: the
+    ``first`` ones, then the rest) on the claims still open, one checker
+    call per validator and step, until every claim's weighted vote is
+    decided. The first step's dispositions are the claim list later steps
+    follow, so the claims are the library's own (compound splitting,
+    minimum length). Decided claims are composed from their step results
+    (``compose_disposition``): no validator runs twice for a claim. Fields
+    without configured validators, and claims a later step no longer
+    returns as one claim (the library split them differently), are
+    validated with all validators, by ``checker`` when that is every
+    field and else by a checker for the fields concerned.
+    """
+    units = claim_units(schema, claims)
+    if not units:
+        return _verify(checker, source_text, claims, max_evidence)
+    transcript = prepare_source(source_text, claims)
+    cpu_start = time.process_time()
+    cost_key = config_fingerprint(schema, policies)
+
+    weights = validator_weights(policies)
+    configured = {
+        field: [validator_name(entry) for entry in entries or []]
+        for field, entries in (policies.get("validators") or {}).items()
+    }
+    order = {field: cascade_order(first, names) for field, names in configured.items()}
+    paths = {field: path for field, path, _ in units}
+    full_units = [unit for unit in units if not order.get(unit[0])]
+
+    # One entry per library claim: (field, path, text) and its step runs
+    cascade_units: List[Tuple[str, str, Any]] = []
+    runs: List[List[Tuple[str, Dict[str, Any]]]] = []
+    verdicts: Dict[int, str] = {}
+    mismatched: List[int] = []
+
+    def decide(i: int):
+        field = cascade_units[i][0]
+        tally = VoteTally()
+        for name, d in runs[i]:
+            tally.add(d["verdict"], weights.get(name, 1.0))
+        ran = {name for name, _ in runs[i]}
+        remaining = sum(weights.get(name, 1.0) for name in order[field] if name not in ran)
+        verdict = tally.decided(remaining)
+        if verdict is not None and score_settled(runs[i], verdict, weights, remaining, policies):
+            verdicts[i] = verdict
+
+    with stage("verify"):
+        step_units = [unit for unit in units if order.get(unit[0])]
+        for name in dict.fromkeys(order[field][0] for field, _, _ in step_units):
+            group = [unit for unit in step_units if order[unit[0]][0] == name]
+            for d in _run_step(schema, policies, name, group, transcript, max_evidence, cost_key):
+                cascade_units.append((d["field"], paths[d["field"]], d["claim_text"]))
+                runs.append([(name, d)])
+                decide(len(runs) - 1)
+
+        step = 1
+        open_units = [i for i in range(len(cascade_units)) if i not in verdicts]
+        while open_units:
+            by_name: Dict[str, List[int]] = {}
+            for i in open_units:
+                by_name.setdefault(order[cascade_units[i][0]][step], []).append(i)
+            for name, group in by_name.items():
+                found: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+                for d in _run_step(
+                    schema, policies, name, [cascade_units[i] for i in group],
+                    transcript, max_evidence, cost_key,
+                ):
+                    found.setdefault((d["field"], claim_key(d["claim_text"])), []).append(d)
+                for i in group:
+                    matches = found.get((cascade_units[i][0], claim_key(cascade_units[i][2])))
+                    if matches:
+                        runs[i].append((name, matches.pop(0)))
+                        decide(i)
+                    else:
+                        mismatched.append(i)
+            open_units = [i for i in open_units if i not in verdicts and i not in mismatched]
+            step += 1
+
+        if mismatched:
+            logger.warning(
+                "Cascade: %d claim(s) were split differently when re-submitted; "
+                "validating them with the full configuration", len(mismatched)
+            )
+        composed = []
+        decided_early = 0
+        skipped_runs = 0
+        saved: Optional[float] = 0.0
+        for i, verdict in verdicts.items():
+            field = cascade_units[i][0]
+            ran = [name for name, _ in runs[i]]
+            d = compose_disposition(runs[i], verdict, weights, policies)
+            d["skipped_validators"] = [name for name in configured[field] if name not in ran]
+            skipped_runs += len(d["skipped_validators"])
+            decided_early += bool(d["skipped_validators"])
+            for name in d["skipped_validators"]:
+                per_claim = cost_model.per_claim(f"{cost_key}:{name}")
+                saved = None if saved is None or per_claim is None else saved + per_claim
+            composed.append((i, d))
+        parts = [summarize([d for _, d in sorted(composed, key=lambda item: item[0])], policies)]
+
+        full_units += [cascade_units[i] for i in mismatched]
+        if full_units:
+            full_schema, full_claims = _step_request(schema, full_units)
+            if list(full_schema["fields"]) != list(schema.get("fields") or {}):
+                checker = cascade_pool.get(full_schema, policies)
+            parts.append(build_response(
+                checker.verify_summary(transcript=transcript, summary=full_claims),
+                max_evidence,
+            ))
+
+    response = merge_responses(parts)
+    field_order = {name: n for n, name in enumerate(schema.get("fields") or {})}
+    response["dispositions"].sort(key=lambda d: field_order.get(d["field"], len(field_order)))
+    response["cascade"] = {
+        "claims_decided_early": decided_early,
+        "claims_fully_validated": len(response["dispositions"]) - decided_early,
+        "validator_runs_skipped": skipped_runs,
+        "cpu_ms": (time.process_time() - cpu_start) * 1000,
+        "estimated_cpu_saved_ms": saved * 1000 if saved is not None else None,
+    }
+    return response
+
+
+def _validate(
+    schema: Dict[str, Any],
+    policies: Dict[str, Any],
+    checker,
+    source_text: str,
+    claims: Dict[str, Any],
+    max_evidence: Optional[int],
+) -> Dict[str, Any]:
+    first = cascade_validators(policies)
+    if first:
+        return _verify_cascade(
+            schema, policies, first, checker, source_text, claims, max_evidence
+        )
+    return _verify(checker, source_text, claims, max_evidence)
+
+
+def run_validation(
+    schema: Dict[str, Any],
+    policies: Dict[str, Any],
+    source_text: str,
+    claims: Dict[str, Any],
+    max_evidence: Optional[int] = DEFAULT_MAX_EVIDENCE,
+) -> Dict[str, Any]:
+    """
+    Validate claims against source text with a pooled checker
+
+    Records the ``checker``, ``source_index``, ``retrieval``, ``verify`` and
+    ``build_response`` stages (see ``api.metrics``). Claim extraction,
+    evidence retrieval and the validators all run inside ``verify``.
+    Each disposition keeps its top ``max_evidence`` evidence spans (None
+    for all, 0 for none).
+    Policies with ``aggregation.cascade`` and no quality analysis are
+    validated through the early-exit cascade (see ``api.cascade``).
+    """
+    with stage("checker"):
+        checker = checker_pool.get(schema, policies)
+    return _validate(schema, policies, checker, source_text, claims, max_evidence)
+
+
+def run_validation_batch(
+    schema: Dict[str, Any],
+    policies: Dict[str, Any],
+    items: List[Tuple[str, Dict[str, Any]]],
+    max_evidence: Optional[int] = DEFAULT_MAX_EVIDENCE,
+) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Validate several (source_text, claims) pairs with one pooled checker
+
+    The items share one executor task and checker lookup, but each is its
+    own ``verify_summary`` call. Returns one ``(response, error)`` pair per
+    item; a failing item does not stop the rest.
+    """
+    with stage("checker"):
+        checker = checker_pool.get(schema, policies)
+    results = []
+    for source_text, claims in items:
+        try:
+            results.append((
+                _validate(schema, policies, checker, source_text, claims, max_evidence), None
+            ))
+        except Exception as e:
+            results.append((None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def partition_schema(schema: Dict[str, Any], max_parts: int) -> List[Dict[str, Any]]:
+    """
+    Split a schema into at most ``max_parts`` schemas over disjoint field groups
+
+    Each part validates only its own fields, so the parts can run
+    independently and report as soon as they finish. A schema with a single
+    field (like the default free-text schema) is returned unchanged.
+    """
+    fields = schema.get("fields") or {}
+    n_parts = min(max(1, max_parts), len(fields))
+    if n_parts <= 1:
+        return [schema]
+
+    names = list(fields)
+    parts = []
+    for i in range(n_parts):
+        part = copy.deepcopy(schema)
+        part["fields"] = {name: fields[name] for name in names[i::n_parts]}
+        parts.append(part)
+    return parts
+
+
+def split_claims(
+    schema: Dict[str, Any],
+    claims: Dict[str, Any],
+    max_claims: int,
+) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Split a request into ``(schema, claims)`` groups of at most ``max_claims`` claims
+
+    Text fields extracted with ``sentence_split`` are divided at sentence
+    boundaries; any other field counts as one claim and stays whole. Each
+    group's schema keeps only the fields present in that group, so the
+    groups validate disjoint claims and can run independently. Requests
+    whose fields are not plain top-level keys of ``claims`` are returned
+    as a single group.
+    """
+    units = claim_units(schema, claims)
+    if units is None or len(units) <= max(1, max_claims):
+        return [(schema, claims)]
+    return [
+        group_request(schema, units[i:i + max_claims])
+        for i in range(0, len(units), max_claims)
+    ]
+
+
+def claim_groups(
+    schema: Dict[str, Any],
+    claims: Dict[str, Any],
+    max_parts: int,
+) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Split a request into at most ``max_parts`` ``(schema, claims)`` groups
+    (streamed dispositions, job progress)
+
+    Claims are divided as by ``split_claims`` (so a single free-text field
+    is split at sentence boundaries) into groups as even as possible.
+    Requests ``split_claims`` cannot divide fall back to
+    ``partition_schema``'s field groups.
+    """
+    units = claim_units(schema, claims)
+    if units is None:
+        return [(part, claims) for part in partition_schema(schema, max_parts)]
+    size = -(-len(units) // max(1, max_parts))
+    return split_claims(schema, claims, size)
+
+
+def claim_units(
+    schema: Dict[str, Any], claims: Dict[str, Any]
+) -> Optional[List[Tuple[str, str, Any]]]:
+    """
+    ``(field, path, claim)`` for every claim of a request, in order
+
+    Fields using ``sentence_split`` give one unit per sentence. None when
+    a field is not a plain top-level key of ``claims``.
+    """
+    units = []
+    for name, spec in (schema.get("fields") or {}).items():
+        path = (spec or {}).get("path", name)
+        if path not in claims:
+            return None
+        value = claims[path]
+        if (spec or {}).get("extraction_method") == "sentence_split" and isinstance(value, str):
+            units.extend((name, path, value[s:e]) for s, e in claim_sentences(value))
+        else:
+            units.append((name, path, value))
+    return units
+
+
+def group_request(
+    schema: Dict[str, Any], units: List[Tuple[str, str, Any]]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Schema and claims validating just ``units``"""
+    fields = schema.get("fields") or {}
+    group_claims: Dict[str, Any] = {}
+    names: List[str] = []
+    for name, path, value in units:
+        if path in group_claims:
+            group_claims[path] += " " + value
+        else:
+            group_claims[path] = value
+        if name not in names:
+            names.append(name)
+    group_schema = copy.deepcopy(schema)
+    group_schema["fields"] = {name: fields[name] for name in names}
+    return group_schema, group_claims
+
+
+def merge_responses(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine responses for disjoint claim sets into one
+
+    Counts are summed and ``overall_score`` is the claim-weighted mean of the
+    parts, which equals the whole-request score because sourcecheck scores
+    are per-claim averages.
+    """
+    total = sum(p["total_claims"] for p in parts)
+    supported = sum(p["supported_count"] for p in parts)
+    cascades = [p["cascade"] for p in parts if p.get("cascade") is not None]
+    return {
+        "overall_score": (
+            sum(p["overall_score"] * p["total_claims"] for p in parts) / total if total else 0.0
+        ),
+        "total_claims": total,
+        "supported_count": supported,
+        "refuted_count": sum(p["refuted_count"] for p in parts),
+        "insufficient_count": sum(p["insufficient_count"] for p in parts),
+        "support_rate": supported / total if total else 0.0,
+        "dispositions": [d for p in parts for d in p["dispositions"]],
+        "cascade": _merge_cascades(cascades) if cascades else None,
+    }
+
+
+def summarize(
+    dispositions: List[Dict[str, Any]],
+    policies: Dict[str, Any],
+    cascade: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Response for ``dispositions`` with the aggregates recomputed
+
+    Follows ``scoring.method`` in ``policies``: ``simple`` scores the share
+    of supported claims, ``quality_weighted`` counts each supported claim
+    with its quality_score (1.0 when it has none).
+    """
+    total = len(dispositions)
+    supported = [d for d in dispositions if d["verdict"] == "supported"]
+    refuted = sum(1 for d in dispositions if d["verdict"] == "refuted")
+    method = (policies.get("scoring") or {}).get("method", "simple")
+    if method == "quality_weighted":
+        points = sum(
+            d["quality_score"] if d["quality_score"] is not None else 1.0 for d in supported
+        )
+    else:
+        points = len(supported)
+    return {
+        "overall_score": points / total if total else 0.0,
+        "total_claims": total,
+        "supported_count": len(supported),
+        "refuted_count": refuted,
+        "insufficient_count": total - len(supported) - refuted,
+        "support_rate": len(supported) / total if total else 0.0,
+        "dispositions": dispositions,
+        "cascade": cascade,
+    }
+
+
+def _merge_cascades(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    saved = [r["estimated_cpu_saved_ms"] for r in reports]
+    merged = {
+        key: sum(r[key] for r in reports)
+        for key in ("claims_decided_early", "claims_fully_validated", "validator_runs_skipped", "cpu_ms")
+    }
+    merged["estimated_cpu_saved_ms"] = None if None in saved else sum(saved)
+    return merged
@@ -0,0 +1,103 @@
+"""
+Model warm-up
+
+Loads the models used by the default configuration and runs a dummy
+validation through them so the first real request does not pay the model
+load and first-inference cost.
+"""
+import copy
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import yaml
+
+from api.cascade import validator_name
+from api.config import settings
+from api.validation import _build_checker, checker_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS_DIR = Path(__file__).parent / "static" / "defaults"
+
+WARMUP_SOURCE = (
+    "Patient is a 56-year-old woman who reports chest pain for 2 days. "
+    "She denies fever or chills. She takes aspirin 81mg daily."
+)
+WARMUP_CLAIMS = {
+    "body": "56 female with chest pain for 3 days. No fever. Takes aspirin daily."
+}
+
+
+def load_default_configs() -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Load the schema and policies used for warm-up"""
+    schema_path = Path(settings.warmup_schema_path or DEFAULTS_DIR / "schema.yaml")
+    policies_path = Path(settings.warmup_policies_path or DEFAULTS_DIR / "policies.yaml")
+    with open(schema_path) as f:
+        schema = yaml.safe_load(f)
+    with open(policies_path) as f:
+        policies = yaml.safe_load(f)
+    return schema, policies
+
+
+def _single_validator_policies(policies: Dict[str, Any], field: str, entry: Any) -> Dict[str, Any]:
+    """Copy of ``policies`` that runs one validator on one field, without quality modules"""
+    single = copy.deepcopy(policies)
+    single["validators"] = {field: [copy.deepcopy(entry)]}
+    single["quality_modules"] = []
+    return single
+
+
+def warm_up(schema: Dict[str, Any], policies: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Load and exercise every model used by ``policies``
+
+    With ``warmup_profile_validators`` enabled each validator is first run
+    on its own, so its model load shows up as a separate timing. The full
+    configuration is then built through the checker pool (where real
+    requests will find it) and run once.
+
+    Returns load/warm-up time in milliseconds per step.
+    """
+    timings: Dict[str, float] = {}
+
+    if settings.warmup_profile_validators:
+        for field, entries in (policies.get("validators") or {}).items():
+            for entry in entries or []:
+                name = validator_name(entry)
+                if name in timings:
+                    continue
+                start = time.perf_counter()
+                checker = _build_checker(schema, _single_validator_policies(policies, field, entry))
+                checker.verify_summary(transcript=WARMUP_SOURCE, summary=WARMUP_CLAIMS)
+                timings[name] = (time.perf_counter() - start) * 1000
+                logger.info("Warmed %s in %.0f ms", name, timings[name])
+
+    start = time.perf_counter()
+    checker = checker_pool.get(schema, policies)
+    timings["checker"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    checker.verify_summary(transcript=WARMUP_SOURCE, summary=WARMUP_CLAIMS)
+    timings["warmup_validation"] = (time.perf_counter() - start) * 1000
+
+    logger.info(
+        "Models ready: checker %.0f ms, first validation %.0f ms",
+        timings["checker"], timings["warmup_validation"]
+    )
+    return timings
+
+
+# Timings of the warm-up already done in this process (process workers are
+# warmed by the pool initializer before the readiness job reaches them)
+_warmup_timings: Optional[Dict[str, float]] = None
+
+
+def warm_up_defaults() -> Dict[str, float]:
+    """Warm up the models used by the default schema and policies (once per process)"""
+    global _warmup_timings
+    if _warmup_timings is None:
+        schema, policies = load_default_configs()
+        _warmup_timings = warm_up(schema, policies)
+    return dict(_warmup_timings)
@@ -0,0 +1 @@
+"""Benchmarks for the SourceCheck API (run from the repository root)"""
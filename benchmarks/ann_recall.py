@@ -0,0 +1,198 @@
+"""
+Recall and latency of approximate (IVF) source retrieval versus exact search
+
+Builds the retrieval index of one long synthetic transcript, adds an IVF
+index (``api/ann.py``) and runs the claim sentences of synthetic summaries
+through ``SourceIndex.search`` with and without it. For each ``nprobe``
+it reports:
+
+- recall@k: share of the exact top-k the approximate search matches
+  (results scoring at least the exact k-th score), for hybrid
+  (BM25 + cosine) and cosine-only ranking
+- search latency per query (p50/p95, milliseconds) and the speedup over
+  exact search
+- share of the source sentences scored per query
+
+    python -m benchmarks.ann_recall
+    python -m benchmarks.ann_recall --sentences 100000 --nprobe 2 4 8 16 --min-recall 0.9
+
+``--encoder hashing`` replaces the MiniLM encoder by a bag-of-words
+random projection, which needs no model and exercises the index (not the
+model's neighbourhoods). Exits non-zero when the hybrid recall at the
+largest ``nprobe`` is below ``--min-recall``. Results are also written as
+JSON (``--output``).
+"""
+import argparse
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from api.config import settings
+from api.embeddings import load_encoder
+from api.source_index import SourceIndex, claim_texts, tokenize
+from benchmarks.load import percentile
+from benchmarks.synthetic import make_summary, make_transcript
+
+
+class HashingEncoder:
+    """Sum of per-token random vectors, L2-normalised (no model needed)"""
+
+    model_name = "hashing"
+    backend = "hashing"
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self._vectors: Dict[str, np.ndarray] = {}
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vector = self._vectors.get(token)
+        if vector is None:
+            seed = int.from_bytes(hashlib.sha256(token.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            self._vectors[token] = vector
+        return vector
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for token in tokenize(text):
+                out[i] += self._token_vector(token)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-12)
+
+
+def _timed_searches(index: SourceIndex, queries: List[str], embeddings: np.ndarray,
+                    top_k: int, alpha: float):
+    results, latencies = [], []
+    for query, embedding in zip(queries, embeddings):
+        start = time.perf_counter()
+        found = index.search(query, top_k, embedding, alpha)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([score for _, score in found])
+    latencies.sort()
+    return results, latencies
+
+
+def _recall(exact: List[List[float]], approximate: List[List[float]]) -> float:
+    """
+    Share of the exact top-k matched by the approximate top-k
+
+    A result counts when it scores at least the exact k-th score: templated
+    transcripts repeat sentences, and any of several equal ones will do.
+    """
+    hits, total = 0, 0
+    for e, a in zip(exact, approximate):
+        if e:
+            hits += min(len(e), sum(score >= e[-1] - 1e-6 for score in a))
+            total += len(e)
+    return hits / total if total else 1.0
+
+
+def run(encoder, sentences: int, claims: int, top_k: int, nlist: int, nprobes: List[int],
+        iterations: int, lexical_candidates: int, seed: int) -> Dict[str, Any]:
+    transcript = make_transcript(sentences, seed)
+    start = time.perf_counter()
+    index = SourceIndex.build(" ".join(transcript), encoder=encoder, embedding_dtype="float16")
+    index_seconds = time.perf_counter() - start
+
+    queries = claim_texts({"body": " ".join(make_summary(transcript, claims, seed))})
+    query_embeddings = encoder.encode(queries)
+
+    exact = {}
+    for name, alpha in (("hybrid", 0.5), ("cosine", 0.0)):
+        exact[name] = _timed_searches(index, queries, query_embeddings, top_k, alpha)
+
+    index.build_ann(nlist, max(nprobes), iterations, lexical_candidates)
+    rows = []
+    for nprobe in nprobes:
+        index.ann.nprobe = nprobe
+        row: Dict[str, Any] = {"nprobe": nprobe}
+        for name, alpha in (("hybrid", 0.5), ("cosine", 0.0)):
+            found, latencies = _timed_searches(index, queries, query_embeddings, top_k, alpha)
+            exact_found, exact_latencies = exact[name]
+            row[name] = {
+                "recall": round(_recall(exact_found, found), 4),
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+                "speedup": round(
+                    percentile(exact_latencies, 50) / max(percentile(latencies, 50), 1e-9), 2
+                ),
+            }
+        scanned = [len(index.ann.candidates(e)) for e in query_embeddings]
+        row["scanned_share"] = round(float(np.mean(scanned)) / len(index), 4)
+        rows.append(row)
+
+    return {
+        "encoder": encoder.model_name,
+        "sentences": len(index),
+        "queries": len(queries),
+        "top_k": top_k,
+        "index_seconds": round(index_seconds, 2),
+        "ann": index.ann.stats(),
+        "exact": {
+            name: {
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+            }
+            for name, (_, latencies) in exact.items()
+        },
+        "results": rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--encoder", choices=("model", "hashing"), default="model",
+                        help="MiniLM (settings.embedding_model) or the model-free hashing encoder")
+    parser.add_argument("--sentences", type=int, default=50_000, help="Source sentences")
+    parser.add_argument("--claims", type=int, default=200, help="Summary claims (queries)")
+    parser.add_argument("--top-k", type=int, default=settings.source_prefilter_top_k)
+    parser.add_argument("--nlist", type=int, default=settings.ann_nlist,
+                        help="IVF clusters (default 0 = about 4 * sqrt(sentences))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--iterations", type=int, default=settings.ann_train_iterations)
+    parser.add_argument("--lexical-candidates", type=int, default=settings.ann_lexical_candidates)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-recall", type=float, default=0.0,
+                        help="Lowest acceptable hybrid recall at the largest nprobe")
+    parser.add_argument("--output", default="ann_recall.json")
+    args = parser.parse_args()
+
+    if args.encoder == "hashing":
+        encoder = HashingEncoder()
+    else:
+        encoder = load_encoder(settings.embedding_model, settings.embedding_backend)
+        if encoder is None:
+            sys.exit("No encoder available; install sentence-transformers or use --encoder hashing")
+
+    result = run(
+        encoder, args.sentences, args.claims, args.top_k, args.nlist, sorted(args.nprobe),
+        args.iterations, args.lexical_candidates, args.seed,
+    )
+    Path(args.output).write_text(json.dumps(result, indent=2))
+
+    print(f"{result['sentences']} sentences, {result['queries']} queries, "
+          f"nlist {result['ann']['nlist']} (built in {result['ann']['build_ms']:.0f} ms); "
+          f"exact p50 hybrid {result['exact']['hybrid']['p50_ms']} ms, "
+          f"cosine {result['exact']['cosine']['p50_ms']} ms\n")
+    print("| nprobe | scanned | hybrid recall | hybrid p50 ms | speedup | cosine recall | cosine p50 ms | speedup |")
+    print("|---|---|---|---|---|---|---|---|")
+    for row in result["results"]:
+        hybrid, cosine = row["hybrid"], row["cosine"]
+        print(f"| {row['nprobe']} | {row['scanned_share']:.1%} | {hybrid['recall']:.3f} | "
+              f"{hybrid['p50_ms']} | {hybrid['speedup']}x | {cosine['recall']:.3f} | "
+              f"{cosine['p50_ms']} | {cosine['speedup']}x |")
+
+    recall = result["results"][-1]["hybrid"]["recall"]
+    if recall < args.min_recall:
+        print(f"\nHybrid recall {recall:.3f} below {args.min_recall}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
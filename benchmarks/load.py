@@ -0,0 +1,185 @@
+"""
+Concurrent load driver
+
+Sends requests through an ``httpx.AsyncClient`` with a fixed number of
+concurrent workers and records per-request latency, status codes and the
+peak resident memory of this process. The client either talks to a live
+server (``base_url``) or runs the app in-process through ``ASGITransport``
+so benchmarks need no network and no separate server.
+"""
+import asyncio
+import resource
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+from api.checker_pool import current_rss_mb
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (Linux reports KiB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@asynccontextmanager
+async def in_process_client(timeout: float = 600) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Client bound to the app running in this process
+
+    The app's lifespan (warm-up, job queue) is run around the client, and
+    the client waits until ``/health/ready`` reports the models loaded.
+    """
+    from api.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=timeout
+        ) as client:
+            await wait_ready(client, timeout)
+            yield client
+
+
+@asynccontextmanager
+async def remote_client(base_url: str, timeout: float = 600) -> AsyncIterator[httpx.AsyncClient]:
+    """Client for a server that is already running"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        await wait_ready(client, timeout)
+        yield client
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            response = await client.get("/health/ready")
+            if response.status_code == 200:
+                return
+            body = response.json()
+            if body.get("error"):
+                raise RuntimeError(f"Server warm-up failed: {body['error']}")
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Server not ready after {timeout:.0f}s")
+        await asyncio.sleep(0.2)
+
+
+async def _sample_rss(peak: List[float], interval: float = 0.05):
+    while True:
+        peak[0] = max(peak[0], current_rss_mb())
+        await asyncio.sleep(interval)
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    make_request: Callable[[int], Dict[str, Any]],
+    total: int,
+    concurrency: int,
+    measure_rss: bool = True,
+) -> Dict[str, Any]:
+    """
+    Send ``total`` requests with ``concurrency`` workers
+
+    ``make_request(i)`` returns keyword arguments for ``client.request``
+    (``method``, ``url``, ``json``, ...) for the i-th request. Returns
+    throughput, latency percentiles in milliseconds, status code counts and
+    the peak RSS of this process sampled while the load ran (None unless
+    ``measure_rss``; only meaningful when the app runs in-process).
+    """
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors: List[str] = []
+    counter = iter(range(total))
+    rss_peak = [current_rss_mb()]
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await client.request(**make_request(i))
+                await response.aread()
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+                if len(errors) < 5:
+                    errors.append(str(e))
+            elapsed = time.perf_counter() - start
+            statuses[status] = statuses.get(status, 0) + 1
+            if status.startswith("2"):
+                latencies.append(elapsed * 1000)
+
+    sampler = asyncio.create_task(_sample_rss(rss_peak)) if measure_rss else None
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
+    finally:
+        if sampler is not None:
+            sampler.cancel()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "succeeded": len(latencies),
+        "statuses": statuses,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+        "rss_peak_mb": round(rss_peak[0], 1) if measure_rss else None,
+    }
+
+
+async def fetch_stats(client: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+    """``/api/v1/stats``, or None if the server does not answer it"""
+    try:
+        response = await client.get("/api/v1/stats")
+        return response.json() if response.status_code == 200 else None
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+def _timing_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, float]:
+    count = after["count"] - before["count"]
+    total = after["avg_ms"] * after["count"] - before["avg_ms"] * before["count"]
+    return {"count": count, "avg_ms": round(total / count, 2) if count else 0.0}
+
+
+def server_stats(
+    before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Server-side executor and cache figures for the requests between two
+    ``/api/v1/stats`` snapshots
+    """
+    if not before or not after:
+        return {}
+    executor_before, executor_after = before["executor"], after["executor"]
+    stats = {
+        "queue_wait": _timing_delta(executor_before["queue_wait"], executor_after["queue_wait"]),
+        "execution": _timing_delta(executor_before["execution"], executor_after["execution"]),
+        "rejected": executor_after["rejected"] - executor_before["rejected"],
+    }
+    if before.get("result_cache") and after.get("result_cache"):
+        hits = after["result_cache"]["hits"] - before["result_cache"]["hits"]
+        misses = after["result_cache"]["misses"] - before["result_cache"]["misses"]
+        stats["result_cache_hit_rate"] = hits / (hits + misses) if hits + misses else 0.0
+    return stats
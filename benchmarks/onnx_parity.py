@@ -0,0 +1,127 @@
+"""
+Accuracy parity and speed of the ONNX embedding backend
+
+Encodes a synthetic corpus with the PyTorch encoder and with the exported
+ONNX model (``python -m api.onnx_export``) and reports:
+
+- cosine similarity between the two embeddings of each source sentence
+- agreement of the passages retrieval selects for the claims (Jaccard of
+  the selected sentence sets, and the share of identical selections)
+- sentences encoded per second by each backend and the speedup
+
+    python -m benchmarks.onnx_parity
+    python -m benchmarks.onnx_parity --cases 50 --min-agreement 0.97
+
+Exits non-zero when the mean selection agreement is below
+``--min-agreement``. Results are also written as JSON (``--output``).
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from api.config import settings
+from api.embeddings import load_encoder
+from api.source_index import SourceIndex, claim_texts
+from benchmarks.synthetic import make_case
+
+
+def _timed_build(text: str, encoder):
+    start = time.perf_counter()
+    index = SourceIndex.build(text, encoder=encoder, embedding_dtype="float32")
+    return index, time.perf_counter() - start
+
+
+def compare_backends(torch_encoder, onnx_encoder, cases: int, sentences: int, claims: int,
+                     top_k: int, context: int) -> Dict[str, Any]:
+    cosines: List[float] = []
+    jaccards: List[float] = []
+    identical = 0
+    encoded = 0
+    seconds = {"torch": 0.0, "onnx": 0.0}
+
+    for seed in range(cases):
+        source_text, case_claims = make_case(sentences, claims, seed=seed)
+        reference, torch_secs = _timed_build(source_text, torch_encoder)
+        candidate, onnx_secs = _timed_build(source_text, onnx_encoder)
+        seconds["torch"] += torch_secs
+        seconds["onnx"] += onnx_secs
+        encoded += len(reference)
+
+        # Both sides are L2-normalised, so the row-wise dot product is the cosine
+        cosines.extend(np.sum(reference.embeddings * candidate.embeddings, axis=1).tolist())
+
+        queries = claim_texts(case_claims)
+        expected = set(reference.select(queries, top_k, context, encoder=torch_encoder))
+        actual = set(candidate.select(queries, top_k, context, encoder=onnx_encoder))
+        union = expected | actual
+        jaccards.append(len(expected & actual) / len(union) if union else 1.0)
+        identical += expected == actual
+
+    cosines.sort()
+    return {
+        "cases": cases,
+        "sentences_encoded": encoded,
+        "cosine": {
+            "mean": round(float(np.mean(cosines)), 5),
+            "min": round(cosines[0], 5),
+            "p01": round(cosines[int(len(cosines) * 0.01)], 5),
+        },
+        "selection_agreement": round(float(np.mean(jaccards)), 4),
+        "identical_selections": round(identical / cases, 4),
+        "sentences_per_s": {
+            backend: round(encoded / secs, 1) if secs else None
+            for backend, secs in seconds.items()
+        },
+        "speedup": round(seconds["torch"] / seconds["onnx"], 2) if seconds["onnx"] else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=settings.embedding_model)
+    parser.add_argument("--cases", type=int, default=20, help="Synthetic documents to compare")
+    parser.add_argument("--sentences", type=int, default=200, help="Sentences per document")
+    parser.add_argument("--claims", type=int, default=20, help="Claims per document")
+    parser.add_argument("--top-k", type=int, default=settings.source_prefilter_top_k)
+    parser.add_argument("--context", type=int, default=settings.source_prefilter_context)
+    parser.add_argument("--min-agreement", type=float, default=0.95,
+                        help="Lowest acceptable mean selection agreement (default 0.95)")
+    parser.add_argument("--output", default="onnx_parity.json")
+    args = parser.parse_args()
+
+    torch_encoder = load_encoder(args.model, "torch")
+    onnx_encoder = load_encoder(args.model, "onnx")
+    if torch_encoder is None:
+        sys.exit("The PyTorch reference needs sentence-transformers")
+    if getattr(onnx_encoder, "backend", None) != "onnx":
+        sys.exit("No ONNX model available; run python -m api.onnx_export first")
+
+    result = compare_backends(
+        torch_encoder, onnx_encoder, args.cases, args.sentences, args.claims,
+        args.top_k, args.context,
+    )
+    result["model"] = args.model
+    result["onnx_export"] = onnx_encoder.metadata
+    Path(args.output).write_text(json.dumps(result, indent=2))
+
+    print("| metric | value |")
+    print("|---|---|")
+    print(f"| mean / min cosine | {result['cosine']['mean']:.4f} / {result['cosine']['min']:.4f} |")
+    print(f"| selection agreement (Jaccard) | {result['selection_agreement']:.3f} |")
+    print(f"| identical selections | {result['identical_selections']:.1%} |")
+    rates = result["sentences_per_s"]
+    print(f"| sentences/s torch / onnx | {rates['torch']} / {rates['onnx']} |")
+    print(f"| speedup | {result['speedup']}x |")
+
+    if result["selection_agreement"] < args.min_agreement:
+        print(f"\nSelection agreement below {args.min_agreement}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+API latency and throughput benchmarks
+
+Runs named scenarios against the app in-process (default, no network and
+no server needed) or against a running server (``--url``), and writes
+p50/p95/p99 latency, requests per second and peak RSS per scenario to JSON.
+Passing a previous result as ``--baseline`` compares against it and exits
+non-zero when a scenario regressed by more than ``--tolerance``.
+
+    python -m benchmarks.run                          # all scenarios
+    python -m benchmarks.run validate_small batch_small --requests 50
+    python -m benchmarks.run --output new.json --baseline release-0.1.0.json
+
+Requests use synthetic inputs (``benchmarks/synthetic.py``). Uncached
+scenarios give every request its own seed, so the result cache never hits.
+Run it from the repository root with the sourcecheck library installed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+
+from benchmarks.load import (
+    fetch_stats,
+    in_process_client,
+    peak_rss_mb,
+    remote_client,
+    run_load,
+    server_stats,
+)
+from benchmarks.synthetic import make_case
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULTS_DIR = ROOT / "api" / "static" / "defaults"
+
+# Endpoint, transcript sentences, claims per summary and optionally batch
+# items, request count and whether every request gets distinct inputs
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "validate_small": {"endpoint": "validate", "sentences": 20, "claims": 5},
+    "validate_medium": {"endpoint": "validate", "sentences": 200, "claims": 20},
+    "validate_large": {"endpoint": "validate", "sentences": 2000, "claims": 50, "requests": 10},
+    "validate_cached": {"endpoint": "validate", "sentences": 200, "claims": 20, "unique": False},
+    "stream_medium": {"endpoint": "stream", "sentences": 200, "claims": 20},
+    "batch_small": {"endpoint": "batch", "sentences": 20, "claims": 5, "items": 16, "requests": 10},
+}
+
+ENDPOINTS = {
+    "validate": "/api/v1/validate",
+    "stream": "/api/v1/validate/stream",
+    "batch": "/api/v1/validate/batch",
+}
+
+# Metrics compared against a baseline and the direction that is worse
+COMPARED = [
+    ("throughput_rps", lambda r: r["throughput_rps"], "lower"),
+    ("p50_ms", lambda r: r["latency_ms"]["p50"], "higher"),
+    ("p95_ms", lambda r: r["latency_ms"]["p95"], "higher"),
+    ("p99_ms", lambda r: r["latency_ms"]["p99"], "higher"),
+    ("rss_peak_mb", lambda r: r["rss_peak_mb"], "higher"),
+]
+
+
+def load_configs():
+    with open(DEFAULTS_DIR / "schema.yaml") as f:
+        schema = yaml.safe_load(f)
+    with open(DEFAULTS_DIR / "policies.yaml") as f:
+        policies = yaml.safe_load(f)
+    return schema, policies
+
+
+def request_factory(name: str, scenario: Dict[str, Any], schema, policies):
+    """Build ``make_request(i)`` for a scenario"""
+    url = ENDPOINTS[scenario["endpoint"]]
+    unique = scenario.get("unique", True)
+    # Scenarios draw from disjoint seed ranges so none reuses another's inputs
+    seed_base = zlib.crc32(name.encode("utf-8")) * 1000
+
+    def case(seed: int):
+        return make_case(scenario["sentences"], scenario["claims"], seed=seed)
+
+    def make_request(i: int) -> Dict[str, Any]:
+        seed = seed_base + (i if unique else 0)
+        if scenario["endpoint"] == "batch":
+            n_items = scenario.get("items", 8)
+            items = []
+            for j in range(n_items):
+                source_text, claims = case(seed * n_items + j)
+                items.append({"id": str(j), "source_text": source_text, "claims": claims})
+            body = {"schema": schema, "policies": policies, "items": items}
+        else:
+            source_text, claims = case(seed)
+            body = {
+                "source_text": source_text,
+                "claims": claims,
+                "schema": schema,
+                "policies": policies,
+            }
+        return {"method": "POST", "url": url, "json": body}
+
+    return make_request
+
+
+def environment(args) -> Dict[str, Any]:
+    """Where and how the benchmark ran, stored next to the results"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    from api import __version__
+    from api.config import settings
+    from api.result_cache import SOURCECHECK_VERSION
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": commit,
+        "api_version": __version__,
+        "sourcecheck_version": SOURCECHECK_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "target": args.url or "in-process",
+        "settings": {
+            "executor_kind": settings.executor_kind,
+            "executor_workers": settings.executor_workers,
+            "result_cache_backend": settings.result_cache_backend,
+            "source_prefilter_min_chars": settings.source_prefilter_min_chars,
+        },
+    }
+
+
+async def run_scenarios(names: List[str], args) -> Dict[str, Any]:
+    schema, policies = load_configs()
+    if args.url:
+        client_context = remote_client(args.url, args.timeout)
+    else:
+        client_context = in_process_client(args.timeout)
+
+    results: Dict[str, Any] = {}
+    async with client_context as client:
+        for name in names:
+            scenario = dict(SCENARIOS[name])
+            for key in ("sentences", "claims"):
+                if getattr(args, key) is not None:
+                    scenario[key] = getattr(args, key)
+            total = args.requests or scenario.get("requests", 40)
+            make_request = request_factory(name, scenario, schema, policies)
+
+            print(f"{name}: {total} requests, concurrency {args.concurrency}", file=sys.stderr)
+            if args.warmup:
+                # Seeds past the measured range so warm-up never primes the cache
+                await run_load(
+                    client, lambda i: make_request(total + i), args.warmup, args.concurrency,
+                    measure_rss=False,
+                )
+            before = await fetch_stats(client)
+            # Server memory is only visible from here when it runs in-process
+            result = await run_load(
+                client, make_request, total, args.concurrency, measure_rss=not args.url
+            )
+            after = await fetch_stats(client)
+            results[name] = {"scenario": scenario, **result, "server": server_stats(before, after)}
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Human-readable regressions of ``current`` against ``baseline``"""
+    regressions = []
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for metric, get, worse in COMPARED:
+            new, old = get(result), get(base)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (worse == "higher" and change > tolerance) or (worse == "lower" and -change > tolerance):
+                regressions.append(f"{name}: {metric} {old:.2f} -> {new:.2f} ({change:+.0%})")
+    return regressions
+
+
+def print_table(results: Dict[str, Any]):
+    print("| scenario | req/s | p50 ms | p95 ms | p99 ms | peak RSS MB | errors |")
+    print("|---|---|---|---|---|---|---|")
+    for name, r in results.items():
+        failed = r["requests"] - r["succeeded"]
+        lat = r["latency_ms"]
+        print(
+            f"| {name} | {r['throughput_rps']:.2f} | {lat['p50']:.0f} | {lat['p95']:.0f} | "
+            f"{lat['p99']:.0f} | {r['rss_peak_mb'] or '-'} | {failed} |"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("scenarios", nargs="*",
+                        help=f"Scenarios to run (default: all): {', '.join(SCENARIOS)}")
+    parser.add_argument("--url", help="Benchmark a running server instead of the in-process app")
+    parser.add_argument("--requests", type=int, help="Requests per scenario (overrides defaults)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per scenario")
+    parser.add_argument("--sentences", type=int, help="Override transcript length")
+    parser.add_argument("--claims", type=int, help="Override claims per summary")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="Previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed relative regression (default 0.15)")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    names = args.scenarios or list(SCENARIOS)
+    results = asyncio.run(run_scenarios(names, args))
+    report = {
+        "environment": environment(args),
+        "scenarios": results,
+        "process_peak_rss_mb": None if args.url else round(peak_rss_mb(), 1),
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print_table(results)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions against", args.baseline)
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Synthetic transcripts and summaries for benchmarks
+
+Generates clinical-visit style transcripts of a chosen length and free-text
+summaries with a chosen number of claims, deterministically from a seed.
+Claims are a mix of supported (restated from the transcript), drifted
+(a number or duration changed) and fabricated (not in the transcript)
+sentences, so every validator in the default policies has work to do.
+"""
+import random
+from typing import Any, Dict, List, Tuple
+
+NAMES = ["Maria", "James", "Aisha", "Chen", "Olga", "Rahul", "Grace", "Tomas"]
+SYMPTOMS = [
+    "chest pain", "shortness of breath", "headache", "nausea", "back pain",
+    "dizziness", "fatigue", "a persistent cough", "joint pain", "abdominal pain",
+]
+MEDICATIONS = [
+    ("aspirin", "81mg"), ("metformin", "500mg"), ("lisinopril", "10mg"),
+    ("atorvastatin", "20mg"), ("ibuprofen", "400mg"), ("omeprazole", "20mg"),
+]
+FREQUENCIES = ["daily", "twice daily", "at night", "as needed"]
+FINDINGS = [
+    "blood pressure of {a}/{b}", "heart rate of {a} beats per minute",
+    "temperature of 37.{c} degrees", "oxygen saturation of 9{c} percent",
+]
+PLANS = [
+    "order an ECG", "start physical therapy", "repeat labs in {n} weeks",
+    "refer to cardiology", "follow up in {n} days", "increase fluid intake",
+]
+
+SENTENCE_TEMPLATES = [
+    "{name} is a {age}-year-old {sex} who reports {symptom} for {n} days.",
+    "The patient has been taking {med} {dose} {freq} for {m} months.",
+    "On examination there was a {finding}.",
+    "The patient denies {symptom} and has no history of {symptom2}.",
+    "The plan is to {plan}.",
+    "{name} mentioned that the {symptom} gets worse in the evening.",
+    "There is a family history of {symptom2} on the mother's side.",
+    "The patient stopped {med} {n} weeks ago because of side effects.",
+]
+
+FABRICATED = [
+    "The patient was admitted to the intensive care unit overnight.",
+    "An MRI of the brain showed a small lesion.",
+    "The patient reports a recent trip to Brazil.",
+    "Surgery is scheduled for next Tuesday.",
+    "The patient is allergic to penicillin.",
+]
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    med, dose = rng.choice(MEDICATIONS)
+    finding = rng.choice(FINDINGS).format(
+        a=rng.randint(60, 160), b=rng.randint(50, 100), c=rng.randint(0, 9)
+    )
+    return template.format(
+        name=rng.choice(NAMES),
+        age=rng.randint(18, 90),
+        sex=rng.choice(["man", "woman"]),
+        symptom=rng.choice(SYMPTOMS),
+        symptom2=rng.choice(SYMPTOMS),
+        n=rng.randint(2, 14),
+        m=rng.randint(1, 24),
+        med=med,
+        dose=dose,
+        freq=rng.choice(FREQUENCIES),
+        finding=finding,
+        plan=rng.choice(PLANS).format(n=rng.randint(1, 6)),
+    )
+
+
+def make_transcript(n_sentences: int, seed: int = 0) -> List[str]:
+    """Transcript of ``n_sentences`` sentences (returned as a list)"""
+    rng = random.Random(seed)
+    return [_fill(rng.choice(SENTENCE_TEMPLATES), rng) for _ in range(n_sentences)]
+
+
+def _drift(sentence: str, rng: random.Random) -> str:
+    """Change the first number in a sentence (a temporal/numeric drift)"""
+    words = sentence.split()
+    for i, word in enumerate(words):
+        digits = "".join(ch for ch in word if ch.isdigit())
+        if digits and word.startswith(digits):
+            words[i] = str(int(digits) + rng.randint(1, 5)) + word[len(digits):]
+            return " ".join(words)
+    return sentence.replace("The patient", "The patient no longer", 1)
+
+
+def make_summary(
+    transcript: List[str],
+    n_claims: int,
+    seed: int = 0,
+    drifted: float = 0.2,
+    fabricated: float = 0.1,
+) -> List[str]:
+    """
+    ``n_claims`` summary sentences about ``transcript``
+
+    Roughly a ``drifted`` share alters a number from the transcript, a
+    ``fabricated`` share is unrelated to it and the rest restate it.
+    """
+    rng = random.Random(seed + 1)
+    claims = []
+    for _ in range(n_claims):
+        roll = rng.random()
+        if roll < fabricated or not transcript:
+            claims.append(rng.choice(FABRICATED))
+        elif roll < fabricated + drifted:
+            claims.append(_drift(rng.choice(transcript), rng))
+        else:
+            claims.append(rng.choice(transcript))
+    return claims
+
+
+def make_case(
+    n_sentences: int,
+    n_claims: int,
+    seed: int = 0,
+    drifted: float = 0.2,
+    fabricated: float = 0.1,
+) -> Tuple[str, Dict[str, Any]]:
+    """(source_text, claims) for the default free-text schema"""
+    transcript = make_transcript(n_sentences, seed)
+    summary = make_summary(transcript, n_claims, seed, drifted, fabricated)
+    return " ".join(transcript), {"body": " ".join(summary)}
@@ -0,0 +1,252 @@
+"""
+Throughput and memory versus gunicorn worker count
+
+Starts the API under gunicorn (``api/gunicorn_conf.py``) once per worker
+count, waits for ``/health/ready``, drives ``/api/v1/validate`` with a fixed
+number of concurrent clients and records requests per second, latency
+percentiles and per-process memory. RSS counts shared pages in every process
+that maps them; PSS splits shared pages between the processes sharing them,
+so the PSS total is the real footprint of the deployment.
+
+    python -m benchmarks.worker_scaling --workers 1 2 4 --requests 200
+
+Results are written as JSON (``--output``) and printed as a markdown table.
+Run from the repository root with the sourcecheck library installed.
+``--memory-only`` skips the load and waits for ``/health/live`` instead, to
+measure startup and the footprint of the web layer without the library.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULTS_DIR = ROOT / "api" / "static" / "defaults"
+
+SOURCE = (
+    "Patient is a 54-year-old male presenting with chest pain for two days. "
+    "He reports the pain is worse on exertion and relieved by rest. "
+    "History of hypertension, managed with lisinopril 10 mg daily. "
+    "No known drug allergies. Plan is an ECG and troponin, and a follow-up "
+    "with cardiology next week."
+)
+CLAIMS = {
+    "chief_complaint": "Chest pain for two days, worse on exertion.",
+    "medications": "Lisinopril 10 mg daily.",
+    "plan": "ECG, troponin and a cardiology follow-up.",
+}
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def _memory_kb(pid: int) -> Dict[str, int]:
+    """RSS and PSS of one process in KiB (Linux /proc)"""
+    memory = {"rss_kb": 0, "pss_kb": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key == "Rss":
+                    memory["rss_kb"] = int(value.split()[0])
+                elif key == "Pss":
+                    memory["pss_kb"] = int(value.split()[0])
+    except OSError:
+        pass
+    return memory
+
+
+def _wait_ready(base_url: str, timeout: float, probe: str = "/health/ready") -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(f"{base_url}{probe}", timeout=5) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Server not ready after {timeout:.0f}s")
+
+
+def _drive(base_url: str, payload: bytes, total: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = [total]
+
+    def client():
+        nonlocal errors
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            request = urllib.request.Request(
+                f"{base_url}/api/v1/validate",
+                data=payload,
+                headers={"Content-Type": "application/json"},
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=600) as response:
+                    response.read()
+                ok = True
+            except (urllib.error.URLError, OSError):
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "wall_s": wall,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def _benchmark_load(base_url: str, args) -> Dict[str, Any]:
+    payload = json.dumps({
+        "source_text": SOURCE,
+        "claims": CLAIMS,
+        "schema": yaml.safe_load((DEFAULTS_DIR / "schema.yaml").read_text()),
+        "policies": yaml.safe_load((DEFAULTS_DIR / "policies.yaml").read_text()),
+    }).encode("utf-8")
+    _drive(base_url, payload, args.warmup_requests, args.concurrency)
+    return _drive(base_url, payload, args.requests, args.concurrency)
+
+
+def run_one(workers: int, args) -> Dict[str, Any]:
+    """Start gunicorn with ``workers`` workers, benchmark it and stop it"""
+    env = dict(os.environ)
+    env.update({
+        "SOURCECHECK_SERVER_WORKERS": str(workers),
+        "SOURCECHECK_SERVER_BIND": f"127.0.0.1:{args.port}",
+        "SOURCECHECK_SERVER_PRELOAD": "false" if args.no_preload else "true",
+        # Every request must reach a model, not a cache
+        "SOURCECHECK_RESULT_CACHE_BACKEND": "none",
+        "SOURCECHECK_JOBS_ENABLED": "false",
+    })
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "python:api.gunicorn_conf", "api.main:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL if not args.verbose else None,
+        stderr=subprocess.DEVNULL if not args.verbose else None,
+    )
+    try:
+        probe = "/health/live" if args.memory_only else "/health/ready"
+        startup_s = _wait_ready(base_url, args.startup_timeout, probe)
+        # /health/ready answers from whichever worker accepts it; give the
+        # others a moment to finish their (memoized) warm-up
+        time.sleep(2)
+
+        if args.memory_only:
+            load = {"requests": 0, "errors": 0, "wall_s": 0.0, "throughput_rps": 0.0,
+                    "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+        else:
+            load = _benchmark_load(base_url, args)
+
+        master = _memory_kb(server.pid)
+        worker_memory = [_memory_kb(pid) for pid in _children(server.pid)]
+        return {
+            "workers": workers,
+            "preload": not args.no_preload,
+            "concurrency": args.concurrency,
+            "startup_s": startup_s,
+            **load,
+            "master_rss_mb": master["rss_kb"] / 1024,
+            "worker_rss_mb": [m["rss_kb"] / 1024 for m in worker_memory],
+            "worker_pss_mb": [m["pss_kb"] / 1024 for m in worker_memory],
+            "total_pss_mb": (master["pss_kb"] + sum(m["pss_kb"] for m in worker_memory)) / 1024,
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def markdown_table(results: List[Dict[str, Any]]) -> str:
+    lines = [
+        "| workers | startup s | req/s | p50 ms | p95 ms | p99 ms | RSS/worker MB"
+        " | PSS/worker MB | total PSS MB |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for r in results:
+        n = max(1, len(r["worker_rss_mb"]))
+        lines.append(
+            f"| {r['workers']} | {r['startup_s']:.1f} | {r['throughput_rps']:.2f} | "
+            f"{r['p50_ms']:.0f} | "
+            f"{r['p95_ms']:.0f} | {r['p99_ms']:.0f} | {sum(r['worker_rss_mb']) / n:.0f} | "
+            f"{sum(r['worker_pss_mb']) / n:.0f} | {r['total_pss_mb']:.0f} |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--warmup-requests", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--startup-timeout", type=float, default=600)
+    parser.add_argument("--no-preload", action="store_true",
+                        help="Load models in each worker instead of the master")
+    parser.add_argument("--memory-only", action="store_true",
+                        help="Measure startup and memory without sending validations")
+    parser.add_argument("--output", default="worker_scaling.json")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        print(f"Benchmarking {workers} worker(s)...", file=sys.stderr)
+        results.append(run_one(workers, args))
+
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(markdown_table(results))
+
+
+if __name__ == "__main__":
+    main()
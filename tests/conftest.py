@@ -0,0 +1,21 @@
+"""
+Shared test setup
+
+Stores, caches and the embedding model are pointed away from the working
+directory before ``api`` is imported, so tests never touch local data or
+download a model.
+"""
+import os
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix="sourcecheck-tests-")
+for name, value in {
+    "SOURCECHECK_EMBEDDING_MODEL": "none",
+    "SOURCECHECK_WARMUP_ENABLED": "false",
+    "SOURCECHECK_RESULT_CACHE_BACKEND": "memory",
+    "SOURCECHECK_JOBS_PATH": os.path.join(_data_dir, "jobs.sqlite3"),
+    "SOURCECHECK_REGISTRY_PATH": os.path.join(_data_dir, "registry.sqlite3"),
+    "SOURCECHECK_CORPUS_PATH": os.path.join(_data_dir, "corpus.sqlite3"),
+    "SOURCECHECK_CORPUS_DIR": os.path.join(_data_dir, "corpus"),
+}.items():
+    os.environ.setdefault(name, value)
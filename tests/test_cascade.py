@@ -0,0 +1,291 @@
+"""Early-exit validator cascade (api/cascade.py, api/validation.py)"""
+import re
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from api import validation
+from api.cascade import (
+    VoteTally,
+    cascade_order,
+    compose_disposition,
+    cost_model,
+    earliest_decision,
+    quality_dependent,
+    step_policies,
+)
+from api.checker_pool import CheckerPool
+from api.config import settings
+
+SCHEMA = {
+    "version": "2.0",
+    "fields": {"body": {"path": "body", "extraction_method": "sentence_split"}},
+}
+WEIGHTS = {
+    "temporal_drift_validator": 0.8,
+    "lexical_coverage_validator": 0.5,
+    "nli_validator": 0.7,
+    "hybrid_bm25_minilm_validator": 0.7,
+}
+CONFIDENCE = {
+    "temporal_drift_validator": 0.9,
+    "lexical_coverage_validator": 0.3,
+    "nli_validator": 0.8,
+    "hybrid_bm25_minilm_validator": 0.6,
+}
+POLICIES = {
+    "verdict_thresholds": {"min_score": 0.5, "fail_verdict": "insufficient_evidence"},
+    "validators": {"body": list(WEIGHTS)},
+    "aggregation": {
+        "strategy": "weighted_voting",
+        "default_weights": WEIGHTS,
+        "cascade": {"first": ["temporal_drift_validator", "lexical_coverage_validator"]},
+    },
+    "scoring": {"method": "simple"},
+}
+SOURCE = "Revenue grew by 12%. The company hired 25 new employees. Retention improved to 89%."
+# Compound claims are split by the library; "Ok." is below its minimum claim length
+BODY = "Revenue grew by 12% and the company hired 25 new employees. Retention improved to 89%. Ok."
+
+
+class FakeChecker:
+    """
+    Stand-in for ``sourcecheck.Checker`` with the behaviour the cascade
+    depends on: compound splitting, a minimum claim length, weighted voting
+    (score: weighted mean confidence of the winning validators) and verdict
+    thresholds. Records every validator run.
+    """
+
+    runs = Counter()
+    calls = []
+
+    def __init__(self, schema, policies, verdicts):
+        self.schema = schema
+        self.policies = policies
+        self.verdicts = verdicts
+
+    def claims(self, text):
+        for sentence in re.split(r"(?<=[.!?])\s+", text.strip()):
+            for part in re.split(r"\s+and\s+", sentence):
+                if len(part.strip()) >= 5:
+                    yield part.strip()
+
+    def verify_summary(self, transcript, summary):
+        FakeChecker.calls.append((list(self.schema["fields"]), self.policies))
+        weights = self.policies["aggregation"]["default_weights"]
+        thresholds = self.policies.get("verdict_thresholds") or {}
+        dispositions = []
+        for field, spec in self.schema["fields"].items():
+            names = [name for name in self.policies["validators"].get(field, [])]
+            for text in self.claims(summary[spec["path"]]):
+                tally = VoteTally()
+                for name in names:
+                    FakeChecker.runs[name, text.rstrip(".")] += 1
+                    tally.add(self.verdicts(name, text), weights[name])
+                verdict, score = "insufficient_evidence", None
+                if names:
+                    verdict = max(tally.votes, key=tally.votes.get)
+                    voters = [n for n in names if self.verdicts(n, text) == verdict]
+                    score = sum(weights[n] * CONFIDENCE[n] for n in voters) / sum(
+                        weights[n] for n in voters
+                    )
+                    if verdict == "supported" and score < thresholds.get("min_score", 0.0):
+                        verdict = thresholds["fail_verdict"]
+                dispositions.append(SimpleNamespace(
+                    claim=SimpleNamespace(field=field, text=text),
+                    verdict=verdict, evidence_count=1, validator=names[0] if names else None,
+                    explanation=f"{names}", confidence=score, quality_score=None,
+                    quality_issues=[], evidence=[],
+                ))
+        supported = sum(d.verdict == "supported" for d in dispositions)
+        refuted = sum(d.verdict == "refuted" for d in dispositions)
+        total = len(dispositions)
+        return SimpleNamespace(
+            dispositions=dispositions, overall_score=supported / total if total else 0.0,
+            total_claims=total, supported_count=supported, refuted_count=refuted,
+            insufficient_count=total - supported - refuted,
+            support_rate=supported / total if total else 0.0,
+        )
+
+
+def agreeing(name, text):
+    """Every validator supports every claim except NLI, which refutes the hiring claim"""
+    if name == "nli_validator" and "hired" in text:
+        return "refuted"
+    return "supported"
+
+
+@pytest.fixture
+def fake_checkers(monkeypatch):
+    FakeChecker.runs.clear()
+    FakeChecker.calls.clear()
+
+    def install(verdicts=agreeing, checker_class=FakeChecker, policies=POLICIES):
+        def build(schema, policies):
+            return checker_class(schema, validation.without_cascade(policies), verdicts)
+
+        monkeypatch.setattr(validation, "cascade_pool", CheckerPool(build, max_size=16))
+        return checker_class(SCHEMA, validation.without_cascade(policies), verdicts)
+
+    return install
+
+
+def test_order_and_earliest_decision():
+    order = cascade_order(["temporal_drift_validator", "lexical_coverage_validator"], list(WEIGHTS))
+    assert order == list(WEIGHTS)
+    # No one or two of the shipped weights can outvote the rest
+    assert earliest_decision(order, WEIGHTS) == 3
+    assert earliest_decision(["a", "b"], {}) is None
+
+
+def test_cascade_follows_the_library_claims_and_never_reruns_a_validator(fake_checkers):
+    full = fake_checkers()
+    response = validation._validate(SCHEMA, POLICIES, full, SOURCE, {"body": BODY}, 3)
+
+    assert [d["claim_text"] for d in response["dispositions"]] == [
+        "Revenue grew by 12%", "the company hired 25 new employees.", "Retention improved to 89%.",
+    ]
+    assert max(FakeChecker.runs.values()) == 1
+    # Three agreeing validators decide a claim; the hiring claim needs all four
+    skipped = [d["skipped_validators"] for d in response["dispositions"]]
+    assert skipped == [["hybrid_bm25_minilm_validator"], [], ["hybrid_bm25_minilm_validator"]]
+    assert sum(FakeChecker.runs.values()) == 3 * len(WEIGHTS) - 2
+    cascade = response["cascade"]
+    assert (cascade["claims_decided_early"], cascade["claims_fully_validated"]) == (2, 1)
+    assert cascade["validator_runs_skipped"] == 2
+
+
+def test_cascade_matches_full_validation(fake_checkers):
+    full = fake_checkers()
+    cascaded = validation._validate(SCHEMA, POLICIES, full, SOURCE, {"body": BODY}, 3)
+    plain = validation._validate(
+        SCHEMA, validation.without_cascade(POLICIES), full, SOURCE, {"body": BODY}, 3
+    )
+    assert plain["cascade"] is None and cascaded["cascade"] is not None
+
+    def outcome(response):
+        return [(d["field"], d["claim_text"], d["verdict"]) for d in response["dispositions"]]
+
+    assert outcome(cascaded) == outcome(plain)
+    for key in ("overall_score", "total_claims", "supported_count", "refuted_count"):
+        assert cascaded[key] == pytest.approx(plain[key])
+    # Claims that ran every validator get the library's score; the others
+    # average the validators that ran
+    for ours, theirs in zip(cascaded["dispositions"], plain["dispositions"]):
+        if not ours["skipped_validators"]:
+            assert ours["score"] == pytest.approx(theirs["score"])
+
+
+def test_claims_stay_open_while_min_score_is_undecided(fake_checkers):
+    # Three validators outvote the fourth, but their weighted confidence
+    # (0.645) could still be lifted over min_score 0.7 by the NLI vote
+    policies = {
+        **POLICIES, "verdict_thresholds": {"min_score": 0.7, "fail_verdict": "insufficient_evidence"},
+    }
+    policies["aggregation"] = {
+        **POLICIES["aggregation"],
+        "cascade": {"first": [
+            "temporal_drift_validator", "lexical_coverage_validator", "hybrid_bm25_minilm_validator",
+        ]},
+    }
+    full = fake_checkers(policies=policies)
+    cascaded = validation._validate(SCHEMA, policies, full, SOURCE, {"body": BODY}, 3)
+    plain = validation._validate(
+        SCHEMA, validation.without_cascade(policies), full, SOURCE, {"body": BODY}, 3
+    )
+    assert [d["verdict"] for d in cascaded["dispositions"]] == [
+        d["verdict"] for d in plain["dispositions"]
+    ]
+    assert all(d["skipped_validators"] == [] for d in cascaded["dispositions"])
+
+
+def test_quality_dependent_policies_are_not_cascaded(fake_checkers):
+    full = fake_checkers()
+    for extra in (
+        {"quality_modules": [{"name": "semantic_quality"}]},
+        {"verdict_thresholds": {"min_score": 0.5, "min_quality_score": 0.7}},
+        {"scoring": {"method": "quality_weighted"}},
+    ):
+        policies = {**POLICIES, **extra}
+        assert quality_dependent(policies)
+        FakeChecker.calls.clear()
+        response = validation._validate(SCHEMA, policies, full, SOURCE, {"body": BODY}, 3)
+        assert response["cascade"] is None
+        assert FakeChecker.calls == [(["body"], full.policies)]
+    assert not quality_dependent(POLICIES)
+
+
+def test_fields_without_validators_use_a_checker_for_those_fields(fake_checkers):
+    schema = {
+        "version": "2.0",
+        "fields": {**SCHEMA["fields"], "title": {"path": "title"}},
+    }
+    full = fake_checkers()
+    full.schema = schema
+    response = validation._validate(
+        schema, POLICIES, full, SOURCE, {"body": BODY, "title": "Quarterly results"}, 3
+    )
+    assert [d["field"] for d in response["dispositions"]] == ["body"] * 3 + ["title"]
+    fallback = [call for call in FakeChecker.calls if "title" in call[0]]
+    assert [fields for fields, _ in fallback] == [["title"]]
+
+
+def test_estimated_saving_is_never_negative(fake_checkers):
+    full = fake_checkers()
+    estimates = []
+    for _ in range(3):
+        response = validation._validate(SCHEMA, POLICIES, full, SOURCE, {"body": BODY}, 3)
+        estimates.append(response["cascade"]["estimated_cpu_saved_ms"])
+    assert estimates[-1] is not None and estimates[-1] >= 0
+
+
+def test_claims_split_differently_fall_back_to_the_full_checker(fake_checkers, caplog):
+    class Resplitting(FakeChecker):
+        def claims(self, text):
+            # The NLI step also splits at commas
+            for claim in super().claims(text):
+                if self.policies["validators"]["body"] != ["nli_validator"]:
+                    yield claim
+                else:
+                    yield from (part for part in re.split(r",\s*", claim) if part)
+
+    full = fake_checkers(checker_class=Resplitting)
+    body = "Revenue grew by 12%, a record. Retention improved to 80%."
+    response = validation._validate(SCHEMA, POLICIES, full, SOURCE, {"body": body}, 3)
+    dispositions = {d["claim_text"]: d for d in response["dispositions"]}
+    assert set(dispositions) == {"Revenue grew by 12%, a record.", "Retention improved to 80%."}
+    assert dispositions["Revenue grew by 12%, a record."]["skipped_validators"] == []
+    assert dispositions["Retention improved to 80%."]["skipped_validators"] == [
+        "hybrid_bm25_minilm_validator"
+    ]
+    assert "split differently" in caplog.text
+
+
+def test_step_policies_lift_thresholds_and_compose_restores_them():
+    policies = step_policies(
+        {**POLICIES, "quality_modules": [{"name": "semantic_quality"}]},
+        {"body": ["nli_validator"]},
+    )
+    assert policies["validators"] == {"body": ["nli_validator"]}
+    assert policies["quality_modules"] == []
+    assert policies["verdict_thresholds"]["min_score"] == 0.0
+    assert "cascade" not in policies["aggregation"]
+
+    def run(verdict, score):
+        return {"verdict": verdict, "score": score, "quality_score": 1.0, "quality_issues": []}
+
+    runs = [
+        ("temporal_drift_validator", run("supported", 0.4)),
+        ("lexical_coverage_validator", run("supported", 0.5)),
+        ("nli_validator", run("refuted", 0.9)),
+    ]
+    composed = compose_disposition(runs, "supported", WEIGHTS, POLICIES)
+    assert composed["score"] == pytest.approx((0.8 * 0.4 + 0.5 * 0.5) / 1.3)
+    assert composed["verdict"] == "insufficient_evidence"  # below min_score 0.5
+    assert composed["quality_score"] is None and composed["quality_issues"] == []
+
+
+def test_checker_pools_share_one_memory_budget():
+    total = validation.checker_pool.max_memory_mb + validation.cascade_pool.max_memory_mb
+    assert total == settings.checker_pool_memory_mb
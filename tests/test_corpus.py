@@ -0,0 +1,77 @@
+"""Stored document indexes and concurrent ingests"""
+import threading
+
+import numpy as np
+import pytest
+
+from api import corpus
+from api.corpus import CorpusStore, load_index, save_index
+from api.source_index import SourceIndex
+
+TEXT = "Revenue grew by 12%. The company hired 30 engineers. Retention improved to 89%."
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = CorpusStore(str(tmp_path / "corpus.sqlite3"), str(tmp_path / "corpus"))
+    monkeypatch.setattr(corpus, "_store", store)
+    return store
+
+
+def test_second_save_keeps_the_first(tmp_path):
+    index = SourceIndex.build(TEXT)
+    directory = tmp_path / "doc_1"
+    assert save_index(index, directory, {"chars": len(TEXT), "writer": 1})
+    assert not save_index(index, directory, {"chars": len(TEXT), "writer": 2})
+    assert (directory / "meta.json").read_text().count('"writer": 1') == 1
+    assert load_index(directory).spans.tolist() == index.spans.tolist()
+    assert [p.name for p in tmp_path.iterdir()] == ["doc_1"]
+
+
+def test_concurrent_ingests_of_one_document(store, monkeypatch):
+    corpus_id = store.create_corpus("reports")["corpus_id"]
+    # Both ingests find the document missing before either has stored it
+    both_built = threading.Barrier(2)
+    build = corpus.build_source_index
+
+    def build_together(text):
+        index = build(text)
+        both_built.wait(timeout=5)
+        return index
+
+    monkeypatch.setattr(corpus, "build_source_index", build_together)
+    results, errors = [], []
+
+    def ingest():
+        try:
+            results.append(corpus.ingest_document(corpus_id, TEXT))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=ingest) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len({r["document_id"] for r in results}) == 1
+    assert [d["document_id"] for d in store.documents(corpus_id)] == [results[0]["document_id"]]
+
+
+def test_selection_ranks_across_documents():
+    weather = SourceIndex.build("The weather was mild. The trip was long.")
+    notes = SourceIndex.build(
+        "Patient was admitted with chest pain. The ECG was normal. Vitals were stable."
+    )
+    selected = corpus.select_across(
+        [weather, notes], ["Patient was admitted with chest pain."], top_k=1, context=0
+    )
+    assert selected == [[], [0]]
+
+
+def test_scope_bm25_matches_one_index():
+    first, second = "Chest pain at rest. No fever.", "Pain worsened overnight. Chest X-ray clear."
+    combined = SourceIndex.build(f"{first} {second}").bm25_scores("chest pain")
+    scores = corpus.scope_bm25([SourceIndex.build(first), SourceIndex.build(second)], "chest pain")
+    assert np.allclose(np.concatenate(scores), combined / combined.max())
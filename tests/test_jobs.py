@@ -0,0 +1,209 @@
+"""Job leases, recovery and execution (api/jobs.py)"""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from api import jobs
+from api.executor import ValidationExecutor
+from api.jobs import CANCELLED, QUEUED, RUNNING, SUCCEEDED, JobQueue, JobStore
+
+SCHEMA = {
+    "version": "2.0",
+    "fields": {"body": {"path": "body", "extraction_method": "sentence_split"}},
+}
+REQUEST = {
+    "source_text": "Revenue grew by 12%.",
+    "claims": {"body": "Revenue grew by 12%. Retention improved to 89%."},
+    "schema": SCHEMA,
+    "policies": {},
+    "max_evidence": 3,
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def _fake_validation(schema, policies, source_text, claims, max_evidence):
+    dispositions = [
+        {
+            "field": name, "claim_text": claims[spec["path"]], "verdict": "supported",
+            "validator": "fake", "skipped_validators": [],
+        }
+        for name, spec in schema["fields"].items()
+    ]
+    return {
+        "overall_score": 1.0,
+        "total_claims": len(dispositions),
+        "supported_count": len(dispositions),
+        "refuted_count": 0,
+        "insufficient_count": 0,
+        "support_rate": 1.0,
+        "dispositions": dispositions,
+        "cascade": None,
+    }
+
+
+def _wait_for(store, job_id, statuses, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {store.get(job_id)['status']}")
+
+
+def test_live_lease_is_not_recovered(store):
+    store.insert("a", 0, REQUEST, 1)
+    assert store.claim_next("owner-1", lease_seconds=30) == "a"
+    assert store.recover() == 0
+    assert store.get("a")["status"] == RUNNING
+
+
+def test_expired_lease_is_requeued(store):
+    store.insert("a", 0, REQUEST, 1)
+    store.claim_next("owner-1", lease_seconds=-1)
+    store.update("a", claims_done=1)
+    assert store.recover() == 1
+    job = store.get("a")
+    assert job["status"] == QUEUED
+    assert job["started_at"] is None and job["claims_done"] == 0
+
+
+def test_restarted_process_reclaims_jobs_of_its_predecessor(store):
+    # Same hostname and pid after a container restart: only the lease decides
+    store.insert("a", 0, REQUEST, 1)
+    store.claim_next("before-restart", lease_seconds=-1)
+    queue = JobQueue(store, lease_seconds=30)
+    queue._recover()
+    assert store.get("a")["status"] == QUEUED
+    assert store.claim_next(queue.owner, queue.lease_seconds) == "a"
+
+
+def test_renew_extends_only_the_owners_leases(store):
+    store.insert("a", 0, REQUEST, 1)
+    store.insert("b", 0, REQUEST, 1)
+    store.claim_next("owner-1", lease_seconds=-1)
+    store.claim_next("owner-2", lease_seconds=-1)
+    assert store.renew("owner-1", lease_seconds=30) == 1
+    assert store.recover() == 1
+    assert store.get("a")["status"] == RUNNING
+    assert store.get("b")["status"] == QUEUED
+
+
+def test_updates_from_a_previous_owner_are_ignored(store):
+    store.insert("a", 0, REQUEST, 1)
+    store.claim_next("owner-1", lease_seconds=-1)
+    store.recover()
+    store.claim_next("owner-2", lease_seconds=30)
+    assert not store.update("a", owner="owner-1", status=SUCCEEDED)
+    assert store.update("a", owner="owner-2", claims_done=1)
+    assert store.get("a")["status"] == RUNNING
+
+
+def test_stores_created_before_leases_are_migrated(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL,"
+        " priority INTEGER NOT NULL, created_at REAL NOT NULL, started_at REAL,"
+        " finished_at REAL, parts_total INTEGER NOT NULL DEFAULT 0,"
+        " parts_done INTEGER NOT NULL DEFAULT 0, claims_done INTEGER NOT NULL DEFAULT 0,"
+        " cancel_requested INTEGER NOT NULL DEFAULT 0, owner TEXT,"
+        " request TEXT NOT NULL, result TEXT, error TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO jobs (id, status, priority, created_at, owner, request)"
+        " VALUES ('a', 'running', 0, 0, 'host:1', '{}')"
+    )
+    conn.commit()
+    conn.close()
+    assert JobStore(path).recover() == 1
+
+
+def test_queue_runs_job_and_requeues_on_stop(store, monkeypatch):
+    monkeypatch.setattr(jobs, "run_validation", _fake_validation)
+    queue = JobQueue(store, poll_interval=0.01, lease_seconds=30)
+    queue.start()
+    try:
+        job = queue.submit(REQUEST)
+        job = _wait_for(store, job["id"], (SUCCEEDED,))
+        assert store.get_result(job["id"]) is not None
+    finally:
+        queue.stop()
+
+    store.insert("b", 0, REQUEST, 1)
+    store.claim_next(queue.owner, queue.lease_seconds)
+    assert store.recover(queue.owner) == 1
+    assert store.get("b")["status"] == QUEUED
+
+
+def test_progress_is_reported_per_claim(store, monkeypatch):
+    monkeypatch.setattr(jobs, "run_validation", _fake_validation)
+    queue = JobQueue(store, max_parts=4, poll_interval=0.01)
+    job = queue.submit(REQUEST)
+    assert (job["parts_total"], job["claims_total"], job["claims_done"]) == (2, 2, 0)
+    queue.start()
+    try:
+        job = _wait_for(store, job["id"], (SUCCEEDED,))
+    finally:
+        queue.stop()
+    assert (job["parts_done"], job["claims_done"]) == (2, 2)
+
+
+def test_running_job_is_cancelled_between_claim_groups(store, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_validation(*args):
+        started.set()
+        release.wait(5)
+        return _fake_validation(*args)
+
+    monkeypatch.setattr(jobs, "run_validation", blocking_validation)
+    queue = JobQueue(store, max_parts=4, poll_interval=0.01)
+    queue.start()
+    try:
+        job = queue.submit(REQUEST)
+        assert started.wait(5)
+        queue.cancel(job["id"])
+        release.set()
+        job = _wait_for(store, job["id"], (CANCELLED,))
+    finally:
+        queue.stop()
+    assert (job["parts_done"], job["claims_done"]) == (1, 1)
+
+
+def test_jobs_wait_for_an_idle_executor_worker(store, monkeypatch):
+    ran = []
+    monkeypatch.setattr(
+        jobs, "run_validation", lambda *args: ran.append(True) or _fake_validation(*args)
+    )
+    executor = ValidationExecutor(max_workers=1, max_queue=4)
+    release = threading.Event()
+    request = threading.Thread(target=executor.call, args=(release.wait, 5))
+    request.start()
+    queue = JobQueue(store, poll_interval=0.01, executor=executor)
+    queue.start()
+    try:
+        job = queue.submit(REQUEST)
+        _wait_for(store, job["id"], (RUNNING,))
+        time.sleep(0.2)
+        # The busy worker's queue had room, but the job did not take it
+        assert ran == [] and executor.in_flight == 1
+        release.set()
+        job = _wait_for(store, job["id"], (SUCCEEDED,))
+    finally:
+        queue.stop()
+        request.join()
+    # Every claim group went through the shared executor
+    assert executor.stats()["submitted"] == 1 + job["parts_total"]
+
+
+def test_cancel_queued_job(store):
+    queue = JobQueue(store)
+    job = queue.submit(REQUEST)
+    assert queue.cancel(job["id"])["status"] == CANCELLED
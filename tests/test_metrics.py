@@ -0,0 +1,66 @@
+"""Scrape and stats handlers keep store queries off the event loop"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.corpus import CorpusStore
+from api.main import app
+from api.metrics import REGISTRY, CollectedMetric
+from api.result_cache import ResultCache
+from api.routes import metrics as metrics_routes
+
+
+def _off_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return True
+    return False
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_scrape_renders_off_the_event_loop(client, monkeypatch):
+    calls = []
+    probe = CollectedMetric(
+        "sourcecheck_test_probe", "Test probe",
+        collect=lambda: calls.append(_off_event_loop()) or {(): 1},
+    )
+    monkeypatch.setattr(REGISTRY, "_metrics", REGISTRY._metrics + [probe])
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "sourcecheck_test_probe 1" in response.text
+    assert calls == [True]
+
+
+def test_scrape_does_not_query_the_result_cache_backend(client, monkeypatch):
+    queried = []
+
+    class Backend:
+        name = "probe"
+
+        def stats(self):
+            queried.append(True)
+            return {}
+
+    monkeypatch.setattr(metrics_routes, "result_cache", ResultCache(Backend(), 0))
+    response = client.get("/metrics")
+    assert 'sourcecheck_cache_hits_total{cache="result"} 0' in response.text
+    assert queried == []
+
+
+def test_stats_query_stores_off_the_event_loop(client, monkeypatch):
+    calls = []
+    stats = CorpusStore.stats
+
+    def probed(self):
+        calls.append(_off_event_loop())
+        return stats(self)
+
+    monkeypatch.setattr(CorpusStore, "stats", probed)
+    assert client.get("/api/v1/stats").status_code == 200
+    assert calls == [True]
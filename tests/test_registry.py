@@ -0,0 +1,30 @@
+"""Registry content cached per process and deleted through another"""
+from api.registry import Registry
+
+TEXT = "Revenue grew by 12%. The company hired 30 engineers."
+
+
+def test_delete_in_one_process_is_seen_by_another(tmp_path):
+    path = str(tmp_path / "registry.sqlite3")
+    first, second = Registry(path, 1024 * 1024), Registry(path, 1024 * 1024)
+    source_id = first.put_source(TEXT)
+    config_id = first.put_config("policies", {"scoring": {"method": "simple"}})
+    # Both are now in the second registry's cache
+    assert second.get_source(source_id) == TEXT
+    assert second.get_config("policies", config_id) == {"scoring": {"method": "simple"}}
+
+    assert first.delete(source_id) and first.delete(config_id)
+    assert second.get_source(source_id) is None
+    assert second.get_config("policies", config_id) is None
+    assert second.stats()["cached_bytes"] == 0
+
+
+def test_reupload_after_delete_is_served_again(tmp_path):
+    path = str(tmp_path / "registry.sqlite3")
+    first, second = Registry(path, 1024 * 1024), Registry(path, 1024 * 1024)
+    source_id = first.put_source(TEXT)
+    assert second.get_source(source_id) == TEXT
+    second.delete(source_id)
+    assert first.get_source(source_id) is None
+    assert second.put_source(TEXT) == source_id
+    assert first.get_source(source_id) == TEXT
@@ -0,0 +1,65 @@
+"""Request body limits, with and without Content-Length"""
+import pytest
+from fastapi.testclient import TestClient
+
+from api.config import settings
+from api.main import app
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "admission_enabled", True)
+    monkeypatch.setattr(settings, "admission_max_request_mb", 1)
+    monkeypatch.setattr(settings, "source_upload_max_mb", 2)
+    return TestClient(app)
+
+
+def _chunks(data, chunk=64 * 1024):
+    """``data`` as a generator, so it is sent chunked without a Content-Length"""
+    for start in range(0, len(data), chunk):
+        yield data[start:start + chunk]
+
+
+def test_declared_length_over_limit(client):
+    response = client.post(
+        "/api/v1/validate", content=b" " * (MB + 1),
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 413
+
+
+def test_chunked_body_over_limit(client):
+    response = client.post(
+        "/api/v1/validate", content=_chunks(b" " * (MB + 1)),
+        headers={"Content-Type": "application/json"},
+    )
+    assert "content-length" not in response.request.headers
+    assert response.status_code == 413
+
+
+def test_chunked_body_under_limit_is_read(client):
+    response = client.post(
+        "/api/v1/validate", content=_chunks(b" " * 1000),
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 422
+
+
+def test_source_stream_uses_upload_limit(client):
+    response = client.post(
+        "/api/v1/sources/stream", content=_chunks(b" " * (2 * MB + 1)),
+        headers={"Content-Type": "text/plain"},
+    )
+    assert response.status_code == 413
+
+
+def test_source_stream_is_not_held_to_request_limit(client):
+    text = b"The company hired 30 engineers. " * (MB // 20)
+    response = client.post(
+        "/api/v1/sources/stream", content=_chunks(text),
+        headers={"Content-Type": "text/plain"},
+    )
+    assert response.status_code == 201
+
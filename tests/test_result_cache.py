@@ -0,0 +1,29 @@
+"""SQLite result cache backend across forked worker processes"""
+import multiprocessing
+
+from api.result_cache import SQLiteBackend
+
+
+def _read_in_child(backend, parent_conn, queue):
+    value = backend.get("key")
+    queue.put((value, backend._conn is not parent_conn))
+
+
+def test_forked_process_opens_its_own_connection(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "results.sqlite3"), 10)
+    backend.set("key", b"value", 0)
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    child = context.Process(target=_read_in_child, args=(backend, backend._conn, queue))
+    child.start()
+    child.join(timeout=10)
+    assert queue.get(timeout=1) == (b"value", True)
+    assert backend.get("key") == b"value"
+
+
+def test_connection_is_opened_on_first_use(tmp_path):
+    path = tmp_path / "results.sqlite3"
+    backend = SQLiteBackend(str(path), 10)
+    assert not path.exists()
+    assert backend.get("key") is None
+    assert path.exists()
@@ -0,0 +1,172 @@
+"""Session reuse on /validate and /validate/stream, with the result cache"""
+import re
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routes import validate as validate_routes
+from api.serialization import loads
+from api.validation import claim_units, summarize
+
+SCHEMA = {
+    "version": "2.0",
+    "fields": {"body": {"path": "body", "extraction_method": "sentence_split"}},
+}
+POLICIES = {"scoring": {"method": "simple"}}
+SOURCE = "Revenue grew by 12%. The company hired 30 engineers. Retention improved to 89%."
+BODY = "Revenue grew by 12%. The company hired 30 engineers."
+
+
+@pytest.fixture
+def validated(monkeypatch):
+    """Claims sent to the executor, one list per validation"""
+    calls = []
+
+    async def fake_execute(request):
+        units = claim_units(request.schema, request.claims)
+        calls.append([claim for _, _, claim in units])
+        dispositions = [
+            {
+                "field": name, "claim_text": claim, "verdict": "supported",
+                "quality_score": None, "validator": "fake", "skipped_validators": [],
+            }
+            for name, _, claim in units
+        ]
+        return summarize(dispositions, request.policies), {
+            "queue_ms": 0.0, "execution_ms": 0.0, "stages": {},
+        }
+
+    monkeypatch.setattr(validate_routes, "SOURCECHECK_AVAILABLE", True)
+    monkeypatch.setattr(validate_routes, "execute_request", fake_execute)
+    return calls
+
+
+@pytest.fixture
+def library(monkeypatch):
+    """
+    Claims the fake library extracted, one list per validation: compound
+    sentences are split at "and", claims under 5 characters dropped
+    """
+    calls = []
+
+    async def fake_execute(request):
+        units = claim_units(request.schema, request.claims)
+        claims = [
+            (name, part.strip())
+            for name, _, sentence in units
+            for part in re.split(r"\s+and\s+", sentence)
+            if len(part.strip()) >= 5
+        ]
+        calls.append([claim for _, claim in claims])
+        dispositions = [
+            {
+                "field": name, "claim_text": claim, "verdict": "supported",
+                "quality_score": 0.5, "validator": "fake", "skipped_validators": [],
+            }
+            for name, claim in claims
+        ]
+        return summarize(dispositions, request.policies), {
+            "queue_ms": 0.0, "execution_ms": 0.0, "stages": {},
+        }
+
+    monkeypatch.setattr(validate_routes, "SOURCECHECK_AVAILABLE", True)
+    monkeypatch.setattr(validate_routes, "execute_request", fake_execute)
+    return calls
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _request(body, session_id):
+    return {
+        "source_text": SOURCE, "claims": {"body": body}, "schema": SCHEMA,
+        "policies": POLICIES, "session_id": session_id,
+    }
+
+
+def test_edit_reuses_unchanged_claims(client, validated):
+    session = str(uuid.uuid4())
+    client.post("/api/v1/validate", json=_request(f"{BODY} Unrelated {session}.", session))
+    response = client.post(
+        "/api/v1/validate", json=_request(f"{BODY} Retention improved to 89%.", session)
+    )
+    assert response.headers["X-Claims-Reused"] == "2"
+    assert response.headers["X-Claims-Validated"] == "1"
+    assert validated[-1] == ["Retention improved to 89%."]
+    assert loads(response.content)["total_claims"] == 3
+
+
+def test_cache_hit_seeds_the_session(client, validated):
+    # A first session leaves the result in the result cache
+    client.post("/api/v1/validate", json=_request(BODY, str(uuid.uuid4())))
+    assert len(validated) == 1
+
+    session = str(uuid.uuid4())
+    hit = client.post("/api/v1/validate", json=_request(BODY, session))
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.headers["X-Claims-Reused"] == "2"
+    assert hit.headers["X-Claims-Validated"] == "0"
+
+    edited = client.post(
+        "/api/v1/validate", json=_request(f"{BODY} Retention improved to 89%.", session)
+    )
+    assert edited.headers["X-Claims-Reused"] == "2"
+    assert validated[-1] == ["Retention improved to 89%."]
+
+
+def test_stream_cache_hit_seeds_the_session(client, validated):
+    body = f"{BODY} Streamed once."
+    client.post("/api/v1/validate", json=_request(body, None))
+
+    session = str(uuid.uuid4())
+    hit = client.post("/api/v1/validate/stream", json=_request(body, session))
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.headers["X-Claims-Reused"] == "3"
+
+    edited = client.post(
+        "/api/v1/validate", json=_request(f"{body} Retention improved to 89%.", session)
+    )
+    assert edited.headers["X-Claims-Reused"] == "3"
+    assert validated[-1] == ["Retention improved to 89%."]
+
+
+def test_reuse_follows_the_claims_the_library_returned(client, library):
+    session = str(uuid.uuid4())
+    body = "Revenue grew by 12% and the company hired 30 engineers. Ok."
+    client.post("/api/v1/validate", json=_request(body, session))
+    assert library[-1] == ["Revenue grew by 12%", "the company hired 30 engineers."]
+
+    response = client.post(
+        "/api/v1/validate", json=_request(f"{body} Retention improved to 89%.", session)
+    )
+    assert library[-1] == ["Retention improved to 89%."]
+    assert response.headers["X-Claims-Reused"] == "2"
+    assert response.headers["X-Claims-Validated"] == "1"
+    result = loads(response.content)
+    assert [d["claim_text"] for d in result["dispositions"]] == [
+        "Revenue grew by 12%", "the company hired 30 engineers.", "Retention improved to 89%.",
+    ]
+
+
+def test_unreproducible_scores_clear_the_session(client, library, monkeypatch):
+    session = str(uuid.uuid4())
+    policies = {"scoring": {"method": "quality_weighted"}}
+    request = {**_request(BODY, session), "policies": policies}
+    execute = validate_routes.execute_request
+
+    async def rescored(work):
+        # An overall score summarize does not arrive at from the dispositions
+        result, timing = await execute(work)
+        return {**result, "overall_score": 1.0}, timing
+
+    monkeypatch.setattr(validate_routes, "execute_request", rescored)
+    client.post("/api/v1/validate", json=request)
+    monkeypatch.setattr(validate_routes, "execute_request", execute)
+    edited = {**request, "claims": {"body": f"{BODY} Retention improved to 89%."}}
+    response = client.post("/api/v1/validate", json=edited)
+    assert response.headers["X-Claims-Reused"] == "0"
+    assert len(library[-1]) == 3
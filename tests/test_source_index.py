@@ -0,0 +1,169 @@
+"""Windowed and streamed source index builds against a one-shot build"""
+import random
+import zlib
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api import validation
+from api.config import Settings, settings
+from api.main import app
+from api.routes import validate as validate_routes
+from api.source_index import SourceIndex, SourceIndexBuilder, split_sentences, tokenize
+
+TEXT = "".join(
+    random.Random(7).choice([
+        "Revenue grew by 12% in Q3. ",
+        "The company hired 30 engineers!  ",
+        "Retention improved to 89%?\n",
+        "Margins were flat.\n\nNew section\r\n",
+        "Umsatz stieg um 5 % — laut Bericht. ",
+        "e.g. a sentence without its end ",
+    ])
+    for _ in range(400)
+)
+
+
+class FakeEncoder:
+    """Deterministic bag-of-words embeddings"""
+
+    def encode(self, sentences):
+        vectors = np.zeros((len(sentences), 16), dtype=np.float32)
+        for i, sentence in enumerate(sentences):
+            for token in tokenize(sentence):
+                vectors[i, zlib.crc32(token.encode()) % 16] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+def one_shot(text, encoder=None):
+    """Reference index: the whole text split, tokenised and embedded at once"""
+    spans = split_sentences(text)
+    sentences = [text[s:e] for s, e in spans]
+    postings, lengths = {}, []
+    for i, sentence in enumerate(sentences):
+        counts = Counter(tokenize(sentence))
+        lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            docs, tfs = postings.setdefault(term, ([], []))
+            docs.append(i)
+            tfs.append(tf)
+    embeddings = encoder.encode(sentences).astype(np.float16) if encoder is not None else None
+    return spans, postings, lengths, embeddings
+
+
+def assert_matches(index, text, encoder=None):
+    spans, postings, lengths, embeddings = one_shot(text, encoder)
+    assert index.text == text
+    assert index.spans.tolist() == [list(span) for span in spans]
+    assert index.doc_lengths.tolist() == lengths
+    assert {t: (d.tolist(), f.tolist()) for t, (d, f) in index.postings.items()} == postings
+    if encoder is None:
+        assert index.embeddings is None
+    else:
+        np.testing.assert_array_equal(np.asarray(index.embeddings), embeddings)
+
+
+def pieces(text, seed):
+    rng = random.Random(seed)
+    start = 0
+    while start < len(text):
+        end = start + rng.randint(1, 300)
+        yield text[start:end]
+        start = end
+
+
+@pytest.mark.parametrize("window_chars", [1, 500, 1_000_000])
+def test_windows_match_one_shot_build(window_chars):
+    encoder = FakeEncoder()
+    index = SourceIndex.build(TEXT, encoder=encoder, window_chars=window_chars)
+    assert_matches(index, TEXT, encoder)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_pieces_match_one_shot_build(seed):
+    encoder = FakeEncoder()
+    builder = SourceIndexBuilder(encoder, window_chars=700)
+    for piece in pieces(TEXT, seed):
+        builder.feed(piece)
+    assert_matches(builder.finish(), TEXT, encoder)
+
+
+def test_spilled_embeddings_match(tmp_path):
+    encoder = FakeEncoder()
+    builder = SourceIndexBuilder(
+        encoder, window_chars=500, max_resident_bytes=1024, spill_dir=str(tmp_path)
+    )
+    for piece in pieces(TEXT, 11):
+        builder.feed(piece)
+    index = builder.finish()
+    assert index.spilled
+    assert_matches(index, TEXT, encoder)
+
+
+def test_fed_text_is_not_kept_in_memory(tmp_path):
+    builder = SourceIndexBuilder(window_chars=500, spill_dir=str(tmp_path))
+    for piece in pieces(TEXT, 3):
+        builder.feed(piece)
+    # Only the unfinished sentence stays in memory; the rest is in a temporary file
+    assert not any(isinstance(v, str) and len(v) > 1000 for v in vars(builder).values())
+    assert_matches(builder.finish(), TEXT)
+
+
+def test_streamed_upload_matches_inline_upload(monkeypatch):
+    monkeypatch.setattr(settings, "source_index_window_chars", 500)
+    client = TestClient(app)
+    data = TEXT.encode("utf-8")
+    streamed = client.post(
+        "/api/v1/sources/stream",
+        content=(data[i:i + 333] for i in range(0, len(data), 333)),
+        headers={"Content-Type": "text/plain"},
+    )
+    assert streamed.status_code == 201
+    inline = client.post("/api/v1/sources", json={"text": TEXT})
+    assert streamed.json()["source_id"] == inline.json()["source_id"]
+    assert streamed.json()["chars"] == len(TEXT)
+    assert streamed.json()["index"]["sentences"] == len(split_sentences(TEXT))
+
+
+def test_streamed_source_is_validated_narrowed(monkeypatch):
+    transcripts = []
+
+    class Checker:
+        def verify_summary(self, transcript, summary):
+            transcripts.append(transcript)
+            return SimpleNamespace(
+                dispositions=[], overall_score=0.0, total_claims=0, supported_count=0,
+                refuted_count=0, insufficient_count=0, support_rate=0.0,
+            )
+
+    monkeypatch.setattr(validate_routes, "SOURCECHECK_AVAILABLE", True)
+    monkeypatch.setattr(validation, "checker_pool", SimpleNamespace(get=lambda *_: Checker()))
+    monkeypatch.setattr(settings, "admission_enabled", True)
+    monkeypatch.setattr(settings, "admission_max_source_chars", 5000)
+    monkeypatch.setattr(settings, "source_prefilter_min_chars", 5000)
+    client = TestClient(app)
+    data = TEXT.encode("utf-8")
+    source_id = client.post(
+        "/api/v1/sources/stream",
+        content=(data[i:i + 4096] for i in range(0, len(data), 4096)),
+        headers={"Content-Type": "text/plain"},
+    ).json()["source_id"]
+
+    response = client.post("/api/v1/validate", json={
+        "source_id": source_id,
+        "claims": {"body": "Retention improved to 89%."},
+        "schema": {"version": "2.0", "fields": {"body": {"path": "body"}}},
+        "policies": {"scoring": {"method": "simple"}},
+    })
+    assert len(TEXT) > 5000
+    assert response.status_code == 200
+    assert len(transcripts) == 1 and 0 < len(transcripts[0]) < 5000
+
+
+def test_sources_over_the_admission_limit_are_narrowed_by_default():
+    fields = Settings.model_fields
+    assert fields["source_prefilter_min_chars"].default == fields["admission_max_source_chars"].default
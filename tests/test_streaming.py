@@ -0,0 +1,125 @@
+"""Request splitting for /validate/stream"""
+import asyncio
+import uuid
+
+from fastapi.testclient import TestClient
+
+from api.config import settings
+from api.main import app
+from api.models import ValidationRequest
+from api.routes import validate as validate_routes
+from api.serialization import loads
+from api.validation import claim_groups, claim_units, summarize
+
+TEXT_SCHEMA = {
+    "version": "2.0",
+    "fields": {"body": {"path": "body", "extraction_method": "sentence_split"}},
+}
+BODY = "Revenue grew by 12%. The company hired 30 engineers. Retention improved to 89%."
+
+
+def test_single_text_field_is_split_into_sentence_groups():
+    parts = claim_groups(TEXT_SCHEMA, {"body": BODY}, 4)
+    assert [claims["body"] for _, claims in parts] == [
+        "Revenue grew by 12%.",
+        "The company hired 30 engineers.",
+        "Retention improved to 89%.",
+    ]
+    assert all(schema["fields"] == TEXT_SCHEMA["fields"] for schema, _ in parts)
+
+
+def test_groups_are_bounded_by_max_parts():
+    body = " ".join(f"Claim number {i} holds." for i in range(10))
+    parts = claim_groups(TEXT_SCHEMA, {"body": body}, 4)
+    assert len(parts) == 4
+    assert " ".join(claims["body"] for _, claims in parts) == body
+
+
+def test_nested_paths_fall_back_to_field_groups():
+    schema = {
+        "version": "2.0",
+        "fields": {
+            "a": {"path": "x.a", "extraction_method": "sentence_split"},
+            "b": {"path": "x.b"},
+        },
+    }
+    claims = {"x": {"a": BODY, "b": "Paris office"}}
+    parts = claim_groups(schema, claims, 4)
+    assert [list(s["fields"]) for s, _ in parts] == [["a"], ["b"]]
+    assert all(c is claims for _, c in parts)
+
+
+def test_groups_never_split_after_abbreviations():
+    body = "56 y.o. female with chest pain. Dr. Smith started aspirin 81 mg p.o. daily. No fever."
+    parts = claim_groups(TEXT_SCHEMA, {"body": body}, 4)
+    assert [claims["body"] for _, claims in parts] == [
+        "56 y.o. female with chest pain.",
+        "Dr. Smith started aspirin 81 mg p.o. daily.",
+        "No fever.",
+    ]
+
+
+def test_paragraph_breaks_always_split():
+    parts = claim_groups(TEXT_SCHEMA, {"body": "See e.g. the chart.\n\nnext paragraph."}, 4)
+    assert [claims["body"] for _, claims in parts] == ["See e.g. the chart.", "next paragraph."]
+
+
+def _fake_validation(schema, policies, source_text, claims, max_evidence):
+    dispositions = [
+        {
+            "field": "body", "claim_text": claims["body"], "verdict": "supported",
+            "quality_score": None, "validator": "fake", "skipped_validators": [],
+        }
+    ]
+    return summarize(dispositions, policies)
+
+
+def test_split_stream_results_are_not_cached(monkeypatch):
+    monkeypatch.setattr(validate_routes, "SOURCECHECK_AVAILABLE", True)
+    monkeypatch.setattr(validate_routes, "run_validation", _fake_validation)
+    monkeypatch.setattr(settings, "claims_parallel", False)
+    request = {
+        "source_text": BODY, "claims": {"body": f"{BODY} Stored {uuid.uuid4()}."},
+        "schema": TEXT_SCHEMA, "policies": {},
+    }
+    client = TestClient(app)
+    events = [loads(line) for line in client.post("/api/v1/validate/stream", json=request).iter_lines()]
+    assert [e["event"] for e in events].count("disposition") == 4
+    again = client.post("/api/v1/validate/stream", json=request)
+    assert again.headers["X-Cache"] == "MISS"
+
+
+def test_claims_against_long_sources_stay_in_one_group(monkeypatch):
+    groups = []
+
+    async def fake_submit(key, item, size=1):
+        schema, policies, source_text, claims, _ = item
+        groups.append(claims["body"])
+        units = claim_units(schema, claims)
+        dispositions = [
+            {"field": name, "claim_text": claim, "verdict": "supported", "quality_score": None}
+            for name, _, claim in units
+        ]
+        return summarize(dispositions, policies), {"queue_ms": 0.0, "execution_ms": 0.0}
+
+    monkeypatch.setattr(settings, "claims_parallel", True)
+    monkeypatch.setattr(settings, "claims_max_batch", 1)
+    monkeypatch.setattr(settings, "claims_split_max_source_chars", 100)
+    monkeypatch.setattr(settings, "source_prefilter_min_chars", 0)
+    monkeypatch.setattr(validate_routes.claim_batcher, "submit", fake_submit)
+    request = {"claims": {"body": BODY}, "schema": TEXT_SCHEMA, "policies": {}}
+
+    short = ValidationRequest(source_text=BODY, **request)
+    asyncio.run(validate_routes.run_claims_parallel(short))
+    assert len(groups) == 3
+
+    groups.clear()
+    long = ValidationRequest(source_text=BODY * 5, **request)
+    result, _ = asyncio.run(validate_routes.run_claims_parallel(long))
+    assert groups == [BODY]
+    assert result["total_claims"] == 3
+
+    groups.clear()
+    monkeypatch.setattr(settings, "source_prefilter_min_chars", 200)
+    asyncio.run(validate_routes.run_claims_parallel(long))
+    assert len(groups) == 3